@@ -0,0 +1,131 @@
+"""chopsticks_solver module
+
+Solve Chopsticks by retrograde analysis. Minimax cannot search Chopsticks,
+since its positions repeat, so instead every one of the 2 * 5 ** 4 positions
+is enumerated and values are propagated backwards from the finished ones: a
+position is won if some move leads to a position lost for the opponent, and
+lost once every move leads to a position won for the opponent. Positions
+that never resolve either way are in cycles neither player has to leave, so
+they are draws.
+"""
+from collections import deque
+from itertools import product
+from typing import Any
+from state import StateChopsticks
+
+WIN = 1
+DRAW = 0
+LOSE = -1
+
+
+def get_position(state: StateChopsticks) -> tuple:
+    """Return the position of state: a tuple of whether it is p1's turn and
+    the fingers of p1's left and right and p2's left and right hands.
+
+    >>> get_position(StateChopsticks(True).make_move('ll'))
+    (False, 1, 1, 2, 1)
+    """
+    return (state.is_p1_turn, *state.moves)
+
+
+def is_over(position: tuple) -> bool:
+    """Return whether a player has no fingers left at position.
+
+    >>> is_over((True, 0, 0, 1, 3)), is_over((True, 0, 2, 1, 3))
+    (True, False)
+    """
+    return position[1] + position[2] == 0 or position[3] + position[4] == 0
+
+
+def solve() -> dict:
+    """Return a dictionary mapping every Chopsticks position (see
+    get_position) to a tuple of its value for the player to move (WIN, DRAW
+    or LOSE), the best move there (None if the game is over), and the number
+    of moves until the game ends with best play (None for draws).
+
+    The best move wins as fast as possible, loses as slowly as possible, and
+    otherwise keeps the draw.
+
+    >>> table = solve()
+    >>> len(table)
+    1250
+    >>> table[(True, 1, 1, 1, 1)][0]
+    0
+    >>> table[(False, 3, 0, 0, 0)]
+    (-1, None, 0)
+    >>> table[(True, 4, 0, 0, 1)]
+    (1, 'lr', 1)
+    """
+    children, parents = {}, {}
+    for is_p1_turn, *fingers in product([True, False], *[range(5)] * 4):
+        position = (is_p1_turn, *fingers)
+        children[position] = []
+        if is_over(position):
+            continue
+        state = StateChopsticks(is_p1_turn, tuple(fingers))
+        for move in state.iter_moves():
+            child = get_position(state.make_move(move))
+            children[position].append((move, child))
+            parents.setdefault(child, []).append((move, position))
+    table = {position: (LOSE, None, 0) for position in children
+             if is_over(position)}
+    unsolved = {position: len(moves) for position, moves in children.items()}
+    queue = deque(table)
+    while queue:
+        child = queue.popleft()
+        value, _, length = table[child]
+        for move, position in parents.get(child, []):
+            if position in table:
+                continue
+            if value == LOSE:
+                # Breadth-first, so this is the quickest win.
+                table[position] = (WIN, move, length + 1)
+                queue.append(position)
+            else:
+                unsolved[position] -= 1
+                if unsolved[position] == 0:
+                    # Every move loses, and this one is the last to be solved,
+                    # so it holds out the longest.
+                    table[position] = (LOSE, move, length + 1)
+                    queue.append(position)
+    for position, moves in children.items():
+        if position not in table:
+            table[position] = (DRAW, next(move for move, child in moves
+                                          if child not in table or
+                                          table[child][0] == DRAW), None)
+    return table
+
+
+_TABLE = {}
+
+
+def get_table() -> dict:
+    """Return the solved table of Chopsticks, solving it the first time.
+
+    >>> get_table() is get_table()
+    True
+    """
+    if not _TABLE:
+        _TABLE.update(solve())
+    return _TABLE
+
+
+def lookup_strategy(game: Any) -> Any:
+    """Return the best move for the current state of game, a Chopsticks
+    game, by looking it up in the solved table.
+
+    >>> from game import Chopsticks
+    >>> game = Chopsticks(True)
+    >>> game.current_state = StateChopsticks(True, (4, 0, 0, 1))
+    >>> lookup_strategy(game)
+    'lr'
+    """
+    return get_table()[get_position(game.current_state)][1]
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config="a1_pyta.txt")
@@ -130,7 +130,7 @@ thus losing.
         >>> chop.is_over(chop.current_state)
         False
         """
-        return 0 in [sum(current_state.moves[a]) for a in current_state.moves]
+        return current_state.is_over()
 
     def is_winner(self, player: str) -> bool:
         """Return True if the player is the winner of the game Chopsticks,
@@ -141,7 +141,7 @@ thus losing.
         >>> Chopsticks(True).is_winner('p1')
         False
         """
-        if sum(self.current_state.moves[1]) == 0:
+        if sum(self.current_state.moves[:2]) == 0:
             return self.is_over(self.current_state) and player == 'p2'
         return self.is_over(self.current_state) and player == 'p1'
 
@@ -12,7 +12,8 @@ playable_games = {'s': SubstractSquare,
 # The strategies you are to implement.  See strategy.py, and then decide
 # how to modify this.
 usable_strategies = {'r': computer_strategy,
-                     'i': interactive_strategy}
+                     'i': interactive_strategy,
+                     'p': perfect_strategy}
 
 class GameInterface:
     """
@@ -1,7 +1,8 @@
 """
 state module
 """
-from typing import Any
+from math import isqrt
+from typing import Any, Iterator
 
 
 class State:
@@ -13,6 +14,7 @@ class State:
     """
     is_p1_turn: bool
     moves: Any
+    __slots__ = ('is_p1_turn', 'moves')
 
     def __init__(self, is_p1_turn: bool, moves: Any) -> None:
         """Initialize a game state.
@@ -51,6 +53,13 @@ class State:
         """
         raise NotImplementedError('Subclass needed')
 
+    def iter_moves(self) -> Iterator:
+        """Return an iterator over the current possible moves, in the order
+        of get_possible_moves(), for searches that may stop before the last
+        one. Subclasses generate the moves lazily instead.
+        """
+        return iter(self.get_possible_moves())
+
     def is_valid_move(self, move: Any) -> bool:
         """Return True if the move that the player made is valid, otherwise
         False.
@@ -71,11 +80,51 @@ class State:
         raise NotImplementedError('Subclass needed')
 
 
+CHOPSTICKS_MOVES = ('ll', 'lr', 'rl', 'rr')
+
+
+def _chopsticks_transitions() -> dict:
+    """Return a dictionary mapping every (is_p1_turn, fingers) pair of
+    Chopsticks, where fingers is the tuple (p1 left, p1 right, p2 left,
+    p2 right), to a dictionary mapping each valid move there to the fingers
+    it leads to.
+
+    A move names the hand of the current player, then the hand of the
+    opponent it taps, which must both still have fingers.
+
+    >>> _chopsticks_transitions()[(False, (1, 2, 3, 0))]
+    {'ll': (4, 2, 3, 0), 'lr': (1, 0, 3, 0)}
+    """
+    hands = ('l', 'r')
+    transitions = {}
+    for n in range(625):
+        fingers = (n // 125, n // 25 % 5, n // 5 % 5, n % 5)
+        for is_p1_turn in (True, False):
+            own, other = (0, 2) if is_p1_turn else (2, 0)
+            moves = {}
+            for move in CHOPSTICKS_MOVES:
+                mine = own + hands.index(move[0])
+                theirs = other + hands.index(move[1])
+                if fingers[mine] and fingers[theirs]:
+                    after = list(fingers)
+                    after[theirs] = (fingers[theirs] + fingers[mine]) % 5
+                    moves[move] = tuple(after)
+            transitions[(is_p1_turn, fingers)] = moves
+    return transitions
+
+
+_TRANSITIONS = _chopsticks_transitions()
+
+
 class StateChopsticks(State):
     """Represent a state of game Chopsticks; Extends State.
+
+    moves - the fingers on the hands, as the tuple (p1 left, p1 right,
+            p2 left, p2 right)
     """
+    __slots__ = ()
 
-    def __init__(self, is_p1_turn: bool) -> None:
+    def __init__(self, is_p1_turn: bool, moves: tuple = (1, 1, 1, 1)) -> None:
         """Initialize game chopsticks.
 
         Extends State.__init__
@@ -84,9 +133,9 @@ class StateChopsticks(State):
         >>> state.is_p1_turn
         True
         >>> state.moves
-        {1: [1, 1], 2: [1, 1]}
+        (1, 1, 1, 1)
         """
-        State.__init__(self, is_p1_turn, {1: [1, 1], 2: [1, 1]})
+        State.__init__(self, is_p1_turn, moves)
 
     def __str__(self) -> str:
         """Return a string representation of the game state of Chopsticks.
@@ -96,12 +145,11 @@ class StateChopsticks(State):
         >>> state = StateChopsticks(True)
         >>> print(state)
         It's p1's turn. ...1-1...1-1...
+        >>> print(StateChopsticks(False, (0, 0, 1, 3)))
+        Game over. ...0-0...1-3...
         """
-        temp_1 = "...{}-{}...{}-{}...".format\
-        (self.moves[1][0], self.moves[1][1],
-         self.moves[2][0], self.moves[2][1])
-        temp_2 = "Game over." \
-            if 0 in [sum(self.moves[a]) for a in self.moves] \
+        temp_1 = "...{}-{}...{}-{}...".format(*self.moves)
+        temp_2 = "Game over." if self.is_over() \
             else ("It's {}'s turn.".format('p1' if self.is_p1_turn else 'p2'))
         return temp_2 + ' ' + temp_1
 
@@ -117,6 +165,27 @@ class StateChopsticks(State):
         """
         return str(self)
 
+    def __hash__(self) -> int:
+        """Return a hash of this state, consistent with State.__eq__: the four
+        finger counts as the digits of a base-5 number, and the turn.
+
+        >>> hash(StateChopsticks(True)) == hash(StateChopsticks(True))
+        True
+        >>> len({StateChopsticks(True), StateChopsticks(False)})
+        2
+        """
+        return ((self.moves[0] * 5 + self.moves[1]) * 5 +
+                self.moves[2]) * 10 + self.moves[3] * 2 + self.is_p1_turn
+
+    def is_over(self) -> bool:
+        """Return True if a player of this state has no fingers left.
+
+        >>> StateChopsticks(True).is_over()
+        False
+        """
+        return self.moves[0] + self.moves[1] == 0 or \
+            self.moves[2] + self.moves[3] == 0
+
     def get_possible_moves(self) -> list:
         """Return the current possible moves of game Chopsticks.
 
@@ -126,9 +195,18 @@ class StateChopsticks(State):
         >>> state.get_possible_moves()
         ['ll', 'lr', 'rl', 'rr']
         """
-        moves = ['ll', 'lr', 'rl', 'rr']
-        result = [move for move in moves if self.is_valid_move(move)]
-        return result
+        return list(_TRANSITIONS[(self.is_p1_turn, self.moves)])
+
+    def iter_moves(self) -> Iterator:
+        """Return an iterator over the current possible moves of game
+        Chopsticks, straight off the precomputed transitions.
+
+        Over-rides State.iter_moves()
+
+        >>> next(StateChopsticks(True).iter_moves())
+        'll'
+        """
+        return iter(_TRANSITIONS[(self.is_p1_turn, self.moves)])
 
     def is_valid_move(self, move: str) -> bool:
         """Return True if the move that the player made is valid for game
@@ -140,14 +218,7 @@ class StateChopsticks(State):
         >>> state.is_valid_move('not valid')
         False
         """
-        return move in ['ll', 'lr', 'rl', 'rr'] and \
-            (not ((move == 'll' and (self.moves[1][0] * self.moves[2][0]) == 0)
-                  or (move == ('lr' if self.is_p1_turn else 'rl')
-                      and (self.moves[1][0] * self.moves[2][1]) == 0)
-                  or (move == ('rl' if self.is_p1_turn else 'lr')
-                      and (self.moves[1][1] * self.moves[2][0]) == 0)
-                  or (move == 'rr'
-                      and (self.moves[1][1] * self.moves[2][1]) == 0)))
+        return move in _TRANSITIONS[(self.is_p1_turn, self.moves)]
 
     def make_move(self, move: str) -> Any:
         """Apply the move to change the current state of the game Chopsticks.
@@ -158,31 +229,33 @@ class StateChopsticks(State):
         >>> state.make_move('ll')
         It's p2's turn. ...1-1...2-1...
         """
-        n_state = StateChopsticks(not self.is_p1_turn)
-        new_moves = {1: [self.moves[1][0], self.moves[1][1]],
-                     2: [self.moves[2][0], self.moves[2][1]]}
-        if self.is_p1_turn:
-            if move == 'll':
-                new_moves[2][0] = self.moves[2][0] + self.moves[1][0]
-            elif move == 'lr':
-                new_moves[2][1] = self.moves[2][1] + self.moves[1][0]
-            elif move == 'rl':
-                new_moves[2][0] = self.moves[2][0] + self.moves[1][1]
-            elif move == 'rr':
-                new_moves[2][1] = self.moves[2][1] + self.moves[1][1]
-        else:
-            if move == 'll':
-                new_moves[1][0] = self.moves[1][0] + self.moves[2][0]
-            elif move == 'lr':
-                new_moves[1][1] = self.moves[1][1] + self.moves[2][0]
-            elif move == 'rl':
-                new_moves[1][0] = self.moves[1][0] + self.moves[2][1]
-            elif move == 'rr':
-                new_moves[1][1] = self.moves[1][1] + self.moves[2][1]
-        new_moves = {1: [num_1 % 5 for num_1 in new_moves[1]],
-                     2: [num_2 % 5 for num_2 in new_moves[2]]}
-        n_state.moves = new_moves
-        return n_state
+        transitions = _TRANSITIONS[(self.is_p1_turn, self.moves)]
+        return StateChopsticks(not self.is_p1_turn, transitions[move])
+
+    def apply_move(self, move: str) -> tuple:
+        """Apply the move to this state itself, for searches that take their
+        moves back instead of making a new state for each one, and return
+        the token undo_move needs to take it back: the fingers before it.
+
+        >>> state = StateChopsticks(True)
+        >>> token = state.apply_move('lr')
+        >>> state.is_p1_turn, state.moves
+        (False, (1, 1, 1, 2))
+        >>> state.undo_move(token)
+        >>> state == StateChopsticks(True)
+        True
+        """
+        token = self.moves
+        self.moves = _TRANSITIONS[(self.is_p1_turn, self.moves)][move]
+        self.is_p1_turn = not self.is_p1_turn
+        return token
+
+    def undo_move(self, token: tuple) -> None:
+        """Take back the move apply_move returned token for, which must be
+        the latest move applied to this state and not taken back yet.
+        """
+        self.moves = token
+        self.is_p1_turn = not self.is_p1_turn
 
 
 class StateSubstractSquare(State):
@@ -190,6 +263,7 @@ class StateSubstractSquare(State):
 
     Extends State.__init__
     """
+    __slots__ = ()
 
     def __init__(self, is_p1_turn: bool, moves=None) -> None:
         """Initialize a state of game Substract Square.
@@ -235,6 +309,14 @@ class StateSubstractSquare(State):
         """
         return str(self)
 
+    def __hash__(self) -> int:
+        """Return a hash of this state, consistent with State.__eq__.
+
+        >>> len({StateSubstractSquare(True, 2), StateSubstractSquare(True, 2)})
+        1
+        """
+        return self.moves * 2 + self.is_p1_turn
+
     def get_possible_moves(self) -> list:
         """Return the current possible moves of game Substract Square.
 
@@ -244,8 +326,20 @@ class StateSubstractSquare(State):
         >>> state.get_possible_moves()
         [1, 4]
         """
-        return [n ** 2 for n in range(1, self.moves + 1)
-                if n ** 2 <= self.moves]
+        return list(self.iter_moves())
+
+    def iter_moves(self) -> Iterator:
+        """Yield the current possible moves of game Substract Square, the
+        squares up to the number, in increasing order.
+
+        Over-rides State.iter_moves()
+
+        >>> moves = StateSubstractSquare(True, 10 ** 12).iter_moves()
+        >>> next(moves), next(moves)
+        (1, 4)
+        """
+        for n in range(1, isqrt(self.moves) + 1):
+            yield n * n
 
     def is_valid_move(self, move: int) -> bool:
         """Return True if the move that the player made is valid for game
@@ -1,6 +1,8 @@
 """strategy module"""
 from typing import Any
 import random
+from chopsticks_solver import lookup_strategy
+from state import StateChopsticks
 
 
 # TODO: Adjust the type annotation as needed.
@@ -20,6 +22,16 @@ def computer_strategy(game: Any) -> Any:
     return random.choice(game.current_state.get_possible_moves())
 
 
+def perfect_strategy(game: Any) -> Any:
+    """
+    Return the best move for game from the solved table of Chopsticks, or a
+    random move for other games, which are not solved.
+    """
+    if isinstance(game.current_state, StateChopsticks):
+        return lookup_strategy(game)
+    return computer_strategy(game)
+
+
 if __name__ == '__main__':
     import python_ta
     python_ta.check_all(config="a1_pyta.txt")
@@ -0,0 +1,262 @@
+"""
+A benchmark suite for the game engines and strategies.
+
+Every benchmark runs on states reached by random play from a fixed seed, so
+runs are comparable, and reports operations per second. Each benchmark runs
+in a fresh process, whose peak resident set size is recorded with it, so the
+memory of one benchmark is not charged to the next. Results can be
+stored as JSON, and compared against a stored baseline to flag every
+benchmark that got slower by more than a threshold.
+
+Usage: python benchmark.py [-o OUT] [-b BASELINE] [--update-baseline]
+                           [-t THRESHOLD] [--min-time SECONDS] [NAME ...]
+
+The exit status is 1 if any benchmark regressed against the baseline.
+"""
+import json
+import os
+import platform
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from time import perf_counter
+from typing import Any, Callable
+from stonehenge_game import StonehengeGame
+from stonehenge_state import StonehengeState
+from strategy import recursive_minimax
+from subtract_square_game import SubtractSquareGame
+from transposition import TranspositionTable
+
+SEED = 148
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                'benchmark_baseline.json')
+
+
+def peak_rss() -> Any:
+    """
+    Return the peak resident set size of this process so far in kilobytes,
+    or None where the platform cannot tell.
+
+    Linux keeps the peak of getrusage() across fork and exec, so there the
+    peak of this process alone is read from /proc instead.
+    """
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def random_states(size: int, count: int, seed: int = SEED) -> list:
+    """
+    Return count unfinished StonehengeStates of side-length size, reached by
+    random play from seed.
+
+    >>> states = random_states(2, 5)
+    >>> len(states), all(state.get_possible_moves() for state in states)
+    (5, True)
+    >>> [repr(state) for state in states] == \
+    [repr(state) for state in random_states(2, 5)]
+    True
+    """
+    rand = random.Random(seed * 10 + size)
+    states = []
+    while len(states) < count:
+        state = StonehengeState(rand.random() < 0.5, size)
+        for _ in range(rand.randrange(len(state.get_possible_moves()))):
+            state = state.make_move(rand.choice(state.get_possible_moves()))
+            if not state.get_possible_moves():
+                break
+        if state.get_possible_moves():
+            states.append(state)
+    return states
+
+
+def cycle(operation: Callable, items: list) -> Callable:
+    """
+    Return a function that applies operation to the next of items (cycling
+    through them) each time it is called.
+    """
+    position = [0]
+
+    def step() -> None:
+        operation(items[position[0]])
+        position[0] = (position[0] + 1) % len(items)
+    return step
+
+
+def make_moves(size: int) -> Callable:
+    """
+    Return a benchmark of StonehengeState.make_move on side-length size.
+    """
+    rand = random.Random(SEED)
+    pairs = [(state, rand.choice(state.get_possible_moves()))
+             for state in random_states(size, 50)]
+    return cycle(lambda pair: pair[0].make_move(pair[1]), pairs)
+
+
+def solve_stonehenge(size: int) -> Callable:
+    """
+    Return a benchmark of a full recursive_minimax solve of a new game of
+    side-length size, with an empty transposition table each time and
+    no persistent evaluation cache.
+    """
+    game = StonehengeGame(True, str(size))
+    return lambda: recursive_minimax(game, TranspositionTable(), cache=None)
+
+
+def solve_subtract_square(total: int) -> Callable:
+    """
+    Return a benchmark of a full recursive_minimax solve of SubtractSquare
+    from total, with an empty transposition table each time and
+    no persistent evaluation cache.
+    """
+    game = SubtractSquareGame(True, total)
+    return lambda: recursive_minimax(game, TranspositionTable(), cache=None)
+
+
+BENCHMARKS = {
+    'make_move[3]': lambda: make_moves(3),
+    'make_move[5]': lambda: make_moves(5),
+    'grid_copy[5]': lambda: cycle(lambda state: state.grid.copy(),
+                                  random_states(5, 50)),
+    'get_possible_moves[5]': lambda: cycle(
+        lambda state: state.get_possible_moves(), random_states(5, 50)),
+    'rough_outcome[3]': lambda: cycle(lambda state: state.rough_outcome(),
+                                      random_states(3, 50)),
+    'rough_outcome[5]': lambda: cycle(lambda state: state.rough_outcome(),
+                                      random_states(5, 50)),
+    'solve_stonehenge[1]': lambda: solve_stonehenge(1),
+    'solve_stonehenge[2]': lambda: solve_stonehenge(2),
+    'solve_stonehenge[3]': lambda: solve_stonehenge(3),
+    'solve_subtract_square[50]': lambda: solve_subtract_square(50),
+    'solve_subtract_square[500]': lambda: solve_subtract_square(500)}
+
+
+def measure(step: Callable, min_time: float) -> float:
+    """
+    Return how many times per second step runs, calling it in growing
+    batches until a batch takes at least min_time seconds.
+
+    >>> measure(lambda: None, 0.01) > 1000
+    True
+    """
+    number = 1
+    while True:
+        start = perf_counter()
+        for _ in range(number):
+            step()
+        elapsed = perf_counter() - start
+        if elapsed >= min_time:
+            return number / elapsed
+        number *= 2 if elapsed <= 0 else \
+            max(2, min(10, int(min_time / elapsed * 1.2) + 1))
+
+
+def run_benchmark(name: str, min_time: float) -> dict:
+    """
+    Return the result of running the benchmark called name in this process
+    for at least min_time seconds: its rate, and the peak resident set size
+    of this process.
+    """
+    ops = measure(BENCHMARKS[name](), min_time)
+    return {'ops_per_sec': ops, 'peak_rss_kb': peak_rss()}
+
+
+def run_benchmarks(names: list = None, min_time: float = 0.2) -> dict:
+    """
+    Run the benchmarks called names (all of BENCHMARKS if not given), each
+    for at least min_time seconds in a freshly started process, and return
+    the results.
+
+    Raise ValueError for an unknown benchmark.
+
+    >>> results = run_benchmarks(['make_move[3]'], 0.01)
+    >>> sorted(results['benchmarks']['make_move[3]'])
+    ['ops_per_sec', 'peak_rss_kb']
+    """
+    names = list(BENCHMARKS) if not names else names
+    for name in names:
+        if name not in BENCHMARKS:
+            raise ValueError('unknown benchmark {!r}'.format(name))
+    results = {}
+    for name in names:
+        # A spawned process starts from nothing, where a forked one would
+        # inherit the peak resident set size of this one.
+        with ProcessPoolExecutor(1, mp_context=get_context('spawn')) as pool:
+            results[name] = pool.submit(run_benchmark, name, min_time).result()
+    return {'seed': SEED, 'python': platform.python_version(),
+            'machine': platform.machine(), 'benchmarks': results}
+
+
+def compare(results: dict, baseline: dict, threshold: float = 0.1) -> list:
+    """
+    Return a list of (name, baseline ops/sec, ops/sec, change) for every
+    benchmark in both results and baseline that is more than threshold (a
+    fraction) slower in results.
+
+    >>> old = {'benchmarks': {'a': {'ops_per_sec': 100.0},
+    ...                       'b': {'ops_per_sec': 100.0}}}
+    >>> new = {'benchmarks': {'a': {'ops_per_sec': 80.0},
+    ...                       'b': {'ops_per_sec': 95.0}}}
+    >>> compare(new, old)
+    [('a', 100.0, 80.0, -0.2)]
+    """
+    regressions = []
+    for name, result in results['benchmarks'].items():
+        if name in baseline['benchmarks']:
+            old = baseline['benchmarks'][name]['ops_per_sec']
+            change = result['ops_per_sec'] / old - 1
+            if change < -threshold:
+                regressions.append((name, old, result['ops_per_sec'],
+                                    round(change, 4)))
+    return regressions
+
+
+def main(args: list = None) -> int:
+    """
+    Run the benchmarks as asked by the command-line arguments args (taken
+    from sys.argv if not given), print the results, and return the exit
+    status: 1 if a benchmark regressed against the baseline, 0 otherwise.
+    """
+    from argparse import ArgumentParser
+    parser = ArgumentParser(description='Benchmark the games and strategies.')
+    parser.add_argument('names', nargs='*', metavar='NAME')
+    parser.add_argument('-o', '--out')
+    parser.add_argument('-b', '--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('-t', '--threshold', type=float, default=0.1)
+    parser.add_argument('--min-time', type=float, default=0.2)
+    options = parser.parse_args(args)
+    results = run_benchmarks(options.names, options.min_time)
+    for name, result in results['benchmarks'].items():
+        print('{:<28} {:>14.2f} ops/s {:>10} KiB peak RSS'.format(
+            name, result['ops_per_sec'], result['peak_rss_kb']))
+    if options.out:
+        with open(options.out, 'w') as file:
+            json.dump(results, file, indent=2)
+    status = 0
+    if options.update_baseline:
+        with open(options.baseline, 'w') as file:
+            json.dump(results, file, indent=2)
+    elif os.path.exists(options.baseline):
+        with open(options.baseline) as file:
+            regressions = compare(results, json.load(file), options.threshold)
+        for name, old, new, change in regressions:
+            print('REGRESSION {}: {:.2f} -> {:.2f} ops/s ({:+.1%})'.format(
+                name, old, new, change))
+        status = 1 if regressions else 0
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
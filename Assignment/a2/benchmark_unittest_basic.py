@@ -0,0 +1,57 @@
+"""
+Unittests for the benchmark suite.
+"""
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from benchmark import BENCHMARKS, main, run_benchmarks, peak_rss
+
+
+class BenchmarkUnitTests(unittest.TestCase):
+    def test_every_benchmark_runs(self):
+        """
+        Test that every benchmark runs and reports a positive rate.
+        """
+        results = run_benchmarks(
+            [name for name in BENCHMARKS if name != 'solve_stonehenge[3]'],
+            0.001)
+        for name, result in results['benchmarks'].items():
+            self.assertGreater(result['ops_per_sec'], 0, name)
+
+    def test_peak_rss_is_per_benchmark(self):
+        """
+        Test that the peak memory of a benchmark does not include memory
+        used before it, here by this process.
+        """
+        if peak_rss() is None:
+            self.skipTest('peak RSS is not available on this platform')
+        ballast = b'x' * 10 ** 8
+        results = run_benchmarks(['make_move[3]'], 0.01)['benchmarks']
+        self.assertLess(results['make_move[3]']['peak_rss_kb'] * 1024,
+                        len(ballast))
+
+    def test_baseline_regression(self):
+        """
+        Test that main stores a baseline, passes against it with a loose
+        threshold, and fails against a baseline that is far faster.
+        """
+        with tempfile.TemporaryDirectory() as directory, \
+                redirect_stdout(StringIO()):
+            path = os.path.join(directory, 'baseline.json')
+            args = ['make_move[3]', '--min-time', '0.01', '-b', path]
+            self.assertEqual(main(args + ['--update-baseline']), 0)
+            self.assertEqual(main(args + ['-t', '0.9']), 0)
+            with open(path) as file:
+                baseline = json.load(file)
+            baseline['benchmarks']['make_move[3]']['ops_per_sec'] *= 100
+            with open(path, 'w') as file:
+                json.dump(baseline, file)
+            self.assertEqual(main(args), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,309 @@
+"""
+A persistent evaluation cache: the solved score and best move of positions,
+kept in an SQLite database so that every process playing a game can look up
+what an earlier one already solved instead of searching it again.
+
+Positions are keyed by a digest of their type, current player and board,
+which is the same in every process; a Stonehenge position and its mirror
+image share one entry. The least recently used entries are evicted once the
+cache holds more than its capacity. Strategies use a cache only when they are
+given one, or the path of one (see get_cache); the cached strategies of
+game_interface ('mrc' and 'abc') use the one at DEFAULT_PATH.
+
+Usage: python eval_cache.py GAME SETTING [-d DEPTH] [-p PATH]
+                            [-c CAPACITY]
+
+precomputes the openings of a game: for Stonehenge ('h'), SETTING is the
+side-length of the board and every position up to DEPTH moves from the start
+is solved; for SubtractSquare ('s'), SETTING is a total or a range of totals
+LOW-HIGH, all of which are solved.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+from typing import Any
+from transposition import map_move
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'eval_cache.sqlite3')
+SCHEMA = 'CREATE TABLE IF NOT EXISTS entries ' \
+         '(key BLOB PRIMARY KEY, score NUMERIC, move TEXT, used INTEGER)'
+
+
+def state_key(state: Any) -> tuple:
+    """
+    Return the key of state in an evaluation cache, a digest of its type,
+    its current player and its board, and whether the move stored under it
+    is a move of the mirror image of state (see transposition.canonical_key).
+
+    >>> from subtract_square_state import SubtractSquareState
+    >>> state_key(SubtractSquareState(True, 5)) == \
+    state_key(SubtractSquareState(True, 5))
+    True
+    >>> state_key(SubtractSquareState(True, 5)) == \
+    state_key(SubtractSquareState(False, 5))
+    False
+    >>> from stonehenge_state import StonehengeState
+    >>> a = state_key(StonehengeState(True, 2).make_move('A'))
+    >>> b = state_key(StonehengeState(True, 2).make_move('B'))
+    >>> a[0] == b[0], a[1] != b[1]
+    (True, True)
+    """
+    if hasattr(state, 'get_symmetry_key'):
+        key, mirrored = state.get_symmetry_key()
+        text = '{}|{}|{}'.format(type(state).__name__, state.size, key)
+    else:
+        mirrored = False
+        text = '{}|{}|{}'.format(type(state).__name__,
+                                 state.get_current_player_name(), state)
+    return hashlib.sha1(text.encode()).digest(), mirrored
+
+
+class EvalCache:
+    """
+    A persistent cache of the exact score and best move of positions.
+
+    path - the SQLite database file the cache is kept in
+    capacity - the maximum number of entries kept, or None for no bound
+
+    Lookups mark their entries as used only in memory; the marks are written
+    out with the next update, or when the cache is closed, so a lookup never
+    writes to the database.
+    """
+    path: str
+    capacity: Any
+
+    def __init__(self, path: str = DEFAULT_PATH,
+                 capacity: Any = 100000) -> None:
+        """
+        Initialize a cache kept in the database at path, creating it if it
+        does not exist.
+
+        >>> cache = EvalCache(':memory:')
+        >>> len(cache)
+        0
+        """
+        self.path, self.capacity = path, capacity
+        self._connection = sqlite3.connect(path)
+        self._connection.execute('PRAGMA synchronous = NORMAL')
+        self._connection.execute(SCHEMA)
+        self._connection.execute(
+            'CREATE INDEX IF NOT EXISTS entries_used ON entries (used)')
+        self._connection.commit()
+        self._clock = self._connection.execute(
+            'SELECT COALESCE(MAX(used), 0) FROM entries').fetchone()[0]
+        self._touched = {}
+
+    def __len__(self) -> int:
+        """
+        Return the number of entries in this cache.
+        """
+        return self._connection.execute(
+            'SELECT COUNT(*) FROM entries').fetchone()[0]
+
+    def get(self, state: Any) -> Any:
+        """
+        Return the (score, move) entry stored for state, or None if there is
+        none, marking the entry as the most recently used.
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> cache = EvalCache(':memory:')
+        >>> cache.put(SubtractSquareState(True, 5), 1, 4)
+        >>> cache.get(SubtractSquareState(True, 5))
+        (1, 4)
+        >>> cache.get(SubtractSquareState(True, 6)) is None
+        True
+        """
+        key, mirrored = state_key(state)
+        row = self._connection.execute(
+            'SELECT score, move FROM entries WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        self._touch(key)
+        return row[0], map_move(state, json.loads(row[1]), mirrored)
+
+    def put(self, state: Any, score: Any, move: Any) -> None:
+        """
+        Store score and move for state, evicting the least recently used
+        entries when the cache is over capacity.
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> cache = EvalCache(':memory:', 2)
+        >>> for total in [1, 2, 3]:
+        ...     cache.put(SubtractSquareState(True, total), 1, 1)
+        >>> len(cache), cache.get(SubtractSquareState(True, 1))
+        (2, None)
+        """
+        self.update([(state, score, move)])
+
+    def update(self, entries: list) -> None:
+        """
+        Store every (state, score, move) triple of entries, in a single
+        transaction, evicting the least recently used entries when the cache
+        is over capacity.
+        """
+        for state, score, move in entries:
+            key, mirrored = state_key(state)
+            self._connection.execute(
+                'INSERT OR REPLACE INTO entries (key, score, move) '
+                'VALUES (?, ?, ?)',
+                (key, score, json.dumps(map_move(state, move, mirrored))))
+            self._touch(key)
+        self._flush()
+        if self.capacity is not None:
+            excess = len(self) - self.capacity
+            if excess > 0:
+                self._connection.execute(
+                    'DELETE FROM entries WHERE key IN (SELECT key FROM entries '
+                    'ORDER BY used LIMIT ?)', (excess,))
+        self._connection.commit()
+
+    def _touch(self, key: bytes) -> None:
+        """
+        Mark the entry of key as the most recently used one, in memory until
+        _flush writes the marks out.
+        """
+        self._clock += 1
+        self._touched[key] = self._clock
+
+    def _flush(self) -> None:
+        """
+        Write the marks of the entries used since the last flush into the
+        database, within the current transaction.
+        """
+        if self._touched:
+            self._connection.executemany(
+                'UPDATE entries SET used = ? WHERE key = ?',
+                [(used, key) for key, used in self._touched.items()])
+            self._touched = {}
+
+    def close(self) -> None:
+        """
+        Write out the entries used since the last update, and close the
+        database of this cache.
+        """
+        self._flush()
+        self._connection.commit()
+        self._connection.close()
+
+
+_CACHES = {}
+
+
+def get_cache(cache: Any = None) -> Any:
+    """
+    Return the cache a strategy called with cache should use: cache itself
+    if it is an EvalCache, the cache kept in the database at path cache
+    (opened once per process) if it is a path, and None if it is None.
+
+    The persistent cache is opt-in, so a search, and the benchmarks and
+    tests timing or counting it, are never answered from a database left
+    behind by an earlier run.
+
+    >>> get_cache() is None
+    True
+    >>> get_cache(':memory:') is get_cache(':memory:')
+    True
+    """
+    if cache is None or isinstance(cache, EvalCache):
+        return cache
+    if cache not in _CACHES:
+        _CACHES[cache] = EvalCache(cache)
+    return _CACHES[cache]
+
+
+def openings(game: Any, depth: int) -> list:
+    """
+    Return every unfinished position of game at most depth moves from its
+    current state, each one once (and only one of a position and its mirror
+    image), the current state first.
+
+    >>> from stonehenge_game import StonehengeGame
+    >>> len(openings(StonehengeGame(True, '2'), 1))
+    5
+    """
+    found, frontier = [game.current_state], [game.current_state]
+    keys = {state_key(game.current_state)[0]}
+    for _ in range(depth):
+        following = []
+        for state in frontier:
+            for move in state.get_possible_moves():
+                new_state = state.make_move(move)
+                key = state_key(new_state)[0]
+                if key not in keys and not game.is_over(new_state):
+                    keys.add(key)
+                    following.append(new_state)
+        found.extend(following)
+        frontier = following
+    return found
+
+
+def precompute(cache: EvalCache, game: Any, states: list) -> int:
+    """
+    Solve every state of states, positions of game, and store their scores
+    and best moves (the ones recursive_minimax picks) in cache. Return the
+    number of positions stored.
+
+    >>> from subtract_square_game import SubtractSquareGame
+    >>> from subtract_square_state import SubtractSquareState
+    >>> cache = EvalCache(':memory:')
+    >>> precompute(cache, SubtractSquareGame(True, 10),
+    ...            [SubtractSquareState(True, t) for t in range(1, 11)])
+    10
+    >>> cache.get(SubtractSquareState(True, 10))
+    (-1, 1)
+    """
+    from strategy import minimax_search
+    from transposition import TranspositionTable
+    table = TranspositionTable(None)
+    entries = []
+    # The deepest positions go first, so the shallower ones find most of
+    # their game tree already solved in table.
+    for state in reversed(states):
+        score, move = minimax_search(game, state, table)
+        entries.append((state, score, move))
+    cache.update(entries)
+    return len(entries)
+
+
+def main(args: list = None) -> int:
+    """
+    Precompute the openings described by the command-line arguments args
+    (taken from sys.argv if not given) into a cache, print how many were
+    stored, and return that number.
+    """
+    from argparse import ArgumentParser
+    from stonehenge_game import StonehengeGame
+    from subtract_square_game import SubtractSquareGame
+    from subtract_square_state import SubtractSquareState
+    parser = ArgumentParser(description='Precompute the openings of a game.')
+    parser.add_argument('game', choices=['h', 's'])
+    parser.add_argument('setting')
+    parser.add_argument('-d', '--depth', type=int, default=2)
+    parser.add_argument('-p', '--path', default=DEFAULT_PATH)
+    parser.add_argument('-c', '--capacity', type=int, default=100000)
+    options = parser.parse_args(args)
+    cache, stored = EvalCache(options.path, options.capacity), 0
+    if options.game == 'h':
+        for p1_starts in (True, False):
+            game = StonehengeGame(p1_starts, options.setting)
+            stored += precompute(cache, game,
+                                 openings(game, options.depth))
+    else:
+        low, _, high = options.setting.partition('-')
+        low, high = int(low), int(high or low)
+        game = SubtractSquareGame(True, high)
+        # Every total is solved from the smallest up, so the search of each
+        # one finds the totals below it already solved.
+        stored = precompute(cache, game, [
+            SubtractSquareState(p1_turn, total)
+            for total in range(high, max(low, 1) - 1, -1)
+            for p1_turn in (True, False)])
+    cache.close()
+    print('Stored {} positions in {}'.format(stored, options.path))
+    return stored
+
+
+if __name__ == "__main__":
+    main()
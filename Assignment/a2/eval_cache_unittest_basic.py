@@ -0,0 +1,146 @@
+"""
+Unittests for the persistent evaluation cache.
+
+Entries must survive reopening the cache, the least recently used ones must
+be evicted first, and the minimax strategies must both answer from the cache
+and warm it.
+"""
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest.mock import patch
+
+from eval_cache import EvalCache, get_cache, main
+from game_interface import usable_strategies
+from stonehenge_game import StonehengeGame
+from strategy import recursive_minimax, iterative_minimax, \
+    alphabeta_minimax, iterative_deepening
+from subtract_square_game import SubtractSquareGame
+from subtract_square_state import SubtractSquareState
+from subtract_square_tablebase import Tablebase
+
+
+class EvalCacheUnitTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'cache.sqlite3')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_persists(self):
+        """
+        Test that entries are still there after the cache is reopened.
+        """
+        cache = EvalCache(self.path)
+        cache.put(StonehengeGame(True, '2').current_state, 1, 'B')
+        cache.close()
+        cache = EvalCache(self.path)
+        self.assertEqual(cache.get(StonehengeGame(True, '2').current_state),
+                         (1, 'B'))
+        self.assertIsNone(cache.get(StonehengeGame(False, '2').current_state))
+        cache.close()
+
+    def test_evicts_least_recently_used(self):
+        """
+        Test that looking an entry up keeps it from being evicted.
+        """
+        cache = EvalCache(self.path, 2)
+        cache.put(SubtractSquareState(True, 1), 1, 1)
+        cache.put(SubtractSquareState(True, 2), -1, 1)
+        cache.get(SubtractSquareState(True, 1))
+        cache.put(SubtractSquareState(True, 3), 1, 1)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNotNone(cache.get(SubtractSquareState(True, 1)))
+        self.assertIsNone(cache.get(SubtractSquareState(True, 2)))
+        cache.close()
+
+    def test_strategies_consult_and_warm(self):
+        """
+        Test that every minimax strategy stores the move it finds, and
+        answers with the cached move when there is one.
+        """
+        strategies = [recursive_minimax, iterative_minimax,
+                      alphabeta_minimax, iterative_deepening]
+        for strategy in strategies:
+            cache = EvalCache(':memory:')
+            game = StonehengeGame(True, '2')
+            move = strategy(game, cache=cache)
+            self.assertEqual(cache.get(game.current_state), (1, move),
+                             strategy.__name__)
+            cache.put(game.current_state, 1, 'G')
+            self.assertEqual(strategy(game, cache=cache), 'G',
+                             strategy.__name__)
+            cache.close()
+
+    def test_opt_in(self):
+        """
+        Test that the strategies ignore a cache at the default path unless
+        they are given it, and use the one at a path they are given.
+        """
+        game = StonehengeGame(True, '2')
+        cache = EvalCache(self.path)
+        cache.put(game.current_state, 1, 'B')
+        cache.close()
+        with patch('eval_cache.DEFAULT_PATH', self.path), \
+                patch('strategy.DEFAULT_PATH', self.path):
+            self.assertNotEqual(recursive_minimax(game), 'B')
+        self.assertEqual(recursive_minimax(game, cache=self.path), 'B')
+        get_cache(self.path).close()
+
+    def test_interface_strategies_use_default_path(self):
+        """
+        Test that the cached strategies of game_interface answer from the
+        cache at the default path, and warm it with what they solve.
+        """
+        game = StonehengeGame(True, '2')
+        cache = EvalCache(self.path)
+        cache.put(game.current_state, 1, 'B')
+        cache.close()
+        with patch('strategy.DEFAULT_PATH', self.path):
+            for key in ['mrc', 'abc']:
+                self.assertEqual(usable_strategies[key](game), 'B')
+                other = StonehengeGame(False, '1')
+                move = usable_strategies[key](other)
+                self.assertEqual(get_cache(self.path).get(
+                    other.current_state), (1, move))
+        get_cache(self.path).close()
+
+    def test_lookups_do_not_write(self):
+        """
+        Test that lookups leave the database alone until the next update,
+        which still evicts the least recently looked up entry.
+        """
+        cache = EvalCache(self.path, 2)
+        cache.update([(SubtractSquareState(True, 1), 1, 1),
+                      (SubtractSquareState(True, 2), -1, 1)])
+        changes = cache._connection.total_changes
+        cache.get(SubtractSquareState(True, 1))
+        self.assertEqual(cache._connection.total_changes, changes)
+        self.assertFalse(cache._connection.in_transaction)
+        cache.put(SubtractSquareState(True, 3), 1, 1)
+        self.assertIsNotNone(cache.get(SubtractSquareState(True, 1)))
+        self.assertIsNone(cache.get(SubtractSquareState(True, 2)))
+        cache.close()
+
+    def test_precompute_subtract_square(self):
+        """
+        Test that the precomputed SubtractSquare totals agree with the
+        tablebase.
+        """
+        with redirect_stdout(StringIO()):
+            self.assertEqual(main(['s', '1-200', '-p', self.path]), 400)
+        cache, tablebase = EvalCache(self.path), Tablebase(200)
+        for total in range(1, 201):
+            score, _ = cache.get(SubtractSquareState(False, total))
+            self.assertEqual(score == 1, tablebase.is_win(total))
+        self.assertEqual(
+            recursive_minimax(SubtractSquareGame(True, 200), cache=cache),
+            tablebase.best_move(200))
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
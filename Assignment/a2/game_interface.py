@@ -13,7 +13,10 @@ from typing import Any, Callable
 from stonehenge_game import StonehengeGame
 from subtract_square_game import SubtractSquareGame
 from strategy import recursive_minimax, iterative_minimax, \
-    rough_outcome_strategy, interactive_strategy
+    rough_outcome_strategy, interactive_strategy, alphabeta_minimax, \
+    parallel_minimax, tablebase_strategy, iterative_deepening, \
+    mcts_strategy, proof_number_strategy, cached_recursive_minimax, \
+    cached_alphabeta_minimax
 
 # TODO: Replace None with the corresponding class name for your games.
 # 'h' should map to Stonehenge.
@@ -23,10 +26,24 @@ playable_games = {'s': SubtractSquareGame,
 # TODO: Replace None with the corresponding function names for your strategies.
 # 'mr' should map to your recursive implementation of minimax while
 # 'mi' should map to your iterative implementation of minimax
+# 'ab' maps to minimax with alpha-beta pruning, 'mp' to minimax split across
+# worker processes, 'tb' to the SubtractSquare tablebase (SubtractSquare only)
+# 'id' to iterative deepening within a time budget for each move, 'mc' to
+# Monte Carlo tree search and 'pn' to proof-number search; 'mrc' and 'abc'
+# are 'mr' and 'ab' answering from, and warming, the persistent evaluation
+# cache (see eval_cache, which can also precompute openings into it)
 usable_strategies = {'i': interactive_strategy,
                      'ro': rough_outcome_strategy,
                      'mr': recursive_minimax,
-                     'mi': iterative_minimax}
+                     'mi': iterative_minimax,
+                     'ab': alphabeta_minimax,
+                     'mp': parallel_minimax,
+                     'tb': tablebase_strategy,
+                     'id': iterative_deepening,
+                     'mc': mcts_strategy,
+                     'pn': proof_number_strategy,
+                     'mrc': cached_recursive_minimax,
+                     'abc': cached_alphabeta_minimax}
 
 
 class GameInterface:
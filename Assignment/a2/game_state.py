@@ -3,7 +3,7 @@ The GameState superclass.
 
 NOTE: You do not have to run python-ta on this file.
 """
-from typing import Any
+from typing import Any, Iterator
 
 
 class GameState:
@@ -40,6 +40,14 @@ class GameState:
         """
         raise NotImplementedError
 
+    def iter_moves(self) -> Iterator:
+        """
+        Return an iterator over the possible moves of this state, in the
+        order of get_possible_moves(), for searches that may stop before the
+        last one. Subclasses generate the moves lazily instead.
+        """
+        return iter(self.get_possible_moves())
+
     def get_current_player_name(self) -> str:
         """
         Return 'p1' if the current player is Player 1, and 'p2' if the current
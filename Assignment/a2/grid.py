@@ -1,6 +1,7 @@
 """
 A grid module
 """
+import random
 from typing import Any
 
 
@@ -115,15 +116,67 @@ class Line:
         ['A', '1']
         """
         if self.player == '@':
-            i = 0
-            while i < len(self.cells):
-                self.cells[i] = self.cells[i].update_cell(player, letter)
-                i += 1
-            self.check_score()
-            if self.player_1 >= self.total / 2:
-                self.player = 1
-            elif self.player_2 >= self.total / 2:
-                self.player = 2
+            for cell in self.cells:
+                if cell.player == 0 and cell.letter == letter:
+                    self.add_claim(cell.update_cell(player, letter).player)
+
+    def add_claim(self, player: int) -> bool:
+        """
+        Count one more cell of the line claimed by player (1 or 2), and return
+        whether that captures the line for player.
+
+        >>> line = Line([Cell('A'), Cell('B'), Cell('C')])
+        >>> line.add_claim(2)
+        False
+        >>> line.add_claim(2)
+        True
+        >>> line.player, line.player_2
+        (2, 2)
+        """
+        if player == 1:
+            self.player_1 += 1
+            count = self.player_1
+        else:
+            self.player_2 += 1
+            count = self.player_2
+        if self.player == '@' and count >= self.total / 2:
+            self.player = player
+            return True
+        return False
+
+    def remove_claim(self, player: int, captured: bool) -> None:
+        """
+        Take back one cell of the line claimed by player (1 or 2), and the
+        line itself if add_claim captured it with that cell.
+
+        >>> line = Line([Cell('A'), Cell('B')])
+        >>> line.add_claim(1)
+        True
+        >>> line.remove_claim(1, True)
+        >>> line.player, line.player_1
+        ('@', 0)
+        """
+        if player == 1:
+            self.player_1 -= 1
+        else:
+            self.player_2 -= 1
+        if captured:
+            self.player = '@'
+
+    def can_capture(self, player: int) -> bool:
+        """
+        Return whether claiming one more cell of this line would capture it
+        for player (1 or 2).
+
+        >>> line = Line([Cell('A'), Cell('B'), Cell('C')])
+        >>> line.can_capture(1)
+        False
+        >>> _ = line.add_claim(1)
+        >>> line.can_capture(1), line.can_capture(2)
+        (True, False)
+        """
+        count = self.player_1 if player == 1 else self.player_2
+        return self.player == '@' and count + 1 >= self.total / 2
 
     def check_score(self) -> None:
         """
@@ -153,12 +206,16 @@ class Grid:
     leyline - the leylines of the grid
     left - the left diagonals of the grid
     right - the right diagonals of the grid
+    lines - every ley-line of the grid: the leylines, lefts, then rights
+    scores - the number of ley-lines claimed by player 1 and by player 2
     """
     cells: 'list[Cell]'
     size: int
     leylines: 'list[Line]'
     lefts: 'list[Line]'
     rights: 'list[Line]'
+    lines: 'list[Line]'
+    scores: dict
 
     def __init__(self, size: int, cells: 'list[Cell]' = None,
                  lines: tuple = None) -> None:
@@ -170,25 +227,26 @@ class Grid:
         7
         >>> print([str(cell) for cell in grid.leylines[0].cells])
         ['A', 'B']
+        >>> grid = Grid(6)
+        >>> [str(cell) for cell in grid.cells[-3:]]
+        ['AE', 'AF', 'AG']
         """
-        self.size, self.cells = size, [Cell(chr(65 + n)) for n in
-                                       range(int(((3 + size) * size / 2) +
-                                                 size))] if not cells else cells
+        self.size, self.cells = size, [
+            Cell(cell_name(n)) for n in
+            range(len(get_geometry(size)[1]))] if not cells else cells
         if not lines:
-            self.leylines = []
-            interval = 2
-            start = 0
-            while interval <= size + 1:
-                self.leylines.append(Line([self.cells[n] for n
-                                           in range(start, start + interval)]))
-                start, interval = start + interval, interval + 1
-            self.leylines.append(Line([self.cells[n]
-                                       for n in range(start, start + size)]))
+            self.leylines = [Line([self.cells[n] for n in row])
+                             for row in get_geometry(size)[0]]
             self.lefts = get_left(self.cells, size)
             self.rights = get_right(self.cells, size)
         else:
             self.leylines, self.rights, self.lefts = lines[0], lines[1], \
                                                      lines[2]
+        self.lines = self.leylines + self.lefts + self.rights
+        self.scores = {1: 0, 2: 0}
+        for line in self.lines:
+            if line.player != '@':
+                self.scores[line.player] += 1
 
     def copy(self) -> 'Grid':
         """
@@ -200,92 +258,279 @@ class Grid:
         False
         >>> [str(cell) for cell in a.cells] == [str(cell) for cell in b.cells]
         True
+        >>> b.leylines[0].cells[0] is b.cells[0]
+        True
         """
-        return Grid(self.size, [cell.copy() for cell in self.cells],
-                    ([line.copy() for line in self.leylines],
-                     [line.copy() for line in self.rights],
-                     [line.copy() for line in self.lefts]))
-
-    def update_grid(self, player: str, letter: str) -> None:
+        cells = [cell.copy() for cell in self.cells]
+        members = get_incidence(self.size)[1]
+        lines = []
+        for i, line in enumerate(self.lines):
+            new = Line([cells[n] for n in members[i]], line.player)
+            new.player_1, new.player_2 = line.player_1, line.player_2
+            lines.append(new)
+        count = self.size + 1
+        return Grid(self.size, cells, (lines[:count], lines[2 * count:],
+                                       lines[count:2 * count]))
+
+    def update_grid(self, player: str, letter: str) -> Any:
         """
-        Update the Grid of player's claim.
+        Update the Grid of player's claim, and return the positions in
+        self.lines of the ley-lines it captures (None if nothing was claimed).
+
+        Only the ley-lines through the claimed cell are visited, and the
+        scores are updated as those lines are captured.
 
         >>> grid = Grid(1)
         >>> grid.update_grid('p1', 'A')
+        [0, 2, 5]
+        >>> grid.update_grid('p2', 'A') is None
+        True
         >>> print([str(cell) for cell in grid.cells])
         ['1', 'B', 'C']
+        >>> grid.scores
+        {1: 3, 2: 0}
+        """
+        index, _, through = get_incidence(self.size)
+        if letter not in index or self.cells[index[letter]].player != 0:
+            return None
+        n = index[letter]
+        number = 1 if player == 'p1' else 2
+        self.cells[n].player = number
+        captured = []
+        for i in through[n]:
+            if self.lines[i].add_claim(number):
+                self.scores[number] += 1
+                captured.append(i)
+        return captured
+
+    def undo_update(self, letter: str, captured: list) -> None:
         """
-        self.cells = [cell.update_cell(player, letter) for cell in self.cells]
-        i = 0
-        while i <= self.size:
-            self.leylines[i].update_line(player, letter)
-            self.rights[i].update_line(player, letter)
-            self.lefts[i].update_line(player, letter)
-            i += 1
+        Take back the claim of letter that update_grid made last, where
+        captured is what update_grid returned for it.
+
+        >>> grid = Grid(1)
+        >>> grid.undo_update('A', grid.update_grid('p1', 'A'))
+        >>> [str(cell) for cell in grid.cells], grid.scores
+        (['A', 'B', 'C'], {1: 0, 2: 0})
+        >>> grid.get_zobrist() == Grid(1).get_zobrist()
+        True
+        """
+        index, _, through = get_incidence(self.size)
+        n = index[letter]
+        number, self.cells[n].player = self.cells[n].player, 0
+        for i in through[n]:
+            self.lines[i].remove_claim(number, i in captured)
+        self.scores[number] -= len(captured)
 
     def get_score(self, player: int) -> int:
         """
         Return the score for the player.
 
         >>> grid = Grid(1)
-        >>> grid.update_grid('p1', 'A')
+        >>> _ = grid.update_grid('p1', 'A')
         >>> grid.get_score(1)
         3
         """
-        score = 0
-        i = 0
-        while i < len(self.leylines):
-            score += 1 if self.leylines[i].player == player else 0
-            score += 1 if self.rights[i].player == player else 0
-            score += 1 if self.lefts[i].player == player else 0
-            i += 1
-        return score
+        return self.scores[player]
+
+    def get_zobrist(self) -> int:
+        """
+        Return the Zobrist hash of the claimed cells and ley-lines of this
+        grid, computed from scratch.
+
+        >>> a, b = Grid(2), Grid(2)
+        >>> _ = a.update_grid('p1', 'A')
+        >>> _ = a.update_grid('p2', 'G')
+        >>> _ = b.update_grid('p2', 'G')
+        >>> _ = b.update_grid('p1', 'A')
+        >>> a.get_zobrist() == b.get_zobrist() != Grid(2).get_zobrist()
+        True
+        """
+        cells, lines, _ = get_zobrist_keys(self.size)
+        result = 0
+        for n, cell in enumerate(self.cells):
+            result ^= cells[n][cell.player]
+        for i, line in enumerate(self.lines):
+            result ^= lines[i][0 if line.player == '@' else line.player]
+        return result
+
+
+_INCIDENCE = {}
+
+
+def get_incidence(size: int) -> tuple:
+    """
+    Return a tuple (index, members, through) for a grid of side-length size:
+    index maps each cell letter to its position in Grid.cells, members lists
+    the cell positions of each of Grid.lines, and through lists the positions
+    in Grid.lines of the ley-lines through each cell.
+
+    The tuple is built only the first time it is needed for each size.
+
+    >>> index, members, through = get_incidence(1)
+    >>> index
+    {'A': 0, 'B': 1, 'C': 2}
+    >>> members
+    [[0, 1], [2], [0], [1, 2], [1], [0, 2]]
+    >>> through[2]
+    [1, 3, 5]
+    """
+    if size not in _INCIDENCE:
+        grid = Grid(size)
+        index = {cell.letter: n for n, cell in enumerate(grid.cells)}
+        members = [[index[cell.letter] for cell in line.cells]
+                   for line in grid.lines]
+        through = [[i for i, cells in enumerate(members) if n in cells]
+                   for n in range(len(grid.cells))]
+        _INCIDENCE[size] = (index, members, through)
+    return _INCIDENCE[size]
+
+
+_ZOBRIST = {}
+
+
+def get_zobrist_keys(size: int) -> tuple:
+    """
+    Return a tuple (cells, lines, turn) of random 64-bit Zobrist keys for a
+    grid of side-length size: cells[n][p] for the cell at position n of
+    Grid.cells claimed by player p, lines[i][p] for the ley-line at position
+    i of Grid.lines claimed by player p, and turn for p1 being the one to
+    move. Keys for unclaimed cells and ley-lines (p = 0) are 0.
+
+    The keys come from a generator seeded with size, so they are the same in
+    every process.
+
+    >>> cells, lines, turn = get_zobrist_keys(1)
+    >>> len(cells), len(lines), cells[0][0]
+    (3, 6, 0)
+    >>> get_zobrist_keys(1) is get_zobrist_keys(1)
+    True
+    """
+    if size not in _ZOBRIST:
+        rand = random.Random(size)
+        _, members, through = get_incidence(size)
+        cells = [(0, rand.getrandbits(64), rand.getrandbits(64))
+                 for _ in through]
+        lines = [(0, rand.getrandbits(64), rand.getrandbits(64))
+                 for _ in members]
+        _ZOBRIST[size] = (cells, lines, rand.getrandbits(64))
+    return _ZOBRIST[size]
+
+
+def cell_name(n: int) -> str:
+    """
+    Return the name of the cell at position n of a grid: 'A' to 'Z', then
+    'AA', 'AB', ... as spreadsheet columns are named.
+
+    >>> [cell_name(n) for n in [0, 25, 26, 27, 51, 52, 701, 702]]
+    ['A', 'Z', 'AA', 'AB', 'AZ', 'BA', 'ZZ', 'AAA']
+    """
+    name = ''
+    n += 1
+    while n:
+        n, rest = divmod(n - 1, 26)
+        name = chr(65 + rest) + name
+    return name
+
+
+_GEOMETRY = {}
+
+
+def get_geometry(size: int) -> tuple:
+    """
+    Return a tuple (rows, positions, lefts, rights) describing the board of
+    side-length size, where rows lists the cell positions of each leyline
+    from the top, positions gives the (row, column) of each cell, and lefts
+    and rights list the cell positions of each left and right diagonal.
+
+    Columns count half the horizontal distance between neighbouring cells of
+    a row. Rows above the last have 2, 3, ..., size + 1 cells, each row
+    sticking out one column further left than the one above, and the last row
+    has size cells, indented like the first. A left diagonal is the cells
+    whose row plus column is the same, a right diagonal those whose column
+    minus row is the same; lefts run from the top-left, rights from the
+    top-right.
+
+    The tuple is built only the first time it is needed for each size.
+
+    >>> rows, positions, lefts, rights = get_geometry(1)
+    >>> rows, positions
+    ([[0, 1], [2]], [(0, 2), (0, 4), (1, 3)])
+    >>> lefts, rights
+    ([[0], [1, 2]], [[1], [0, 2]])
+    """
+    if size not in _GEOMETRY:
+        rows, positions = [], []
+        for r in range(size + 1):
+            length, start = (r + 2, size - 1 - r) if r < size else (size, 1)
+            rows.append(list(range(len(positions), len(positions) + length)))
+            positions.extend((r, start + 2 * (j + 1)) for j in range(length))
+        lefts, rights = {}, {}
+        for n, (r, x) in enumerate(positions):
+            lefts.setdefault(x + r, []).append(n)
+            rights.setdefault(x - r, []).append(n)
+        _GEOMETRY[size] = (rows, positions,
+                           [lefts[k] for k in sorted(lefts)],
+                           [rights[k] for k in sorted(rights, reverse=True)])
+    return _GEOMETRY[size]
+
+
+_MIRROR = {}
+
+
+def get_mirror(size: int) -> tuple:
+    """
+    Return a tuple (cells, lines, letters) describing the reflection of the
+    board of side-length size in its vertical axis, its only symmetry:
+    cells[n] is the position in Grid.cells of the cell the one at position n
+    is reflected onto, lines[i] the same for Grid.lines, and letters maps
+    each cell letter to the letter it is reflected onto.
+
+    Every row is centred on the same column, so the reflection reverses each
+    row, keeps every leyline, and swaps the left and right diagonals.
+
+    The tuple is built only the first time it is needed for each size.
+
+    >>> cells, lines, letters = get_mirror(1)
+    >>> cells, lines
+    ([1, 0, 2], [0, 1, 4, 5, 2, 3])
+    >>> letters['A']
+    'B'
+    """
+    if size not in _MIRROR:
+        cells = [n for row in get_geometry(size)[0] for n in reversed(row)]
+        members = [sorted(line) for line in get_incidence(size)[1]]
+        lines = [members.index(sorted(cells[n] for n in line))
+                 for line in members]
+        _MIRROR[size] = (cells, lines, {cell_name(n): cell_name(cells[n])
+                                        for n in range(len(cells))})
+    return _MIRROR[size]
 
 
 def get_left(lst: 'list[Cell]', size: int) -> 'list[Line]':
     """
     Return a list of Line which is the left diagonals based the stonehenge.
 
-    >>> lefts = get_left([Cell(chr(65 + n)) for n in range(3)], 1)
+    >>> lefts = get_left([Cell(cell_name(n)) for n in range(3)], 1)
     >>> len(lefts) == 2
     True
     >>> print([str(cell) for cell in lefts[1].cells])
     ['B', 'C']
     """
-    form = {1: [[0], [1, 2]],
-            2: [[0, 2], [1, 3, 5], [4, 6]],
-            3: [[0, 2, 5], [1, 3, 6, 9], [4, 7, 10], [8, 11]],
-            4: [[0, 2, 5, 9], [1, 3, 6, 10, 14], [4, 7, 11, 15], [8, 12, 16],
-                [13, 17]],
-            5: [[0, 2, 5, 9, 14], [1, 3, 6, 10, 15, 20], [4, 7, 11, 16, 21],
-                [8, 12, 17, 22], [13, 18, 23], [19, 24]]}
-    result = []
-    for line in form[size]:
-        result.append(Line([lst[n] for n in line]))
-    return result
+    return [Line([lst[n] for n in line]) for line in get_geometry(size)[2]]
 
 
 def get_right(lst: 'list[Cell]', size: int) -> 'list[Line]':
     """
     Return a list of Line which is the right diagonals based the stonehenge.
 
-    >>> rights = get_right([Cell(chr(65 + n)) for n in range(3)], 1)
+    >>> rights = get_right([Cell(cell_name(n)) for n in range(3)], 1)
     >>> len(rights) == 2
     True
     >>> print([str(cell) for cell in rights[1].cells])
     ['A', 'C']
     """
-    form = {1: [[1], [0, 2]],
-            2: [[1, 4], [0, 3, 6], [2, 5]],
-            3: [[1, 4, 8], [0, 3, 7, 11], [2, 6, 10], [5, 9]],
-            4: [[1, 4, 8, 13], [0, 3, 7, 12, 17], [2, 6, 11, 16], [5, 10, 15],
-                [9, 14]],
-            5: [[1, 4, 8, 13, 19], [0, 3, 7, 12, 18, 24], [2, 6, 11, 17, 23],
-                [5, 10, 16, 22], [9, 15, 21], [14, 20]]}
-    result = []
-    for line in form[size]:
-        result.append(Line([lst[n] for n in line]))
-    return result
+    return [Line([lst[n] for n in line]) for line in get_geometry(size)[3]]
 
 
 if __name__ == "__main__":
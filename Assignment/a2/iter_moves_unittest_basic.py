@@ -0,0 +1,58 @@
+"""
+Unittests for lazy move generation.
+
+iter_moves must give the moves of get_possible_moves in the same order, and
+the unordered searches must stop generating moves once a win cuts them off.
+"""
+import random
+import unittest
+
+from search_stats import collect
+from stonehenge_bitboard import BitboardStonehengeState
+from stonehenge_game import StonehengeGame
+from stonehenge_state import StonehengeState
+from strategy import recursive_minimax, iterative_minimax
+from subtract_square_state import SubtractSquareState
+from transposition import TranspositionTable
+
+
+class IterMovesUnitTests(unittest.TestCase):
+    def test_same_moves(self):
+        """
+        Test that iter_moves yields the possible moves, in order, on random
+        positions of every state class.
+        """
+        rand = random.Random(0)
+        for state_class in (StonehengeState, BitboardStonehengeState):
+            for size in range(1, 6):
+                state = state_class(True, size)
+                while True:
+                    self.assertEqual(list(state.iter_moves()),
+                                     state.get_possible_moves())
+                    if not state.get_possible_moves():
+                        break
+                    state = state.make_move(
+                        rand.choice(state.get_possible_moves()))
+        for total in range(0, 200):
+            state = SubtractSquareState(True, total)
+            self.assertEqual(list(state.iter_moves()),
+                             state.get_possible_moves())
+
+    def test_searches_stop_generating(self):
+        """
+        Test that after a winning move the searches take at most one more
+        move: on a board of side-length 1, whose every move wins, only the
+        first one or two of the three moves are generated.
+        """
+        for strategy in (lambda game: recursive_minimax(
+                game, TranspositionTable()), iterative_minimax):
+            for state_class in (StonehengeState, BitboardStonehengeState):
+                game = StonehengeGame(True, '1', state_class)
+                with collect(state_class) as stats:
+                    self.assertEqual(strategy(game), 'A')
+                self.assertEqual(sum(stats.branching.values()), 1)
+                self.assertLess(max(stats.branching), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
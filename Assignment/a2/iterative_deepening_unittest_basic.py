@@ -0,0 +1,94 @@
+"""
+Unittests for iterative deepening: a search must answer within its time
+budget, and search no deeper than max_depth.
+
+The searches run on a fake clock that moves on by a fixed tick each time it
+is read, so the budget is checked in node counts rather than wall-clock time.
+"""
+import unittest
+from unittest.mock import patch
+
+from search_stats import collect
+from stonehenge_game import StonehengeGame
+from stonehenge_state import StonehengeState
+from strategy import iterative_deepening
+
+
+class FakeClock:
+    """
+    A clock for perf_counter that moves on by tick seconds each time it is
+    read.
+
+    now - the time the clock last read
+    reads - every time the clock read, in order
+    """
+    now: float
+    reads: list
+
+    def __init__(self, tick: float) -> None:
+        """
+        Initialize a clock at time 0.
+        """
+        self.tick, self.now, self.reads = tick, 0.0, []
+
+    def __call__(self) -> float:
+        """
+        Move the clock on by tick and return the time.
+        """
+        self.now += self.tick
+        self.reads.append(self.now)
+        return self.now
+
+
+def search(budget_ms, tick, ordering=True):
+    """
+    Return the clock and the move of an iterative deepening search of a new
+    size 3 game with budget_ms, on a fake clock moving on by tick seconds.
+    """
+    clock = FakeClock(tick)
+    game = StonehengeGame(True, '3')
+    with patch('strategy.perf_counter', clock):
+        move = iterative_deepening(game, budget_ms, None, ordering)
+    return clock, move, game
+
+
+class IterativeDeepeningUnitTests(unittest.TestCase):
+    def test_budget_respected(self):
+        """
+        Test that searches of a size 3 game, which take far longer to solve,
+        stop at the first check after their deadline with a legal move.
+        """
+        for budget_ms in [1, 20, 100]:
+            for ordering in [False, True]:
+                clock, move, game = search(budget_ms, 1e-4, ordering)
+                deadline = clock.reads[0] + budget_ms / 1000
+                late = [read for read in clock.reads if read > deadline]
+                self.assertEqual(len(late), 1)
+                self.assertIn(move, game.current_state.get_possible_moves())
+
+    def test_larger_budgets_search_more(self):
+        """
+        Test that a search given more time searches more nodes.
+        """
+        counts = []
+        for budget_ms in [5, 100]:
+            with collect(StonehengeState) as stats:
+                search(budget_ms, 1e-4)
+            counts.append(stats.nodes)
+        self.assertLess(counts[0], counts[1])
+
+    def test_max_depth_respected(self):
+        """
+        Test that a search with max_depth 1 and ample time makes each move
+        of the current state once, and nothing more.
+        """
+        game = StonehengeGame(True, '3')
+        with collect(StonehengeState) as stats:
+            move = iterative_deepening(game, 10000, 1)
+        self.assertEqual(stats.nodes,
+                         len(game.current_state.get_possible_moves()))
+        self.assertIn(move, game.current_state.get_possible_moves())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+"""
+Unittests for iterative_minimax: folding each subtree into its parent as it
+finishes must not change the move found.
+"""
+import random
+import unittest
+
+from stonehenge_game import StonehengeGame
+from strategy import recursive_minimax, iterative_minimax
+from subtract_square_game import SubtractSquareGame
+from transposition import TranspositionTable
+
+
+class IterativeMinimaxUnitTests(unittest.TestCase):
+    def assert_same_move(self, game):
+        """
+        Assert that iterative_minimax picks the move recursive_minimax picks
+        for game, and leaves its current state as it was.
+        """
+        state = game.current_state
+        self.assertEqual(iterative_minimax(game),
+                         recursive_minimax(game, TranspositionTable()))
+        self.assertIs(game.current_state, state)
+
+    def test_stonehenge(self):
+        """
+        Test iterative_minimax against recursive_minimax on the empty boards
+        of sizes 1 and 2 and on random positions of sizes 2 and 3.
+        """
+        for size in ['1', '2']:
+            for p1_starts in [True, False]:
+                self.assert_same_move(StonehengeGame(p1_starts, size))
+        rnd = random.Random(208)
+        for size, plies in [('2', 3), ('3', 6)]:
+            for _ in range(10):
+                game = StonehengeGame(rnd.random() < 0.5, size)
+                for _ in range(rnd.randrange(plies, plies + 3)):
+                    if game.is_over(game.current_state):
+                        break
+                    game.current_state = game.current_state.make_move(
+                        rnd.choice(game.current_state.get_possible_moves()))
+                if not game.is_over(game.current_state):
+                    self.assert_same_move(game)
+
+    def test_subtract_square(self):
+        """
+        Test iterative_minimax against recursive_minimax on every total from
+        1 to 30 with either player to move.
+        """
+        for total in range(1, 31):
+            for p1_starts in [True, False]:
+                self.assert_same_move(SubtractSquareGame(p1_starts,
+                                                         str(total)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+"""
+Unittests for boards of side-length 6 and 7, whose cells run past 'Z' to
+'AA', 'AB', ... and whose string representations must keep their shape.
+"""
+import re
+import unittest
+
+from grid import Grid, cell_name
+from stonehenge_bitboard import BitboardStonehengeState
+from stonehenge_game import StonehengeGame
+from stonehenge_state import StonehengeState
+
+STATE_CLASSES = [StonehengeState, BitboardStonehengeState]
+
+# The number of cells of a board of each side-length.
+CELLS = {6: 33, 7: 42}
+
+
+def cell_columns(line):
+    """
+    Return the columns at which the cells (or claimed cells) of line, one
+    line of a board, start, leaving out its ley-line markers.
+    """
+    return [match.start() for match in re.finditer(r'(?<=-- )[A-Z0-9]+',
+                                                    line)]
+
+
+class LargeBoardUnitTests(unittest.TestCase):
+    def test_cell_names(self):
+        """
+        Test that the cells of sizes 6 and 7 are named 'A' to 'Z' and then
+        'AA' onwards, and that every name is a move.
+        """
+        self.assertEqual([cell.letter for cell in Grid(6).cells][-7:],
+                         ['AA', 'AB', 'AC', 'AD', 'AE', 'AF', 'AG'])
+        self.assertEqual(Grid(7).cells[-1].letter, 'AP')
+        for size, count in CELLS.items():
+            names = [cell_name(n) for n in range(count)]
+            self.assertEqual([cell.letter for cell in Grid(size).cells],
+                             names)
+            game = StonehengeGame(True, str(size))
+            self.assertEqual(game.current_state.get_possible_moves(), names)
+            self.assertEqual(game.str_to_move('ab'), 'AB')
+            for state_class in STATE_CLASSES:
+                self.assertEqual(state_class(True, size).get_possible_moves(),
+                                 names)
+
+    def test_str_holds_every_marker(self):
+        """
+        Test that the string of an empty board shows each cell name once
+        and a '@' for each ley-line, on 2 * size + 5 lines.
+        """
+        for size, count in CELLS.items():
+            for state_class in STATE_CLASSES:
+                text = str(state_class(True, size))
+                tokens = re.findall(r'[A-Z]+|@', text)
+                self.assertEqual(sorted(t for t in tokens if t != '@'),
+                                 sorted(cell_name(n) for n in range(count)))
+                self.assertEqual(tokens.count('@'), 3 * (size + 1))
+                self.assertEqual(len(text.splitlines()), 2 * size + 5)
+
+    def test_str_keeps_shape(self):
+        """
+        Test that the cells of every row are evenly spaced and each row is
+        shifted by half that spacing from the one above, however long the
+        names of its cells.
+        """
+        for size in CELLS:
+            lines = str(StonehengeState(True, size)).splitlines()
+            rows = [cell_columns(line) for line in lines[2:-2:2]]
+            self.assertEqual([len(row) for row in rows],
+                             list(range(2, size + 2)) + [size])
+            gaps = {b - a for row in rows for a, b in zip(row, row[1:])}
+            self.assertEqual(len(gaps), 1)
+            gap = gaps.pop()
+            shifts = [b[0] - a[0] for a, b in zip(rows, rows[1:])]
+            self.assertEqual(shifts, [-gap // 2] * (size - 1) + [gap // 2])
+
+    def test_str_shows_claims(self):
+        """
+        Test that the owners of claimed cells with two-letter names are
+        drawn in place of their names, and the same on both backends.
+        """
+        for size in CELLS:
+            moves = [cell_name(CELLS[size] - size), cell_name(CELLS[size] - 1)]
+            texts = []
+            for state_class in STATE_CLASSES:
+                state = state_class(True, size)
+                empty = str(state)
+                for move in moves:
+                    state = state.make_move(move)
+                texts.append(str(state))
+                self.assertEqual([len(line) for line in empty.splitlines()],
+                                 [len(line) for line in texts[-1]
+                                  .splitlines()])
+                for move in moves:
+                    self.assertNotIn(move, re.findall(r'[A-Z]+', texts[-1]))
+            self.assertEqual(texts[0], texts[1])
+            self.assertIn('1', texts[0])
+            self.assertIn('2', texts[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,276 @@
+"""
+A Monte Carlo tree search (UCT) module: instead of searching every line of
+play, grows a tree towards the moves that won most often in random games
+(playouts) from its leaves, balancing moves that did well against moves that
+were tried little.
+
+The tree is kept between the moves of a game, so the part below the moves
+actually played is not searched again. Playouts run on the lightest state a
+game has (bitboards for Stonehenge), and can be run in batches by worker
+processes.
+"""
+import math
+import random
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from time import perf_counter
+from typing import Any
+from stonehenge_bitboard import from_state
+from stonehenge_state import StonehengeState
+
+EXPLORATION = math.sqrt(2)
+BATCH = 16
+
+
+class MCTSNode:
+    """
+    A node of a Monte Carlo search tree: one position and what the playouts
+    through it found.
+
+    state - the game state at this position
+    parent - the node this one was reached from, or None for the root
+    move - the move of parent's state that leads here
+    children - the nodes reached by the moves tried so far
+    untried - the moves of state not tried yet
+    visits - the number of playouts through this node
+    reward - the total reward of those playouts for the player who moved
+             into state
+    """
+    __slots__ = ('state', 'parent', 'move', 'children', 'untried', 'visits',
+                 'reward')
+    state: Any
+    parent: Any
+    move: Any
+    children: list
+    untried: list
+    visits: int
+    reward: float
+
+    def __init__(self, game: Any, state: Any, parent: 'MCTSNode' = None,
+                 move: Any = None) -> None:
+        """
+        Initialize a node of state, a state of game, reached from parent by
+        move, with no playouts yet.
+
+        >>> from subtract_square_game import SubtractSquareGame
+        >>> game = SubtractSquareGame(True, 5)
+        >>> MCTSNode(game, game.current_state).untried
+        [1, 4]
+        """
+        self.state, self.parent, self.move = state, parent, move
+        self.children = []
+        self.untried = [] if game.is_over(state) else \
+            state.get_possible_moves()
+        self.visits, self.reward = 0, 0.0
+
+    def select_child(self, exploration: float) -> 'MCTSNode':
+        """
+        Return the child of this node with the highest upper confidence
+        bound, with exploration weighing how much less tried children are
+        favoured.
+        """
+        scale = exploration * math.sqrt(math.log(self.visits))
+        return max(self.children, key=lambda child: child.reward /
+                   child.visits + scale / math.sqrt(child.visits))
+
+
+def lightweight(state: Any) -> Any:
+    """
+    Return the state equivalent to state that is fastest to play random
+    games from.
+
+    >>> type(lightweight(StonehengeState(True, 2))).__name__
+    'BitboardStonehengeState'
+    """
+    return from_state(state) if isinstance(state, StonehengeState) else state
+
+
+def playout(game: Any, state: Any, rand: random.Random) -> float:
+    """
+    Return the reward, 1 for a win, 0 for a loss, of the current player of
+    state, a state of game, in a game played on by random moves chosen with
+    rand.
+
+    >>> from subtract_square_game import SubtractSquareGame
+    >>> from subtract_square_state import SubtractSquareState
+    >>> game = SubtractSquareGame(True, 2)
+    >>> playout(game, SubtractSquareState(True, 2), random.Random(0))
+    0.0
+    """
+    current = state
+    while not game.is_over(current):
+        current = current.make_move(rand.choice(current.get_possible_moves()))
+    score = current.rough_outcome()
+    if current.p1_turn != state.p1_turn:
+        score = -1 * score
+    return (score + 1) / 2
+
+
+def run_playouts(game: Any, states: list, seed: int) -> list:
+    """
+    Return the rewards of one playout from each of states, states of game,
+    seeding the random moves with seed.
+
+    This is the work done by each worker process of search.
+    """
+    rand = random.Random(seed)
+    return [playout(game, lightweight(state), rand) for state in states]
+
+
+def descend(game: Any, root: MCTSNode, rand: random.Random,
+            exploration: float) -> MCTSNode:
+    """
+    Return the node of the tree below root, a tree of game, to play out
+    next: a new child of the first node met with untried moves, going down
+    by upper confidence bound, or a finished position.
+
+    Every node on the way counts the playout as visiting it already, so that
+    the next descents of a batch spread out over other nodes.
+    """
+    node = root
+    node.visits += 1
+    while not node.untried and node.children:
+        node = node.select_child(exploration)
+        node.visits += 1
+    if node.untried:
+        move = node.untried.pop(rand.randrange(len(node.untried)))
+        child = MCTSNode(game, node.state.make_move(move), node, move)
+        node.children.append(child)
+        node = child
+        node.visits += 1
+    return node
+
+
+def backpropagate(node: MCTSNode, reward: float) -> None:
+    """
+    Add reward, the reward of a playout for the current player of node's
+    state, to node and every node above it, each from the view of the player
+    who moved into it.
+    """
+    while node is not None:
+        reward = 1 - reward
+        node.reward += reward
+        node = node.parent
+
+
+def find_subtree(root: Any, state: Any, depth: int = 2) -> Any:
+    """
+    Return the node for state among the nodes at most depth moves below
+    root (itself included), or None if there is none.
+
+    >>> from subtract_square_game import SubtractSquareGame
+    >>> from subtract_square_state import SubtractSquareState
+    >>> game = SubtractSquareGame(True, 5)
+    >>> root = MCTSNode(game, game.current_state)
+    >>> child = descend(game, root, random.Random(0), EXPLORATION)
+    >>> find_subtree(root, child.state) is child
+    True
+    >>> find_subtree(root, SubtractSquareState(True, 3)) is None
+    True
+    """
+    if root is None:
+        return None
+    if root.state == state:
+        return root
+    if depth > 0:
+        for child in root.children:
+            node = find_subtree(child, state, depth - 1)
+            if node is not None:
+                return node
+    return None
+
+
+def search(game: Any, root: MCTSNode, playouts: Any = 1000,
+           budget_ms: Any = None, workers: int = 1, seed: Any = None,
+           exploration: float = EXPLORATION) -> MCTSNode:
+    """
+    Grow the tree of root, a tree of game, by playouts playouts (no limit if
+    None), stopping early once budget_ms milliseconds have passed (if given),
+    and return root.
+
+    With workers more than 1, playouts are run in batches by that many
+    worker processes. Random choices are seeded with seed, if given.
+    """
+    if playouts is None and budget_ms is None:
+        raise ValueError('a search needs a playout count or a time budget')
+    deadline = None if budget_ms is None else \
+        perf_counter() + budget_ms / 1000
+    rand, done = random.Random(seed), 0
+    pool = ProcessPoolExecutor(workers) if workers > 1 else None
+    try:
+        while (playouts is None or done < playouts) and \
+                (deadline is None or perf_counter() < deadline):
+            size = 1 if pool is None else BATCH * workers
+            if playouts is not None:
+                size = min(size, playouts - done)
+            leaves = [descend(game, root, rand, exploration)
+                      for _ in range(size)]
+            if pool is None:
+                rewards = [playout(game, lightweight(leaves[0].state), rand)]
+            else:
+                chunks = [[leaf.state for leaf in leaves[n::workers]]
+                          for n in range(workers)]
+                seeds = [rand.randrange(2 ** 32) for _ in chunks]
+                results = list(pool.map(run_playouts, repeat(game), chunks,
+                                        seeds))
+                rewards = [results[n % workers][n // workers]
+                           for n in range(size)]
+            for leaf, reward in zip(leaves, rewards):
+                backpropagate(leaf, reward)
+            done += size
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return root
+
+
+def best_move(root: MCTSNode) -> Any:
+    """
+    Return the move of root's most visited child, or None if root has no
+    children.
+    """
+    if not root.children:
+        return None
+    return max(root.children, key=lambda child: child.visits).move
+
+
+_TREES = weakref.WeakKeyDictionary()
+
+
+def get_tree(game: Any) -> Any:
+    """
+    Return the search tree kept for game since its last search, or None if
+    there is none.
+    """
+    return _TREES.get(game)
+
+
+def mcts(game: Any, playouts: Any = 1000, budget_ms: Any = None,
+         workers: int = 1, seed: Any = None) -> Any:
+    """
+    Return the move for the current state of game that a Monte Carlo tree
+    search of playouts playouts (or of budget_ms milliseconds) finds best.
+
+    The tree searched for game last time is reused if the current state is
+    in it, and kept for next time.
+
+    >>> from subtract_square_game import SubtractSquareGame
+    >>> mcts(SubtractSquareGame(True, 9), 200, seed=0)
+    9
+    """
+    root = find_subtree(get_tree(game), game.current_state)
+    if root is None:
+        root = MCTSNode(game, game.current_state)
+    root.parent, root.move = None, None
+    search(game, root, playouts, budget_ms, workers, seed)
+    _TREES[game] = root
+    return best_move(root)
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
+
+    from doctest import testmod
+    testmod()
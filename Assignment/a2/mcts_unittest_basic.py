@@ -0,0 +1,69 @@
+"""
+Unittests for Monte Carlo tree search.
+
+The search must find winning moves, keep its tree between the moves of a
+game, stop on its time budget, and work with playouts run by worker
+processes.
+"""
+import unittest
+from time import perf_counter
+
+from mcts import mcts, get_tree
+from stonehenge_game import StonehengeGame
+from strategy import minimax_search
+from subtract_square_game import SubtractSquareGame
+from transposition import TranspositionTable
+
+
+class MCTSUnitTests(unittest.TestCase):
+    def test_finds_winning_moves(self):
+        """
+        Test that the move found on Stonehenge of side-length 2, which the
+        first player wins, leaves the opponent lost.
+        """
+        table = TranspositionTable()
+        for seed in range(3):
+            game = StonehengeGame(True, '2')
+            move = mcts(game, 2000, seed=seed)
+            state = game.current_state.make_move(move)
+            self.assertEqual(minimax_search(game, state, table)[0], -1)
+
+    def test_reuses_tree(self):
+        """
+        Test that after a move of each player the search starts from the
+        part of the last tree below them.
+        """
+        game = SubtractSquareGame(True, 30)
+        move = mcts(game, 500, seed=0)
+        child = [node for node in get_tree(game).children
+                 if node.move == move][0]
+        reply = max(child.children, key=lambda node: node.visits)
+        visits = reply.visits
+        game.current_state = reply.state
+        mcts(game, 100, seed=0)
+        self.assertIs(get_tree(game), reply)
+        self.assertIsNone(reply.parent)
+        self.assertEqual(reply.visits, visits + 100)
+
+    def test_time_budget(self):
+        """
+        Test that a search with only a time budget stops in time.
+        """
+        game = StonehengeGame(True, '4')
+        start = perf_counter()
+        move = mcts(game, None, budget_ms=200)
+        self.assertLess(perf_counter() - start, 1.0)
+        self.assertIn(move, game.current_state.get_possible_moves())
+
+    def test_workers(self):
+        """
+        Test that playouts run in worker processes are all counted.
+        """
+        game = StonehengeGame(True, '3')
+        move = mcts(game, 100, workers=2, seed=0)
+        self.assertIn(move, game.current_state.get_possible_moves())
+        self.assertEqual(get_tree(game).visits, 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
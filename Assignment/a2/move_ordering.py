@@ -0,0 +1,137 @@
+"""
+A move_ordering module: puts the moves most likely to be best first, so
+searches that stop early on a winning move or a cutoff do so sooner.
+
+Stonehenge cells are ranked by the ley-lines not yet claimed through them:
+more for a cell that captures a line, less for one that takes a cell the
+opponent needs to capture a line, and least for one that merely touches an
+open line. On top of that, a MoveOrderer remembers the moves that cut off the
+search of siblings (killer moves, per ply) and how often each move did so for
+each player (history), and tries those first.
+"""
+from typing import Any
+from grid import get_incidence
+
+CAPTURE = 4
+BLOCK = 2
+OPEN = 1
+
+
+def get_static_scores(state: Any, moves: list = None) -> dict:
+    """
+    Return a dictionary of the static score of every cell in moves (the
+    possible moves of state if not given) of the Stonehenge state state; an
+    empty dictionary for states of other games.
+
+    >>> from stonehenge_state import StonehengeState
+    >>> get_static_scores(StonehengeState(True, 1))
+    {'A': 15, 'B': 15, 'C': 15}
+    >>> scores = get_static_scores(StonehengeState(True, 2).make_move('B'))
+    >>> scores['F'] > scores['D']
+    True
+    >>> from subtract_square_state import SubtractSquareState
+    >>> get_static_scores(SubtractSquareState(True, 5))
+    {}
+    """
+    if not hasattr(state, 'get_line_claims'):
+        return {}
+    index, _, through = get_incidence(state.size)
+    claims = state.get_line_claims()
+    mine, theirs = (1, 2) if state.p1_turn else (2, 1)
+    scores = {}
+    for letter in state.get_possible_moves() if moves is None else moves:
+        score = 0
+        for i in through[index[letter]]:
+            if claims[i][0]:
+                continue
+            if (claims[i][mine] + 1) * 2 >= claims[i][3]:
+                score += CAPTURE
+            elif (claims[i][theirs] + 1) * 2 >= claims[i][3]:
+                score += BLOCK
+            score += OPEN
+        scores[letter] = score
+    return scores
+
+
+def static_order(state: Any, moves: list) -> list:
+    """
+    Return moves ordered by their static score in state, highest first, with
+    ties kept in their original order.
+
+    >>> from stonehenge_state import StonehengeState
+    >>> state = StonehengeState(True, 2).make_move('A').make_move('G')
+    >>> static_order(state, state.get_possible_moves())[0]
+    'D'
+    """
+    scores = get_static_scores(state, moves)
+    return sorted(moves, key=lambda move: -scores.get(move, 0))
+
+
+class MoveOrderer:
+    """
+    Orders the moves of the positions of one search, learning from the moves
+    that cut off the search of their siblings.
+
+    killers - the (at most two) latest moves that caused a cutoff at each ply
+    history - how much each (player, move) pair has caused cutoffs
+    """
+    killers: dict
+    history: dict
+
+    def __init__(self) -> None:
+        """
+        Initialize a MoveOrderer that has not seen any cutoffs yet.
+
+        >>> MoveOrderer().killers
+        {}
+        """
+        self.killers, self.history = {}, {}
+
+    def order(self, state: Any, moves: list, ply: int = 0,
+              first: Any = None) -> list:
+        """
+        Return moves, the possible moves of state at ply plies from the root,
+        ordered with first (such as the best move stored in a transposition
+        table) first, then the killer moves of ply, then by history, then by
+        static score. Ties keep their original order.
+
+        >>> from stonehenge_state import StonehengeState
+        >>> orderer, state = MoveOrderer(), StonehengeState(True, 2)
+        >>> orderer.record(state, 'F', 0)
+        >>> orderer.order(state, state.get_possible_moves(), 0, 'C')[:2]
+        ['C', 'F']
+        """
+        scores = get_static_scores(state, moves)
+        killers = self.killers.get(ply, [])
+        player = state.get_current_player_name()
+        return sorted(moves, key=lambda move: (
+            move != first, move not in killers,
+            -self.history.get((player, move), 0), -scores.get(move, 0)))
+
+    def record(self, state: Any, move: Any, ply: int,
+               weight: int = 1) -> None:
+        """
+        Record that move, played in state at ply plies from the root, cut off
+        the search of its siblings, adding weight to its history.
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> orderer = MoveOrderer()
+        >>> orderer.record(SubtractSquareState(True, 5), 4, 0)
+        >>> orderer.record(SubtractSquareState(True, 8), 1, 0, 3)
+        >>> orderer.killers[0], orderer.history[('p1', 1)]
+        ([1, 4], 3)
+        """
+        killers = self.killers.setdefault(ply, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+        key = (state.get_current_player_name(), move)
+        self.history[key] = self.history.get(key, 0) + weight
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
+
+    from doctest import testmod
+    testmod()
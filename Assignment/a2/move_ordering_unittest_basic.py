@@ -0,0 +1,60 @@
+"""
+Unittests for move ordering: ordered searches must still find a best move,
+and must search fewer nodes than unordered ones.
+"""
+import random
+import unittest
+
+from search_stats import collect
+from stonehenge_game import StonehengeGame
+from stonehenge_state import StonehengeState
+from strategy import minimax_search, recursive_minimax, iterative_minimax, \
+    alphabeta_minimax, iterative_deepening
+from transposition import TranspositionTable
+
+
+def score_of(game, move):
+    """
+    Return the minimax score for the current player of game of making move.
+    """
+    return -1 * minimax_search(game, game.current_state.make_move(move),
+                               TranspositionTable())[0]
+
+
+class MoveOrderingUnitTests(unittest.TestCase):
+    def test_ordered_moves_are_best(self):
+        """
+        Test that every strategy with ordering picks a move as good as the
+        one recursive_minimax picks, on positions of random size 2 games.
+        """
+        rnd = random.Random(148)
+        for _ in range(6):
+            game = StonehengeGame(rnd.random() < 0.5, '2')
+            for _ in range(rnd.randrange(4)):
+                game.current_state = game.current_state.make_move(
+                    rnd.choice(game.current_state.get_possible_moves()))
+            if game.is_over(game.current_state):
+                continue
+            best = score_of(game, recursive_minimax(game,
+                                                    TranspositionTable()))
+            for move in [recursive_minimax(game, TranspositionTable(), True),
+                         iterative_minimax(game, True),
+                         alphabeta_minimax(game, True, TranspositionTable()),
+                         iterative_deepening(game, 10000, None, True)]:
+                self.assertEqual(score_of(game, move), best)
+
+    def test_fewer_nodes(self):
+        """
+        Test that ordering cuts the nodes searched to solve a size 3 game.
+        """
+        game = StonehengeGame(True, '3')
+        counts = []
+        for ordering in [False, True]:
+            with collect(StonehengeState) as stats:
+                alphabeta_minimax(game, ordering, TranspositionTable())
+            counts.append(stats.nodes)
+        self.assertLess(counts[1], counts[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+"""
+Unittests for parallel minimax.
+
+The move found by splitting the game tree over worker processes must be the
+one recursive_minimax finds, whatever depth the tree is split at, and the
+states sent to the workers must come back unchanged.
+"""
+import pickle
+import unittest
+
+from stonehenge_game import StonehengeGame
+from stonehenge_state import StonehengeState
+from strategy import parallel_minimax, recursive_minimax
+from subtract_square_game import SubtractSquareGame
+from subtract_square_state import SubtractSquareState
+from transposition import TranspositionTable
+
+
+class ParallelMinimaxUnitTests(unittest.TestCase):
+    def test_same_move_as_recursive(self):
+        """
+        Test that parallel_minimax picks the move of recursive_minimax when
+        split 1 and 2 plies deep, on Stonehenge and SubtractSquare.
+        """
+        games = [lambda: StonehengeGame(True, '2'),
+                 lambda: StonehengeGame(False, '2'),
+                 lambda: SubtractSquareGame(True, 37),
+                 lambda: SubtractSquareGame(False, 50)]
+        for make_game in games:
+            expected = recursive_minimax(make_game(), TranspositionTable())
+            for depth in (1, 2):
+                self.assertEqual(parallel_minimax(make_game(), 2, depth),
+                                 expected)
+
+    def test_mid_game(self):
+        """
+        Test that the moves agree from a Stonehenge position part way
+        through a game as well.
+        """
+        game = StonehengeGame(True, '2')
+        game.current_state = game.current_state.make_move('A').make_move('G')
+        self.assertEqual(parallel_minimax(game, 2, 2),
+                         recursive_minimax(game, TranspositionTable()))
+
+    def test_pickle_round_trip(self):
+        """
+        Test that states come back from pickling equal, with the same board,
+        moves and score.
+        """
+        states = [StonehengeState(True, 3).make_move('A').make_move('F'),
+                  StonehengeState(False, 1).make_move('C'),
+                  SubtractSquareState(False, 1000)]
+        for state in states:
+            copy = pickle.loads(pickle.dumps(state))
+            self.assertEqual(copy, state)
+            self.assertEqual(repr(copy), repr(state))
+            self.assertEqual(str(copy), str(state))
+            self.assertEqual(copy.get_possible_moves(),
+                             state.get_possible_moves())
+            self.assertEqual(copy.rough_outcome(), state.rough_outcome())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,208 @@
+"""
+A proof-number search module: proves whether the player to move wins a
+position, searching depth-first (df-pn) towards the moves that are cheapest
+to prove or disprove, and leaving alone the subtrees that cannot change the
+result.
+
+Every position has a proof number, the fewest positions that still have to
+be solved to prove it a win for its player, and a disproof number, the
+fewest to prove it a loss. A position is won if some move leaves the
+opponent lost, so its proof number is the smallest disproof number of its
+children and its disproof number the sum of their proof numbers.
+
+Usage: python proof_number.py SIZE [SIZE ...] [-d DEPTH] [-c CAPACITY]
+                              [--json PATH]
+
+solves every Stonehenge opening up to DEPTH moves deep on boards of each
+side-length SIZE, and prints its value and principal variation.
+"""
+import json
+import math
+from time import perf_counter
+from typing import Any
+from stonehenge_bitboard import from_state
+from stonehenge_state import StonehengeState
+from transposition import TranspositionTable, canonical_key, map_move
+
+INFINITY = math.inf
+
+
+class ProofNumberSearch:
+    """
+    A df-pn solver for the positions of one game.
+
+    game - the game whose positions are solved
+    table - the (proof number, disproof number) pair and the most promising
+            move of the positions searched, in place of a score and a move,
+            keyed by canonical_key so mirror images are searched once
+    nodes - the number of positions expanded so far
+    """
+    game: Any
+    table: TranspositionTable
+    nodes: int
+
+    def __init__(self, game: Any, capacity: Any = 1000000) -> None:
+        """
+        Initialize a solver for game, remembering at most capacity positions
+        (no bound if None).
+
+        >>> from stonehenge_game import StonehengeGame
+        >>> ProofNumberSearch(StonehengeGame(True, '1')).nodes
+        0
+        """
+        self.game, self.table = game, TranspositionTable(capacity)
+        self.nodes = 0
+
+    def numbers(self, state: Any) -> tuple:
+        """
+        Return the (proof number, disproof number) pair of state: the pair
+        stored in the table, a proof or a disproof if the game is over at
+        state, or else (1, 1).
+        """
+        if self.game.is_over(state):
+            return (0, INFINITY) if state.rough_outcome() == state.WIN \
+                else (INFINITY, 0)
+        entry = self.table.get(canonical_key(state)[0])
+        if entry is not None:
+            return entry[0]
+        return 1, 1
+
+    def search(self, state: Any, thresholds: tuple) -> tuple:
+        """
+        Search the unfinished state until its proof number reaches
+        thresholds[0] or its disproof number reaches thresholds[1]. Store its
+        numbers and most promising move in the table, and return them as a
+        (proof, disproof, move) triple.
+
+        The numbers of the children are kept here as well as in the table,
+        so a table too small for the positions on the path being searched
+        slows the search down, but cannot keep it from finishing.
+        """
+        self.nodes += 1
+        key, mirrored = canonical_key(state)
+        children, numbers = [], []
+        for move in state.get_possible_moves():
+            children.append((move, state.make_move(move)))
+            numbers.append(self.numbers(children[-1][1]))
+        while True:
+            proof, disproof, best, second = INFINITY, 0, 0, INFINITY
+            for n, (child_proof, child_disproof) in enumerate(numbers):
+                disproof += child_proof
+                if child_disproof < proof:
+                    proof, second, best = child_disproof, proof, n
+                elif child_disproof < second:
+                    second = child_disproof
+            move = children[best][0]
+            self.table.put(key, (proof, disproof),
+                           map_move(state, move, mirrored))
+            if proof >= thresholds[0] or disproof >= thresholds[1]:
+                return proof, disproof, move
+            numbers[best] = self.search(
+                children[best][1], (thresholds[1] - disproof + numbers[best][0],
+                                    min(thresholds[0], second + 1)))[:2]
+
+    def solve(self, state: Any) -> tuple:
+        """
+        Return the (score, move) pair of state: WIN if its current player
+        wins with best play and LOSE if not, and the move that proves it
+        (None if the game is over at state).
+
+        Stonehenge states are searched as BitboardStonehengeStates.
+
+        >>> from stonehenge_game import StonehengeGame
+        >>> game = StonehengeGame(True, '2')
+        >>> ProofNumberSearch(game).solve(game.current_state)
+        (1, 'G')
+        """
+        if isinstance(state, StonehengeState):
+            state = from_state(state)
+        if self.game.is_over(state):
+            return state.rough_outcome(), None
+        key, mirrored = canonical_key(state)
+        entry = self.table.get(key)
+        if entry is not None and 0 in entry[0]:
+            proof, move = entry[0][0], map_move(state, entry[1], mirrored)
+        else:
+            proof, _, move = self.search(state, (INFINITY, INFINITY))
+        return (state.WIN if proof == 0 else state.LOSE), move
+
+    def principal_variation(self, state: Any) -> list:
+        """
+        Return the moves of a game played from state to its end in which the
+        winner keeps to moves that prove the win, and the loser plays on.
+
+        >>> from stonehenge_game import StonehengeGame
+        >>> game = StonehengeGame(True, '2')
+        >>> ProofNumberSearch(game).principal_variation(game.current_state)
+        ['G', 'A', 'F', 'B', 'D']
+        """
+        moves = []
+        move = self.solve(state)[1]
+        while move is not None:
+            moves.append(move)
+            state = state.make_move(move)
+            move = self.solve(state)[1]
+        return moves
+
+
+def solve_openings(size: int, depth: int, capacity: Any = 1000000) -> list:
+    """
+    Return the value, principal variation, number of moves from the start,
+    and the number of positions and seconds the search took, of every
+    Stonehenge opening of side-length size up to depth moves from the start,
+    with p1 moving first.
+
+    >>> results = solve_openings(1, 0)
+    >>> results[0]['winner'], results[0]['variation']
+    ('p1', ['A'])
+    """
+    from eval_cache import openings
+    from stonehenge_game import StonehengeGame
+    game = StonehengeGame(True, str(size))
+    solver, results = ProofNumberSearch(game, capacity), []
+    for state in openings(game, depth):
+        nodes, start = solver.nodes, perf_counter()
+        score = solver.solve(state)[0]
+        player = state.get_current_player_name()
+        results.append({
+            'size': size, 'position': str(state), 'player': player,
+            'depth': len(game.current_state.get_possible_moves()) -
+                     len(state.get_possible_moves()),
+            'winner': player if score == state.WIN else
+                      'p2' if player == 'p1' else 'p1',
+            'variation': solver.principal_variation(state),
+            'nodes': solver.nodes - nodes,
+            'seconds': perf_counter() - start})
+    return results
+
+
+def main(args: list = None) -> list:
+    """
+    Solve the openings described by the command-line arguments args (taken
+    from sys.argv if not given), print their values, write them out as
+    asked, and return them.
+    """
+    from argparse import ArgumentParser
+    parser = ArgumentParser(description='Prove the Stonehenge openings.')
+    parser.add_argument('sizes', nargs='+', type=int, metavar='SIZE')
+    parser.add_argument('-d', '--depth', type=int, default=0)
+    parser.add_argument('-c', '--capacity', type=int, default=1000000)
+    parser.add_argument('--json')
+    options = parser.parse_args(args)
+    results = []
+    for size in options.sizes:
+        for result in solve_openings(size, options.depth, options.capacity):
+            results.append(result)
+            print('size {}, {} moves in, {} to move: {} wins ({} nodes, '
+                  '{:.2f}s)'.format(size, result['depth'], result['player'],
+                                    result['winner'], result['nodes'],
+                                    result['seconds']))
+            print('    ' + ' '.join(result['variation']))
+    if options.json:
+        with open(options.json, 'w') as file:
+            json.dump(results, file, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
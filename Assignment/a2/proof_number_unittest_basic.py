@@ -0,0 +1,83 @@
+"""
+Unittests for the proof-number search solver.
+
+Proven values must agree with minimax, also when the transposition table is
+too small to hold the whole search, and principal variations must end in a
+win for the player the position was proven for.
+"""
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from benchmark import random_states
+from proof_number import ProofNumberSearch, main
+from stonehenge_game import StonehengeGame
+from strategy import minimax_search, proof_number_strategy
+from subtract_square_game import SubtractSquareGame
+from transposition import TranspositionTable
+
+
+class ProofNumberUnitTests(unittest.TestCase):
+    def test_agrees_with_minimax(self):
+        """
+        Test that positions on boards of side-length 2 and 3 are proven to
+        have the value minimax finds, also with a table too small for the
+        positions of side-length 2.
+        """
+        for size, capacities in [(2, [50, None]), (3, [None])]:
+            game, table = StonehengeGame(True, str(size)), TranspositionTable()
+            for capacity in capacities:
+                solver = ProofNumberSearch(game, capacity)
+                for state in random_states(size, 10):
+                    self.assertEqual(solver.solve(state)[0],
+                                     minimax_search(game, state, table)[0],
+                                     "{}\nwas solved wrongly.".format(state))
+
+    def test_principal_variation(self):
+        """
+        Test that the principal variation of the start of a game of
+        side-length 3 is a game p1 wins.
+        """
+        game = StonehengeGame(True, '3')
+        state = game.current_state
+        for move in ProofNumberSearch(game).principal_variation(state):
+            state = state.make_move(move)
+        self.assertTrue(game.is_over(state))
+        self.assertEqual(state.get_current_player_name(), 'p2')
+        self.assertEqual(state.rough_outcome(), state.LOSE)
+
+    def test_strategy_wins(self):
+        """
+        Test that the strategy's move leaves the opponent lost whenever
+        there is such a move, on SubtractSquare as well as Stonehenge.
+        """
+        table = TranspositionTable()
+        for game in [StonehengeGame(True, '2'), SubtractSquareGame(True, 30),
+                     SubtractSquareGame(True, 31)]:
+            move = proof_number_strategy(game)
+            score = minimax_search(game, game.current_state, table)[0]
+            if score == 1:
+                self.assertEqual(minimax_search(
+                    game, game.current_state.make_move(move), table)[0], -1)
+
+    def test_cli_json(self):
+        """
+        Test that the command-line tool writes every opening it solved,
+        solving only one of each pair of mirror images.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'openings.json')
+            with redirect_stdout(StringIO()):
+                main(['1', '2', '-d', '1', '--json', path])
+            with open(path) as file:
+                results = json.load(file)
+        self.assertEqual([result['size'] for result in results],
+                         [1] + [2] * 5)
+        self.assertEqual(results[1]['winner'], 'p1')
+
+
+if __name__ == "__main__":
+    unittest.main()
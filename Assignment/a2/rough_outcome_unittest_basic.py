@@ -0,0 +1,104 @@
+"""
+Unittests for StonehengeState.rough_outcome, which reads wins and forced
+losses off the claim counts of the ley-lines instead of making moves.
+"""
+import random
+import unittest
+
+from stonehenge_bitboard import BitboardStonehengeState
+from stonehenge_state import StonehengeState
+
+STATE_CLASSES = [StonehengeState, BitboardStonehengeState]
+
+
+def play(state_class, size, moves):
+    """
+    Return the state of state_class of side-length size reached by making
+    moves, a string of cell letters, from the empty board with p1 to move.
+    """
+    state = state_class(True, size)
+    for move in moves:
+        state = state.make_move(move)
+    return state
+
+
+def lookahead_outcome(state):
+    """
+    Return the rough outcome of state found by making every move and every
+    reply: 1 if a move finishes the game, -1 if every move lets the opponent
+    finish it, and 0 otherwise.
+    """
+    def finishes(state, move):
+        return state.make_move(move).is_finished()
+    moves = state.get_possible_moves()
+    if any(finishes(state, move) for move in moves):
+        return 1
+    if all(any(finishes(state.make_move(move), reply)
+               for reply in state.make_move(move).get_possible_moves())
+           for move in moves):
+        return -1
+    return 0
+
+
+class RoughOutcomeUnitTests(unittest.TestCase):
+    def assert_outcomes(self, positions, outcome):
+        """
+        Assert that every state reached by positions, (size, moves) pairs as
+        taken by play, has rough_outcome outcome under both backends.
+        """
+        for state_class in STATE_CLASSES:
+            for size, moves in positions:
+                self.assertEqual(
+                    play(state_class, size, moves).rough_outcome(), outcome,
+                    '{} {} {}'.format(state_class.__name__, size, moves))
+
+    def test_winning_positions(self):
+        """
+        Test positions where a move wins at once: one capturing a single
+        ley-line, and one on a size 3 board capturing three at once.
+        """
+        self.assert_outcomes([(1, ''), (2, 'AB'), (2, 'CD'), (3, 'LEGCAH')],
+                             1)
+
+    def test_losing_positions(self):
+        """
+        Test positions where every move lets the opponent win at once.
+        """
+        self.assert_outcomes([(2, 'BDG'), (2, 'DACEG'), (3, 'AHJFD')], -1)
+
+    def test_undecided_positions(self):
+        """
+        Test positions where no move wins at once, but some move stops the
+        opponent from winning at once.
+        """
+        self.assert_outcomes([(2, 'FA'), (3, ''), (3, 'KH')], 0)
+
+    def test_finished_positions(self):
+        """
+        Test that a finished game is a loss for the player to move.
+        """
+        self.assert_outcomes([(1, 'A'), (2, 'ABCDE')], -1)
+
+    def test_agrees_with_lookahead(self):
+        """
+        Test rough_outcome against making every move and reply, on random
+        positions of sizes 1 to 4.
+        """
+        rnd = random.Random(214)
+        for _ in range(200):
+            size = rnd.randint(1, 4)
+            states = [state_class(rnd.random() < 0.5, size)
+                      for state_class in STATE_CLASSES]
+            for _ in range(rnd.randrange(3 * size)):
+                if states[0].is_finished():
+                    break
+                move = rnd.choice(states[0].get_possible_moves())
+                states = [state.make_move(move) for state in states]
+            if not states[0].is_finished():
+                for state in states:
+                    self.assertEqual(state.rough_outcome(),
+                                     lookahead_outcome(state))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+"""
+A search_state module: lets a search play its moves on one state, changing it
+in place and taking the moves back, instead of making a new state (for
+Stonehenge, a copy of the whole grid) for every position it visits.
+
+States that have apply_move and undo_move are copied once and changed in
+place; the others are searched through make_move as before, so a search
+written against SearchState works with every game.
+"""
+import copy
+from typing import Any
+
+
+class SearchState:
+    """
+    The position a search is at, and the moves that led there from the
+    position it started at.
+
+    state - the game state at the current position; while the search is
+            running, it is only valid until the next play or undo
+    history - what undo needs to take each move played back, latest last:
+              the tokens of apply_move, or the states moved from
+    in_place - whether moves are applied to state itself
+    """
+    state: Any
+    history: list
+    in_place: bool
+
+    def __init__(self, state: Any) -> None:
+        """
+        Initialize a search starting at state, which is never changed: if
+        moves are applied in place, it is to a copy.
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> start = SubtractSquareState(True, 10)
+        >>> search = SearchState(start)
+        >>> search.in_place, search.state is start
+        (True, False)
+        """
+        self.in_place = hasattr(state, 'apply_move')
+        self.state = copy.deepcopy(state) if self.in_place else state
+        self.history = []
+
+    def play(self, move: Any) -> Any:
+        """
+        Play move at the current position, and return the new current state.
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> search = SearchState(SubtractSquareState(True, 10))
+        >>> search.play(4).current_total
+        6
+        """
+        if self.in_place:
+            self.history.append(self.state.apply_move(move))
+        else:
+            self.history.append(self.state)
+            self.state = self.state.make_move(move)
+        return self.state
+
+    def undo(self) -> Any:
+        """
+        Take back the latest move played, and return the current state.
+
+        >>> from stonehenge_state import StonehengeState
+        >>> search = SearchState(StonehengeState(True, 2))
+        >>> _ = search.play('A')
+        >>> search.undo() == StonehengeState(True, 2)
+        True
+        """
+        if self.in_place:
+            self.state.undo_move(self.history.pop())
+        else:
+            self.state = self.history.pop()
+        return self.state
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
+
+    from doctest import testmod
+    testmod()
@@ -0,0 +1,82 @@
+"""
+Unittests for moves applied in place.
+
+apply_move must leave a state just like the one make_move returns, undo_move
+must restore it exactly, and the searches playing their moves on a
+SearchState must leave the states they are given alone.
+"""
+import random
+import unittest
+
+from search_state import SearchState
+from stonehenge_bitboard import from_state
+from stonehenge_game import StonehengeGame
+from stonehenge_state import StonehengeState
+from strategy import minimax_search, alphabeta_search
+from subtract_square_game import SubtractSquareGame
+from subtract_square_state import SubtractSquareState
+from transposition import TranspositionTable
+
+
+def describe(state):
+    """
+    Return everything about state a search can look at.
+    """
+    return (state.p1_turn, str(state), repr(state), hash(state),
+            state.get_possible_moves(), state.rough_outcome())
+
+
+class SearchStateUnitTests(unittest.TestCase):
+    def test_apply_matches_make(self):
+        """
+        Test that a Stonehenge state moved in place through random games is
+        always like the state make_move gives, and is restored by taking
+        every move back.
+        """
+        rand = random.Random(0)
+        for size in range(1, 6):
+            state = StonehengeState(True, size)
+            search, made = SearchState(state), []
+            start = describe(search.state)
+            while state.get_possible_moves():
+                move = rand.choice(state.get_possible_moves())
+                made.append(describe(search.state))
+                state = state.make_move(move)
+                self.assertEqual(describe(search.play(move)), describe(state))
+            while made:
+                self.assertEqual(describe(search.undo()), made.pop())
+            self.assertEqual(describe(search.state), start)
+
+    def test_subtract_square(self):
+        """
+        Test that moves on a SubtractSquare state are taken back exactly.
+        """
+        start = SubtractSquareState(True, 50)
+        search = SearchState(start)
+        self.assertEqual(search.play(49), SubtractSquareState(False, 1))
+        self.assertEqual(search.play('1'), SubtractSquareState(True, 0))
+        search.undo()
+        self.assertEqual(search.undo(), start)
+        self.assertIsNot(search.state, start)
+
+    def test_searches_leave_state(self):
+        """
+        Test that the searches give the same result for a state changed in
+        place as for a bitboard state, which is not, and leave it as it was.
+        """
+        for game in (StonehengeGame(True, '3'), SubtractSquareGame(True, 60)):
+            state = game.current_state
+            before = describe(state)
+            score, move = minimax_search(game, state, TranspositionTable())
+            self.assertEqual(alphabeta_search(
+                game, state, (state.LOSE, state.WIN),
+                TranspositionTable())[0], score)
+            self.assertEqual(describe(state), before)
+            if isinstance(state, StonehengeState):
+                self.assertEqual(minimax_search(
+                    game, from_state(state), TranspositionTable()),
+                    (score, move))
+
+
+if __name__ == "__main__":
+    unittest.main()
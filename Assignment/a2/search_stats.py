@@ -0,0 +1,260 @@
+"""
+A search_stats module: opt-in instrumentation of the work strategies do.
+
+collect() patches make_move, apply_move, undo_move, get_possible_moves,
+iter_moves and rough_outcome of the state classes it is given (those each one
+has), and TranspositionTable.get, for the duration of a with-block, and
+counts and times every call. Every strategy therefore reports into the same
+SearchStats without any code of its own, and nothing is counted (or paid for)
+outside a with-block: the strategies run their plain, unpatched code.
+
+As the patches are seen by the whole process, only one collect() can run at
+a time, and only calls made by the thread that started it are counted.
+
+Calls made from inside another instrumented call (such as the make_move calls
+rough_outcome makes to look ahead) are part of that call's phase, and are not
+counted as nodes or leaves of the search.
+"""
+import weakref
+from contextlib import contextmanager
+from threading import Lock, get_ident
+from time import perf_counter
+from typing import Any, Callable, Iterator
+from transposition import TranspositionTable
+
+PHASES = {'make_move': 'make_move', 'apply_move': 'make_move',
+          'undo_move': 'make_move', 'get_possible_moves': 'moves',
+          'iter_moves': 'moves', 'rough_outcome': 'evaluate'}
+# Held by the collect() in progress, if any.
+_COLLECTING = Lock()
+
+
+class SearchStats:
+    """
+    The work done by a search.
+
+    nodes - the number of states expanded, i.e. calls to make_move or
+            apply_move
+    leaves - the number of states evaluated, i.e. calls to rough_outcome
+    max_depth - the largest number of moves made from the state the search
+                started at
+    branching - how many states had each number of moves generated: all
+                their possible moves, unless a search consuming iter_moves
+                stopped before the rest
+    cache_hits - the number of transposition table lookups that found a
+                 position
+    cache_misses - the number of transposition table lookups that did not
+    timings - the seconds spent making and taking back moves ('make_move'),
+              generating moves ('moves'), evaluating states ('evaluate'),
+              and in total ('total')
+    """
+    nodes: int
+    leaves: int
+    max_depth: int
+    branching: dict
+    cache_hits: int
+    cache_misses: int
+    timings: dict
+
+    def __init__(self) -> None:
+        """
+        Initialize empty search statistics.
+
+        >>> stats = SearchStats()
+        >>> stats.nodes, stats.leaves, stats.max_depth, stats.branching
+        (0, 0, 0, {})
+        """
+        self.nodes, self.leaves, self.max_depth = 0, 0, 0
+        self.branching = {}
+        self.cache_hits, self.cache_misses = 0, 0
+        self.timings = {'make_move': 0.0, 'moves': 0.0, 'evaluate': 0.0,
+                        'total': 0.0}
+
+    def __repr__(self) -> str:
+        """
+        Return a representation of these statistics.
+
+        >>> SearchStats()
+        SearchStats(nodes=0, leaves=0, max_depth=0, cache_hits=0, \
+cache_misses=0)
+        """
+        return 'SearchStats(nodes={}, leaves={}, max_depth={}, ' \
+               'cache_hits={}, cache_misses={})'.format(
+                   self.nodes, self.leaves, self.max_depth, self.cache_hits,
+                   self.cache_misses)
+
+    def branching_factor(self) -> float:
+        """
+        Return the mean number of possible moves of the states whose moves
+        were generated, or 0.0 if there were none.
+
+        >>> stats = SearchStats()
+        >>> stats.branching = {2: 1, 4: 3}
+        >>> stats.branching_factor()
+        3.5
+        """
+        count = sum(self.branching.values())
+        return sum(n * k for n, k in self.branching.items()) / count \
+            if count else 0.0
+
+    def as_dict(self) -> dict:
+        """
+        Return these statistics as a dictionary, ready to be written as JSON.
+
+        >>> sorted(SearchStats().as_dict())[:3]
+        ['branching', 'branching_factor', 'cache_hits']
+        """
+        return {'nodes': self.nodes, 'leaves': self.leaves,
+                'max_depth': self.max_depth,
+                'branching': dict(sorted(self.branching.items())),
+                'branching_factor': self.branching_factor(),
+                'cache_hits': self.cache_hits,
+                'cache_misses': self.cache_misses,
+                'timings': dict(self.timings)}
+
+
+def instrument(stats: SearchStats, name: str, method: Callable,
+               depths: dict, nesting: list, thread: int) -> Callable:
+    """
+    Return a version of the state method called name (one of PHASES) that
+    does what method does and reports into stats the calls made by the
+    thread with identifier thread, where depths maps id(state) to a weak
+    reference to the state and its depth, and nesting[0] counts the
+    instrumented calls in progress.
+
+    A state changed in place by apply_move is one move deeper until
+    undo_move takes the move back.
+
+    The moves of iter_moves are timed one at a time, as they are taken, and
+    counted once the search is done with them.
+    """
+    phase = PHASES[name]
+
+    def generate(moves: Iterator) -> Iterator:
+        """
+        Yield the moves of moves, timing each as it is taken, and count how
+        many were taken once the search is done with them.
+        """
+        count = 0
+        try:
+            while True:
+                nesting[0] += 1
+                start = perf_counter()
+                try:
+                    move = next(moves, None)
+                finally:
+                    stats.timings[phase] += perf_counter() - start
+                    nesting[0] -= 1
+                if move is None:
+                    return
+                count += 1
+                yield move
+        finally:
+            stats.branching[count] = stats.branching.get(count, 0) + 1
+
+    def wrapper(state: Any, *args: Any) -> Any:
+        """
+        Return method(state, *args), reporting the call into stats unless
+        it is made by another thread or from inside an instrumented call.
+        """
+        if nesting[0] or get_ident() != thread:
+            return method(state, *args)
+        if name == 'iter_moves':
+            return generate(method(state, *args))
+        nesting[0] += 1
+        start = perf_counter()
+        try:
+            result = method(state, *args)
+        finally:
+            stats.timings[phase] += perf_counter() - start
+            nesting[0] -= 1
+        if name in ('make_move', 'apply_move'):
+            stats.nodes += 1
+            entry = depths.get(id(state))
+            depth = entry[1] + 1 if entry and entry[0]() is state else 1
+            moved = result if name == 'make_move' else state
+            depths[id(moved)] = (weakref.ref(moved), depth)
+            stats.max_depth = max(stats.max_depth, depth)
+        elif name == 'undo_move':
+            entry = depths.get(id(state))
+            if entry and entry[0]() is state:
+                depths[id(state)] = (entry[0], entry[1] - 1)
+        elif name == 'rough_outcome':
+            stats.leaves += 1
+        else:
+            stats.branching[len(result)] = \
+                stats.branching.get(len(result), 0) + 1
+        return result
+    return wrapper
+
+
+@contextmanager
+def collect(*state_classes: type) -> Any:
+    """
+    Count and time the work done on states of each of state_classes within
+    a with-block into the SearchStats it yields.
+
+    Only work done in this process is counted, so the searches run by the
+    worker processes of parallel_minimax are not.
+
+    >>> from subtract_square_state import SubtractSquareState
+    >>> with collect(SubtractSquareState) as stats:
+    ...     state = SubtractSquareState(True, 5).make_move(4).make_move(1)
+    ...     _ = state.rough_outcome()
+    >>> stats.nodes, stats.leaves, stats.max_depth
+    (2, 1, 2)
+    >>> 'rough_outcome' in SubtractSquareState.__dict__
+    True
+
+    Raise RuntimeError if another collect() is already in progress, as the
+    two would count into, and restore, the same methods.
+    """
+    if not _COLLECTING.acquire(blocking=False):
+        raise RuntimeError('collect() is already in progress')
+    stats, depths, nesting, thread = SearchStats(), {}, [0], get_ident()
+    patched = [(TranspositionTable, 'get',
+                TranspositionTable.__dict__['get'])]
+    for state_class in dict.fromkeys(state_classes):
+        names = [name for name in PHASES if hasattr(state_class, name)]
+        patched.extend((state_class, name, state_class.__dict__.get(name))
+                       for name in names)
+        for name in names:
+            setattr(state_class, name, instrument(
+                stats, name, getattr(state_class, name), depths, nesting,
+                thread))
+    table_get = TranspositionTable.get
+
+    def get(table: TranspositionTable, key: Any) -> Any:
+        """
+        Return table.get(key), counting it as a hit or a miss of the thread
+        collecting.
+        """
+        entry = table_get(table, key)
+        if get_ident() != thread:
+            return entry
+        if entry is None:
+            stats.cache_misses += 1
+        else:
+            stats.cache_hits += 1
+        return entry
+
+    TranspositionTable.get = get
+    start = perf_counter()
+    try:
+        yield stats
+    finally:
+        stats.timings['total'] += perf_counter() - start
+        for owner, name, method in patched:
+            if method is None:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, method)
+        _COLLECTING.release()
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
+
+    from doctest import testmod
+    testmod()
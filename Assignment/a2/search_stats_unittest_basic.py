@@ -0,0 +1,97 @@
+"""
+Unittests for the opt-in search instrumentation.
+"""
+import unittest
+from threading import Thread
+
+from search_stats import collect
+from stonehenge_game import StonehengeGame
+from stonehenge_state import StonehengeState
+from strategy import recursive_minimax, iterative_minimax, \
+    rough_outcome_strategy
+from subtract_square_game import SubtractSquareGame
+from subtract_square_state import SubtractSquareState
+from transposition import TranspositionTable
+
+
+class SearchStatsUnitTests(unittest.TestCase):
+    def test_nothing_patched_outside(self):
+        """
+        Test that the state class and the transposition table run their own
+        methods again once collection is over, even after an error.
+        """
+        methods = (StonehengeState.make_move, StonehengeState.rough_outcome,
+                   StonehengeState.get_possible_moves, TranspositionTable.get)
+        try:
+            with collect(StonehengeState):
+                raise KeyError
+        except KeyError:
+            pass
+        self.assertEqual(methods, (
+            StonehengeState.make_move, StonehengeState.rough_outcome,
+            StonehengeState.get_possible_moves, TranspositionTable.get))
+
+    def test_iterative_minimax_counts(self):
+        """
+        Test that the counts of iterative_minimax on SubtractSquare match the
+        game tree: every node but the root is made by one make_move, and
+        every finished state is a leaf.
+        """
+        game = SubtractSquareGame(True, 5)
+        with collect(SubtractSquareState) as stats:
+            iterative_minimax(game)
+        # 5 -> 4 | 1; 4 -> 3 | 0; 3 -> 2 -> 1 -> 0; 1 -> 0
+        self.assertEqual(stats.nodes, 8)
+        self.assertEqual(stats.leaves, 3)
+        self.assertEqual(stats.max_depth, 5)
+        self.assertEqual(stats.branching, {2: 2, 1: 4})
+
+    def test_strategies_report(self):
+        """
+        Test that rough_outcome_strategy and recursive_minimax report into
+        the stats, and recursive_minimax's table lookups are counted.
+        """
+        game = StonehengeGame(True, '2')
+        with collect(StonehengeState) as stats:
+            rough_outcome_strategy(game)
+        self.assertEqual((stats.nodes, stats.leaves, stats.max_depth),
+                         (7, 7, 1))
+        with collect(StonehengeState) as stats:
+            recursive_minimax(game, TranspositionTable())
+        self.assertGreater(stats.cache_misses, stats.nodes / 2)
+        self.assertGreater(stats.timings['total'], 0.0)
+
+    def test_no_nested_collect(self):
+        """
+        Test that a collect() started inside another is refused, and leaves
+        the outer one counting and restoring the right methods.
+        """
+        make_move = SubtractSquareState.make_move
+        with collect(SubtractSquareState) as stats:
+            with self.assertRaises(RuntimeError):
+                with collect(SubtractSquareState):
+                    pass
+            SubtractSquareState(True, 5).make_move(1)
+        self.assertEqual(stats.nodes, 1)
+        self.assertEqual(SubtractSquareState.make_move, make_move)
+        with collect(SubtractSquareState) as stats:
+            pass
+        self.assertEqual(stats.nodes, 0)
+
+    def test_other_threads_not_counted(self):
+        """
+        Test that the work of other threads is not counted.
+        """
+        def search():
+            recursive_minimax(SubtractSquareGame(True, 20),
+                              TranspositionTable())
+        with collect(SubtractSquareState) as stats:
+            thread = Thread(target=search)
+            thread.start()
+            thread.join()
+            SubtractSquareState(True, 5).make_move(1)
+        self.assertEqual((stats.nodes, stats.cache_misses), (1, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
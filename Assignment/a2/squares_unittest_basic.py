@@ -0,0 +1,85 @@
+"""
+Unittests for the perfect square helpers of subtract_square_state on large
+totals, where float square roots are no longer exact enough.
+"""
+import unittest
+
+from subtract_square_state import SubtractSquareState, get_squares, \
+    is_pos_square, count_squares
+
+
+class SquaresUnitTests(unittest.TestCase):
+    def test_is_pos_square_near_a_million(self):
+        """
+        Test is_pos_square on the perfect squares near 10 ** 6 and their
+        neighbours.
+        """
+        for root in [998, 999, 1000, 1001]:
+            self.assertTrue(is_pos_square(root * root))
+            self.assertFalse(is_pos_square(root * root - 1))
+            self.assertFalse(is_pos_square(root * root + 1))
+        self.assertFalse(is_pos_square(999999))
+        self.assertFalse(is_pos_square(1000001))
+
+    def test_is_pos_square_edges(self):
+        """
+        Test is_pos_square on 0, negative numbers, and squares too large for
+        a float to hold exactly.
+        """
+        for n in [0, -1, -4]:
+            self.assertFalse(is_pos_square(n))
+        big = (10 ** 15 + 1) ** 2
+        self.assertTrue(is_pos_square(big))
+        self.assertFalse(is_pos_square(big - 1))
+        self.assertFalse(is_pos_square(big + 1))
+
+    def test_get_squares_near_a_million(self):
+        """
+        Test get_squares on the totals just below, at and just above 10 ** 6.
+        """
+        below, at, above = [get_squares(total)
+                            for total in [999999, 10 ** 6, 1000001]]
+        self.assertEqual(len(below), 999)
+        self.assertEqual(below[-1], 999 ** 2)
+        self.assertEqual(at, below + [10 ** 6])
+        self.assertEqual(above, at)
+        self.assertEqual(len(get_squares(1002000)), 1000)
+        self.assertEqual(get_squares(1002001)[-1], 1001 ** 2)
+
+    def test_get_squares_agrees_with_is_pos_square(self):
+        """
+        Test that get_squares, asked for totals in any order, returns exactly
+        the numbers up to total that is_pos_square accepts.
+        """
+        for total in [1002001, 10, 998001, 0, 998000]:
+            self.assertEqual(get_squares(total), [
+                n * n for n in range(1, 1002) if n * n <= total])
+        squares = set(get_squares(1002001))
+        for n in range(996000, 1002002):
+            self.assertEqual(is_pos_square(n), n in squares)
+
+    def test_moves_of_large_totals(self):
+        """
+        Test that the moves of a state with a large total are its squares,
+        whether generated as a list or one at a time.
+        """
+        state = SubtractSquareState(True, 10 ** 6)
+        self.assertEqual(state.get_possible_moves(), get_squares(10 ** 6))
+        self.assertEqual(list(state.iter_moves()), get_squares(10 ** 6))
+        self.assertEqual(state.get_possible_moves()[-1], 10 ** 6)
+        self.assertEqual([count_squares(total) for total in
+                          [999999, 10 ** 6, 1000001]], [999, 1000, 1000])
+
+    def test_iter_moves_while_table_grows(self):
+        """
+        Test that moves being generated stop at the total of their state
+        even if the shared table grows in the meantime.
+        """
+        moves = SubtractSquareState(True, 50).iter_moves()
+        first = next(moves)
+        count_squares(10 ** 7)
+        self.assertEqual([first] + list(moves), [1, 4, 9, 16, 25, 36, 49])
+
+
+if __name__ == "__main__":
+    unittest.main()
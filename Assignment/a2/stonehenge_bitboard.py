@@ -0,0 +1,488 @@
+"""
+A stonehenge_bitboard module: a StonehengeState backend that stores the board
+as integer bitmasks instead of a Grid of Cells.
+"""
+from typing import Any, Iterator
+from game_state import GameState
+from grid import get_incidence, get_mirror
+from stonehenge_state import get_board_values, render_board
+
+
+class Layout:
+    """
+    The precomputed geometry of a stonehenge board of one side-length.
+
+    letters - the letters of the cells, in order
+    index - the position of each letter in letters
+    masks - the bitmask of the cells of each ley-line; the leylines, then the
+            left diagonals, then the right diagonals
+    lengths - the number of cells in each ley-line
+    incidence - the indices of the ley-lines through each cell
+    reflections - the index of the mirror image of each cell, and then of
+                  each ley-line
+    mirrors - the tables mirror_bits reflects cell bitmasks by, and then
+              those it reflects ley-line bitmasks by
+    """
+    letters: 'list[str]'
+    index: dict
+    masks: 'list[int]'
+    lengths: 'list[int]'
+    incidence: 'list[list[int]]'
+    reflections: tuple
+    mirrors: tuple
+
+    def __init__(self, size: int) -> None:
+        """
+        Initialize the layout of a stonehenge board of side-length size.
+
+        >>> layout = Layout(1)
+        >>> layout.letters
+        ['A', 'B', 'C']
+        >>> [bin(mask) for mask in layout.masks]
+        ['0b11', '0b100', '0b1', '0b110', '0b10', '0b101']
+        >>> layout.incidence[2]
+        [1, 3, 5]
+        """
+        self.index, members, self.incidence = get_incidence(size)
+        self.letters = sorted(self.index, key=self.index.get)
+        self.masks = [sum(1 << n for n in cells) for cells in members]
+        self.lengths = [len(cells) for cells in members]
+        cells, lines, _ = get_mirror(size)
+        self.reflections = cells, lines
+        self.mirrors = mirror_tables(cells), mirror_tables(lines)
+
+
+def mirror_tables(positions: list) -> list:
+    """
+    Return, for each byte of a bitmask over len(positions) bits, the table
+    of the bits that each value of that byte is moved to when bit n of the
+    bitmask is moved to bit positions[n].
+
+    >>> mirror_tables([1, 0, 2])[0][0b011], mirror_tables([1, 0, 2])[0][0b101]
+    (3, 6)
+    """
+    tables = []
+    for start in range(0, len(positions), 8):
+        table = [0] * 256
+        for value in range(1, 256):
+            low = value & -value
+            n = start + low.bit_length() - 1
+            table[value] = table[value ^ low] | \
+                (1 << positions[n] if n < len(positions) else 0)
+        tables.append(table)
+    return tables
+
+
+def mirror_bits(mask: int, tables: list) -> int:
+    """
+    Return mask with its bits moved as given by tables, a result of
+    mirror_tables.
+
+    >>> mirror_bits(0b001, mirror_tables([1, 0, 2]))
+    2
+    """
+    mirror = 0
+    for table in tables:
+        mirror |= table[mask & 255]
+        mask >>= 8
+    return mirror
+
+
+_LAYOUTS = {}
+
+
+def get_layout(size: int) -> Layout:
+    """
+    Return the Layout of a stonehenge board of side-length size, computing it
+    only the first time it is needed.
+
+    >>> get_layout(2) is get_layout(2)
+    True
+    """
+    if size not in _LAYOUTS:
+        _LAYOUTS[size] = Layout(size)
+    return _LAYOUTS[size]
+
+
+def count_bits(n: int) -> int:
+    """
+    Return the number of bits set in n.
+
+    >>> count_bits(0b1011)
+    3
+    """
+    return bin(n).count('1')
+
+
+class BitboardStonehengeState(GameState):
+    """
+    The state of stonehenge game at a certain point of time, with the board
+    stored as bitmasks.
+
+    size - the side-length of the stonehenge
+    cells - the bitmasks of the cells claimed by p1 and by p2
+    lines - the bitmasks of the ley-lines claimed by p1 and by p2
+    p1 - the number of ley-lines claimed by p1
+    p2 - the number of ley-lines claimed by p2
+    mirror - the bitmasks of cells and then of lines of the mirror image of
+             this state
+    """
+    size: int
+    cells: tuple
+    lines: tuple
+    p1: int
+    p2: int
+    mirror: tuple
+
+    def __init__(self, is_p1_turn: bool, size: int, cells: tuple = (0, 0),
+                 lines: tuple = (0, 0), mirror: tuple = None) -> None:
+        """
+        Initialize a stonehenge state and set the current player based on
+        is_p1_turn. The bitmasks of its mirror image are worked out if
+        mirror is not given.
+
+        Extends GameState.__init__
+
+        >>> state = BitboardStonehengeState(True, 1)
+        >>> state.cells, state.lines, state.p1
+        ((0, 0), (0, 0), 0)
+        >>> BitboardStonehengeState(True, 1, (0b001, 0), (0b101, 0)).mirror
+        (2, 0, 17, 0)
+        """
+        GameState.__init__(self, is_p1_turn)
+        self.size, self.cells, self.lines = size, cells, lines
+        self.p1, self.p2 = count_bits(lines[0]), count_bits(lines[1])
+        if mirror is None:
+            cell_tables, line_tables = get_layout(size).mirrors
+            mirror = tuple([mirror_bits(mask, cell_tables) for mask in cells] +
+                           [mirror_bits(mask, line_tables) for mask in lines])
+        self.mirror = mirror
+
+    def __str__(self) -> str:
+        """
+        Return a string representation of the current state of the game.
+
+        Overrides GameState.__str__
+
+        >>> from stonehenge_state import StonehengeState
+        >>> str(BitboardStonehengeState(True, 2).make_move('A')) == \
+        str(StonehengeState(True, 2).make_move('A'))
+        True
+        """
+        layout = get_layout(self.size)
+        return render_board(
+            self.size, [str(self.get_owner(1 << n) or letter)
+                        for n, letter in enumerate(layout.letters)],
+            [str(self.get_owner(1 << i, self.lines) or '@')
+             for i in range(len(layout.masks))])
+
+    def get_template(self) -> dict:
+        """
+        Return a dictionary that templates the string representation of
+        BitboardStonehengeState (see stonehenge_state.get_board_values).
+
+        >>> state = BitboardStonehengeState(True, 1)
+        >>> state.get_template() == {'ley1': '@', 'l1': '@', 'r1': '@', \
+        'ley2': '@', 'l2': '@', 'r2': '@', 'A': 'A', 'B': 'B', 'C': 'C'}
+        True
+        """
+        layout = get_layout(self.size)
+        return get_board_values(
+            self.size, [str(self.get_owner(1 << n) or letter)
+                        for n, letter in enumerate(layout.letters)],
+            [str(self.get_owner(1 << i, self.lines) or '@')
+             for i in range(len(layout.masks))])
+
+    def __repr__(self) -> Any:
+        """
+        Return a representation of this state (which can be used for
+        equality testing).
+
+        Overrides GameState.__repr__
+
+        >>> print(repr(BitboardStonehengeState(True, 1).make_move('B')))
+        Current player: p2
+        Cells: A-0, B-1, C-0
+        p1_score: 3, p2_score: 0
+        """
+        temp_1 = 'Current player: {}\n'.format(self.get_current_player_name())
+        temp_2 = 'Cells: ' + ', '.join(
+            ['{}-{}'.format(letter, self.get_owner(1 << n)) for n, letter in
+             enumerate(get_layout(self.size).letters)]) + '\n'
+        temp_3 = 'p1_score: {}, p2_score: {}'.format(self.p1, self.p2)
+        return temp_1 + temp_2 + temp_3
+
+    def __eq__(self, other: Any) -> bool:
+        """
+        Return whether self and other is equivalent.
+
+        >>> a = BitboardStonehengeState(True, 2).make_move('A').make_move('G')
+        >>> b = BitboardStonehengeState(True, 2).make_move('A').make_move('G')
+        >>> a == b
+        True
+        """
+        return type(self) == type(other) and self.size == other.size and \
+            self.p1_turn == other.p1_turn and self.cells == other.cells and \
+            self.lines == other.lines
+
+    def __hash__(self) -> int:
+        """
+        Return a hash of this state, consistent with __eq__.
+        """
+        return hash((self.size, self.p1_turn, self.cells, self.lines))
+
+    def __getstate__(self) -> tuple:
+        """
+        Return a compact picklable form of this state.
+
+        >>> BitboardStonehengeState(True, 1).make_move('C').__getstate__()
+        (False, 1, (4, 0), (42, 0))
+        """
+        return self.p1_turn, self.size, self.cells, self.lines
+
+    def __setstate__(self, state: tuple) -> None:
+        """
+        Restore this state from the form returned by __getstate__.
+
+        >>> import pickle
+        >>> state = BitboardStonehengeState(True, 2).make_move('D')
+        >>> pickle.loads(pickle.dumps(state)) == state
+        True
+        """
+        BitboardStonehengeState.__init__(self, *state)
+
+    def get_owner(self, bit: int, masks: tuple = None) -> int:
+        """
+        Return 1 or 2 if the cell (or, if masks is self.lines, the ley-line)
+        at bit is claimed by that player, and 0 otherwise.
+
+        >>> state = BitboardStonehengeState(False, 1).make_move('C')
+        >>> state.get_owner(0b100), state.get_owner(0b1)
+        (2, 0)
+        """
+        masks = self.cells if masks is None else masks
+        if masks[0] & bit:
+            return 1
+        return 2 if masks[1] & bit else 0
+
+    def get_line_claims(self) -> list:
+        """
+        Return, for every ley-line, a tuple of the player owning it (0 if
+        nobody does), the number of its cells claimed by p1 and by p2, and
+        its number of cells.
+
+        >>> state = BitboardStonehengeState(True, 1).make_move('B')
+        >>> state.get_line_claims()[:3]
+        [(1, 1, 0, 2), (0, 0, 0, 1), (0, 0, 0, 1)]
+        """
+        layout = get_layout(self.size)
+        return [(self.get_owner(1 << i, self.lines),
+                 count_bits(self.cells[0] & mask),
+                 count_bits(self.cells[1] & mask), layout.lengths[i])
+                for i, mask in enumerate(layout.masks)]
+
+    def get_symmetry_key(self) -> tuple:
+        """
+        Return a pair (key, mirrored): key is the same for this state and
+        its mirror image, and differs for every other position, and mirrored
+        is whether key was taken from the mirror image.
+
+        The bitmasks of the mirror image are kept up to date by make_move,
+        so the key is cheap enough to take at every node of a search.
+
+        See StonehengeState.get_symmetry_key
+
+        >>> state = BitboardStonehengeState(True, 2)
+        >>> a, b = state.make_move('A'), state.make_move('B')
+        >>> a.get_symmetry_key()[0] == b.get_symmetry_key()[0]
+        True
+        >>> a.get_symmetry_key()[1] != b.get_symmetry_key()[1]
+        True
+        """
+        plain, mirror = self.cells + self.lines, self.mirror
+        return (self.p1_turn, min(plain, mirror)), mirror < plain
+
+    def mirror_move(self, move: Any) -> Any:
+        """
+        Return the move of the mirror image of this state that matches move.
+
+        >>> BitboardStonehengeState(True, 2).mirror_move('A')
+        'B'
+        """
+        return get_mirror(self.size)[2][move]
+
+    def is_finished(self) -> bool:
+        """
+        Return whether a player has captured at least half of the ley-lines.
+
+        >>> BitboardStonehengeState(True, 1).make_move('A').is_finished()
+        True
+        """
+        return max(self.p1, self.p2) * 2 >= (self.size + 1) * 3
+
+    def get_possible_moves(self) -> list:
+        """
+        Return all possible moves that can be applied to this state.
+
+        Overrides GameState.get_possible_moves()
+
+        >>> BitboardStonehengeState(True, 1).make_move('B').get_possible_moves()
+        []
+        >>> BitboardStonehengeState(True, 2).make_move('B').get_possible_moves()
+        ['A', 'C', 'D', 'E', 'F', 'G']
+        """
+        if self.is_finished():
+            return []
+        taken = self.cells[0] | self.cells[1]
+        return [letter for n, letter in enumerate(get_layout(self.size).letters)
+                if not taken >> n & 1]
+
+    def iter_moves(self) -> Iterator:
+        """
+        Yield the letters of the free cells, lowest bit first, finding each
+        one from the lowest bit of the free cells left rather than testing
+        every cell.
+
+        Overrides GameState.iter_moves()
+
+        >>> list(BitboardStonehengeState(True, 1).make_move('B').iter_moves())
+        []
+        >>> next(BitboardStonehengeState(True, 2).make_move('A').iter_moves())
+        'B'
+        """
+        if self.is_finished():
+            return
+        letters = get_layout(self.size).letters
+        free = ~(self.cells[0] | self.cells[1]) & ((1 << len(letters)) - 1)
+        while free:
+            low = free & -free
+            yield letters[low.bit_length() - 1]
+            free ^= low
+
+    def make_move(self, move: Any) -> 'BitboardStonehengeState':
+        """
+        Return the BitboardStonehengeState that results from applying move to
+        this state.
+
+        As with StonehengeState, a move that is not a free cell claims
+        nothing, and only passes the turn.
+
+        Overrides GameState.make_move()
+
+        >>> state = BitboardStonehengeState(True, 1).make_move('A')
+        >>> state.p1_turn, state.p1, state.p2
+        (False, 3, 0)
+        >>> state = BitboardStonehengeState(True, 2).make_move('A')
+        >>> again = state.make_move('A')
+        >>> again.p1_turn, again.cells == state.cells
+        (True, True)
+        """
+        layout = get_layout(self.size)
+        n = layout.index.get(move)
+        player = 0 if self.p1_turn else 1
+        if n is None or (self.cells[0] | self.cells[1]) >> n & 1:
+            return BitboardStonehengeState(not self.p1_turn, self.size,
+                                           self.cells, self.lines,
+                                           self.mirror)
+        cells, lines = list(self.cells), list(self.lines)
+        mirror, reflections = list(self.mirror), layout.reflections
+        cells[player] |= 1 << n
+        mirror[player] |= 1 << reflections[0][n]
+        claimed = lines[0] | lines[1]
+        for line in layout.incidence[n]:
+            if not claimed >> line & 1 and count_bits(
+                    cells[player] & layout.masks[line]) * 2 >= \
+                    layout.lengths[line]:
+                lines[player] |= 1 << line
+                mirror[2 + player] |= 1 << reflections[1][line]
+        return BitboardStonehengeState(not self.p1_turn, self.size,
+                                       tuple(cells), tuple(lines),
+                                       tuple(mirror))
+
+    def count_captures(self, n: int, player: int) -> int:
+        """
+        Return how many ley-lines player (0 for p1, 1 for p2) would capture
+        by claiming the free cell at index n.
+
+        >>> BitboardStonehengeState(True, 2).count_captures(0, 0)
+        2
+        """
+        layout = get_layout(self.size)
+        claimed = self.lines[0] | self.lines[1]
+        return sum(1 for line in layout.incidence[n] if not claimed >> line & 1
+                   and (count_bits(self.cells[player] & layout.masks[line])
+                        + 1) * 2 >= layout.lengths[line])
+
+    def rough_outcome(self) -> float:
+        """
+        Return an estimate in interval [LOSE, WIN] of best outcome the current
+        player can guarantee from state self.
+
+        Overrides GameState.rough_outcome()
+
+        >>> state = BitboardStonehengeState(True, 1)
+        >>> state.rough_outcome()
+        1
+        >>> state.make_move('A').rough_outcome()
+        -1
+        >>> BitboardStonehengeState(True, 3).rough_outcome()
+        0
+        """
+        if self.is_finished():
+            return 1 if self.get_winner() == self.get_current_player_name() \
+                else -1
+        player = 0 if self.p1_turn else 1
+        needed = (self.size + 1) * 3
+        scores = (self.p1, self.p2)
+        taken = self.cells[0] | self.cells[1]
+        free = [n for n in range(len(get_layout(self.size).letters))
+                if not taken >> n & 1]
+        if any((scores[player] + self.count_captures(n, player)) * 2 >=
+               needed for n in free):
+            return 1
+        for n in free:
+            new_state = self.make_move(get_layout(self.size).letters[n])
+            if not any((scores[1 - player] +
+                        new_state.count_captures(m, 1 - player)) * 2 >= needed
+                       for m in free if m != n):
+                return 0
+        return -1
+
+    def get_winner(self) -> str:
+        """
+        Return a string of the player which is the winner of the game.
+
+        >>> BitboardStonehengeState(False, 1).make_move('A').get_winner()
+        'p2'
+        """
+        return 'p1' if self.p1 * 2 >= (self.size + 1) * 3 else 'p2'
+
+
+def from_state(state: Any) -> BitboardStonehengeState:
+    """
+    Return the BitboardStonehengeState equivalent to the StonehengeState
+    state.
+
+    >>> from stonehenge_state import StonehengeState
+    >>> state = StonehengeState(True, 2).make_move('A').make_move('G')
+    >>> repr(from_state(state)) == repr(state)
+    True
+    """
+    cells, lines = [0, 0], [0, 0]
+    for n, cell in enumerate(state.grid.cells):
+        if cell.player:
+            cells[cell.player - 1] |= 1 << n
+    for n, line in enumerate(state.grid.leylines + state.grid.lefts +
+                             state.grid.rights):
+        if line.player != '@':
+            lines[line.player - 1] |= 1 << n
+    return BitboardStonehengeState(state.p1_turn, state.size, tuple(cells),
+                                   tuple(lines))
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
+
+    from doctest import testmod
+    testmod()
@@ -0,0 +1,93 @@
+"""
+Unittests checking that BitboardStonehengeState behaves exactly like
+StonehengeState.
+
+Both backends play the same random games, and after every move the string
+representation, the repr, the scores, the possible moves and the rough outcome
+must agree.
+"""
+import random
+import unittest
+
+from stonehenge_game import StonehengeGame
+from stonehenge_state import StonehengeState
+from stonehenge_bitboard import BitboardStonehengeState, from_state
+from strategy import recursive_minimax
+
+
+class BitboardStonehengeUnitTests(unittest.TestCase):
+    def assertSameState(self, grid_state, bit_state):
+        """
+        Assert that grid_state and bit_state represent the same position.
+        """
+        self.assertEqual(str(grid_state), str(bit_state))
+        self.assertEqual(repr(grid_state), repr(bit_state))
+        self.assertEqual((grid_state.p1, grid_state.p2),
+                         (bit_state.p1, bit_state.p2))
+        self.assertEqual(grid_state.get_possible_moves(),
+                         bit_state.get_possible_moves())
+        self.assertEqual(grid_state.rough_outcome(), bit_state.rough_outcome())
+
+    def test_random_games(self):
+        """
+        Test that both backends agree on every state of random games of
+        side-lengths 1 to 7, including boards with more than 26 cells.
+        """
+        rnd = random.Random(148)
+        for size in range(1, 8):
+            for _ in range(4):
+                p1_starts = rnd.random() < 0.5
+                grid_state = StonehengeState(p1_starts, size)
+                bit_state = BitboardStonehengeState(p1_starts, size)
+                self.assertSameState(grid_state, bit_state)
+                while grid_state.get_possible_moves():
+                    move = rnd.choice(grid_state.get_possible_moves())
+                    grid_state = grid_state.make_move(move)
+                    bit_state = bit_state.make_move(move)
+                    self.assertSameState(grid_state, bit_state)
+                    self.assertEqual(from_state(grid_state), bit_state)
+
+    def test_illegal_moves(self):
+        """
+        Test that both backends treat claiming a claimed cell, or a cell
+        that does not exist, as passing the turn without claiming anything.
+        """
+        for moves in [['A', 'A'], ['A', 'B', 'A', 'C'], ['ZZ', 'A'],
+                      ['B', 3, 'B', 'D']]:
+            grid_state = StonehengeState(True, 2)
+            bit_state = BitboardStonehengeState(True, 2)
+            for move in moves:
+                grid_state = grid_state.make_move(move)
+                bit_state = bit_state.make_move(move)
+                self.assertSameState(grid_state, bit_state)
+                self.assertEqual(grid_state.p1_turn, bit_state.p1_turn)
+                self.assertEqual(from_state(grid_state), bit_state)
+
+    def test_game_is_over_and_winner(self):
+        """
+        Test that StonehengeGame works with BitboardStonehengeState states.
+        """
+        game = StonehengeGame(False, '1', BitboardStonehengeState)
+        self.assertFalse(game.is_over(game.current_state))
+        game.current_state = game.current_state.make_move('A')
+        self.assertTrue(game.is_over(game.current_state))
+        self.assertTrue(game.is_winner('p2'))
+        self.assertFalse(game.is_winner('p1'))
+
+    def test_minimax_same_move(self):
+        """
+        Test that minimax picks the same move on both backends.
+        """
+        for moves in [[], ['A'], ['D', 'A'], ['G', 'C', 'B']]:
+            grid_game = StonehengeGame(True, '2')
+            bit_game = StonehengeGame(True, '2', BitboardStonehengeState)
+            for move in moves:
+                grid_game.current_state = grid_game.current_state.make_move(
+                    move)
+                bit_game.current_state = bit_game.current_state.make_move(move)
+            self.assertEqual(recursive_minimax(grid_game),
+                             recursive_minimax(bit_game))
+
+
+if __name__ == "__main__":
+    unittest.main()
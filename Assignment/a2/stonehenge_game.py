@@ -18,22 +18,27 @@ class StonehengeGame(Game):
         'ley-lines is the winner.\nA ley-line, once claimed, cannot be taken ' \
         'by the other player.'
 
-    def __init__(self, p1_starts: bool, side: str = None
-                 ) -> None:
+    def __init__(self, p1_starts: bool, side: str = None,
+                 state_class: type = StonehengeState) -> None:
         """
-        Initialize a stonehenge game.
+        Initialize a stonehenge game, whose states are instances of
+        state_class (StonehengeState or BitboardStonehengeState).
 
         Overrides Game.__init__
 
         >>> game = StonehengeGame(True, '1')
         >>> repr(game.current_state) == repr(StonehengeState(True, 1))
         True
+        >>> from stonehenge_bitboard import BitboardStonehengeState
+        >>> game = StonehengeGame(True, '1', BitboardStonehengeState)
+        >>> repr(game.current_state) == repr(StonehengeState(True, 1))
+        True
         """
         self.side = input('Enter a size for the stonehenge:') \
             if not side else side
         while not self.side.isdigit():
             self.side = input('Enter a size for the stonehenge:')
-        self.current_state = StonehengeState(p1_starts, int(self.side))
+        self.current_state = state_class(p1_starts, int(self.side))
 
     def get_instructions(self) -> str:
         """
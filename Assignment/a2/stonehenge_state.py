@@ -1,9 +1,195 @@
 """
 A stonehenge_state module
 """
-from typing import Any
+from string import Formatter
+from typing import Any, Iterator
 from game_state import GameState
-from grid import Grid
+from grid import Grid, cell_name, get_geometry, get_incidence, \
+    get_mirror, get_zobrist_keys
+
+_BOARD_TEMPLATES = {}
+
+
+def get_board_template(size: int) -> str:
+    """
+    Return the string template of the stonehenge board of side-length size,
+    which get_board_layout splits into the pieces render_board fills in.
+
+    The template is drawn from the geometry of grid.get_geometry the first
+    time it is needed for each size. Every cell and ley-line marker is
+    centred in a field as wide as the longest cell name, so boards with more
+    than 26 cells keep their shape.
+
+    >>> print(get_board_template(1))
+          {l1}   {l2}
+         /   /
+    {ley1} - {A} - {B}
+         \\ / \\
+      {ley2} - {C}   {r1}
+           \\
+            {r2}
+    >>> get_board_template(6).splitlines()[-3].split()[:4]
+    ['{ley7:^2}', '----', '{AB:^2}', '----']
+    """
+    if size not in _BOARD_TEMPLATES:
+        rows, positions, lefts, rights = get_geometry(size)
+        width = len(cell_name(len(positions) - 1))
+        # Half the distance between neighbouring cells, even so that the
+        # connectors between two rows fall exactly between their cells.
+        step = -(-(width + 3) // 2)
+        step += step % 2
+        fields, links = {}, {}
+        for r, row in enumerate(rows):
+            x = positions[row[0]][1] - 2
+            fields.setdefault(2 * r + 2, []).append(
+                (x, 'ley{}'.format(r + 1), True))
+            for n in row:
+                fields[2 * r + 2].append((positions[n][1], cell_name(n), True))
+        for family, diagonals, char in [('l', lefts, '/'),
+                                        ('r', rights, '\\')]:
+            for k, diagonal in enumerate(diagonals):
+                r, x = positions[diagonal[0] if family == 'l'
+                                 else diagonal[-1]]
+                line = 2 * r if family == 'l' else 2 * r + 4
+                fields.setdefault(line, []).append(
+                    (x + 1, '{}{}'.format(family, k + 1), False))
+                cells = [(2 * positions[n][0] + 2, positions[n][1])
+                         for n in diagonal]
+                ends = [(line, x + 1)] + cells if family == 'l' else \
+                    cells + [(line, x + 1)]
+                for (top, x_1), (_, x_2) in zip(ends, ends[1:]):
+                    links.setdefault(top + 1, []).append((x_1 + x_2, char))
+        lines = []
+        for line in range(max(fields) + 1):
+            if line in fields:
+                lines.append(draw_fields(sorted(fields[line]), width, step))
+            else:
+                chars = [' '] * (max(x for x, _ in links[line]) * step // 2 +
+                                 width)
+                for x, char in links[line]:
+                    chars[x * step // 2 + (width - 1) // 2] = char
+                lines.append(''.join(chars).rstrip())
+        _BOARD_TEMPLATES[size] = '\n'.join(lines)
+    return _BOARD_TEMPLATES[size]
+
+
+_BOARD_LAYOUTS = {}
+
+
+def get_board_layout(size: int) -> tuple:
+    """
+    Return a tuple (parts, fields) precompiled from the template of the
+    stonehenge board of side-length size: parts is the literal text before,
+    between and after the fields, and fields gives, for each field in order,
+    whether it marks a ley-line, the position of its cell in Grid.cells (or
+    of its ley-line in Grid.lines), and its format spec.
+
+    The tuple is built only the first time it is needed for each size.
+
+    >>> parts, fields = get_board_layout(1)
+    >>> parts[:2], fields[:3]
+    (['      ', '   '], [(True, 2, ''), (True, 3, ''), (True, 0, '')])
+    >>> len(parts) == len(fields) + 1
+    True
+    """
+    if size not in _BOARD_LAYOUTS:
+        index = get_incidence(size)[0]
+        parts, fields = [], []
+        for text, name, spec, _ in Formatter().parse(get_board_template(size)):
+            parts.append(text)
+            if name is None:
+                continue
+            if name in index:
+                fields.append((False, index[name], spec))
+            else:
+                family = name.rstrip('0123456789')
+                fields.append((True, ['ley', 'l', 'r'].index(family) *
+                               (size + 1) + int(name[len(family):]) - 1, spec))
+        if len(parts) == len(fields):
+            parts.append('')
+        _BOARD_LAYOUTS[size] = (parts, fields)
+    return _BOARD_LAYOUTS[size]
+
+
+def render_board(size: int, cells: list, lines: list) -> str:
+    """
+    Return the stonehenge board of side-length size showing cells and lines,
+    the strings for each cell in the order of Grid.cells and each ley-line
+    in the order of Grid.lines.
+
+    >>> print(render_board(1, ['A', '1', 'C'], ['1', '@', '@', '1', '1', '@']))
+          @   1
+         /   /
+    1 - A - 1
+         \\ / \\
+      @ - C   1
+           \\
+            @
+    """
+    parts, fields = get_board_layout(size)
+    pieces = [parts[0]]
+    for (is_line, i, spec), text in zip(fields, parts[1:]):
+        pieces.append(format(lines[i] if is_line else cells[i], spec))
+        pieces.append(text)
+    return ''.join(pieces)
+
+
+def get_board_values(size: int, cells: list, lines: list) -> dict:
+    """
+    Return a dictionary mapping each field of the template of the board of
+    side-length size to what render_board would fill it in with, given the
+    same cells and lines.
+
+    >>> values = get_board_values(1, ['A', '1', 'C'],
+    ...                           ['1', '@', '@', '1', '1', '@'])
+    >>> values['l2'], values['B'], values['ley2'], len(values)
+    ('1', '1', '@', 9)
+    """
+    names = [name for _, name, _, _ in
+             Formatter().parse(get_board_template(size)) if name is not None]
+    return {name: lines[i] if is_line else cells[i]
+            for name, (is_line, i, _) in zip(names, get_board_layout(size)[1])}
+
+
+def draw_fields(fields: list, width: int, step: int) -> str:
+    """
+    Return one line of a board template holding fields, a list of (column,
+    name, in_row) triples sorted by column, where neighbouring fields that are
+    both in_row (the cells of a leyline and its marker) are joined by dashes.
+
+    >>> draw_fields([(0, 'ley1', True), (2, 'A', True), (4, 'r1', False)], \
+1, 2)
+    '{ley1} - {A}   {r1}'
+    """
+    text, end, joined = '', 0, False
+    for x, name, in_row in fields:
+        gap = x * step - end
+        if joined and in_row:
+            text += ' - ' if gap == 3 else ' ' + '-' * (gap - 2) + ' '
+        else:
+            text += ' ' * gap
+        text += '{' + name + ('}' if width == 1 else ':^{}}}'.format(width))
+        end, joined = x * step + width, in_row
+    return text
+
+
+def symmetry_key(p1_turn: bool, owners: list, cells: list,
+                 lines: list) -> tuple:
+    """
+    Return the (key, mirrored) pair of get_symmetry_key for a position where
+    it is p1's turn if p1_turn, and owners holds the owner (0, 1 or 2) of
+    each cell and then of each ley-line, given the mirror positions cells
+    and lines of grid.get_mirror.
+
+    >>> symmetry_key(True, [1, 0, 0, 1, 0, 1, 0, 0, 1], [1, 0, 2],
+    ...              [0, 1, 4, 5, 2, 3])
+    ((True, (0, 1, 0, 1, 0, 0, 1, 1, 0)), True)
+    """
+    count = len(cells)
+    plain = tuple(owners)
+    mirror = tuple([owners[n] for n in cells] +
+                   [owners[count + i] for i in lines])
+    return (p1_turn, min(plain, mirror)), mirror < plain
 
 
 class StonehengeState(GameState):
@@ -13,6 +199,11 @@ class StonehengeState(GameState):
     is_p1_turn - whether it's the turn for p1
     size - the side-length of the stonehenge
     grid - a grid for stonehenge game
+
+    States hash and compare by a 64-bit Zobrist hash of the current player,
+    the claimed cells and the claimed ley-lines, which make_move updates
+    incrementally. The string and repr of a state are built the first time
+    they are asked for and kept, as a state does not change once made.
     """
     is_p1_turn: bool
     size: int
@@ -37,85 +228,47 @@ class StonehengeState(GameState):
         GameState.__init__(self, is_p1_turn)
         self.grid = Grid(size) if not grid else grid
         self.p1, self.p2, self.size = 0, 0, size
+        self._zobrist, self._str, self._repr = None, None, None
 
     def __str__(self) -> str:
         """
         Return a string representation of the current state of the game.
 
+        It is rendered once, from the precompiled board of this size, and
+        kept for later calls.
+
         Overrides GameState.__str__
 
         >>> state = StonehengeState(True, 1)
         >>> str(state) == StonehengeState.CHECK_FOR_STR
         True
+        >>> str(state) is str(state)
+        True
         """
-        template = self.get_template()
-        size_1 = """\
-      {l1}   {l2}
-     /   /
-{ley1} - {A} - {B}
-     \\ / \\
-  {ley2} - {C}   {r1}
-       \\
-        {r2}"""
-        size_2 = """\
-        {l1}   {l2}
-       /   /
-  {ley1} - {A} - {B}   {l3}
-     / \\ / \\ /
-{ley2} - {C} - {D} - {E}
-     \\ / \\ / \\
-  {ley3} - {F} - {G}   {r1}
-       \\   \\
-        {r3}   {r2}"""
-        size_3 = """\
-          {l1}   {l2}
-         /   /
-    {ley1} - {A} - {B}   {l3}
-       / \\ / \\ /
-  {ley2} - {C} - {D} - {E}   {l4}
-     / \\ / \\ / \\ /
-{ley3} - {F} - {G} - {H} - {I}
-     \\ / \\ / \\ / \\
-  {ley4} - {J} - {K} - {L}   {r1}
-       \\   \\   \\
-        {r4}   {r3}   {r2}"""
-        size_4 = """\
-            {l1}   {l2}
-           /   /
-      {ley1} - {A} - {B}   {l3}
-         / \\ / \\ /
-    {ley2} - {C} - {D} - {E}   {l4}
-       / \\ / \\ / \\ /
-  {ley3} - {F} - {G} - {H} - {I}   {l5}
-     / \\ / \\ / \\ / \\ /
-{ley4} - {J} - {K} - {L} - {M} - {N}
-     \\ / \\ / \\ / \\ / \\
-  {ley5} - {O} - {P} - {Q} - {R}   {r1}
-       \\   \\   \\   \\
-        {r5}   {r4}   {r3}   {r2}"""
-        size_5 = """\
-              {l1}   {l2}
-             /   /
-        {ley1} - {A} - {B}   {l3}
-           / \\ / \\ /
-      {ley2} - {C} - {D} - {E}   {l4}
-         / \\ / \\ / \\ /
-    {ley3} - {F} - {G} - {H} - {I}   {l5}
-       / \\ / \\ / \\ / \\ /
-  {ley4} - {J} - {K} - {L} - {M} - {N}   {l6}
-     / \\ / \\ / \\ / \\ / \\ /
-{ley5} - {O} - {P} - {Q} - {R} - {S} - {T}
-     \\ / \\ / \\ / \\ / \\ / \\
-  {ley6} - {U} - {V} - {W} - {X} - {Y}   {r1}
-       \\   \\   \\   \\   \\
-        {r6}   {r5}   {r4}   {r3}   {r2}"""
-        size = {1: size_1, 2: size_2, 3: size_3, 4: size_4, 5: size_5}
-        return size[self.size].format(**template)
+        if self._str is None:
+            self._str = render_board(
+                self.size, [str(cell) for cell in self.grid.cells],
+                [str(line.player) for line in self.grid.lines])
+        return self._str
+
+    def get_template(self) -> dict:
+        """
+        Return a dictionary that templates the string representation of
+        StonehengeState (see get_board_values).
+
+        >>> state = StonehengeState(True, 1)
+        >>> state.get_template() == {'ley1': '@', 'l1': '@', 'r1': '@', \
+        'ley2': '@', 'l2': '@', 'r2': '@', 'A': 'A', 'B': 'B', 'C': 'C'}
+        True
+        """
+        return get_board_values(
+            self.size, [str(cell) for cell in self.grid.cells],
+            [str(line.player) for line in self.grid.lines])
 
     def __repr__(self) -> Any:
         """
-        Return a representation of this state (which can be used for
-        equality testing).
+        Return a representation of this state, built once and kept for
+        later calls.
 
         Overrides GameState.__repr__
 
@@ -125,43 +278,93 @@ class StonehengeState(GameState):
         Cells: A-0, B-0, C-0
         p1_score: 0, p2_score: 0
         """
-        temp_1 = 'Current player: {}\n'.format(self.get_current_player_name())
-        temp_2 = 'Cells: ' + ', '.join(['{}-{}'.format(n.letter, n.player) for
-                                        n in self.grid.cells]) + '\n'
-        temp_3 = 'p1_score: {}, p2_score: {}'.format(self.p1, self.p2)
-        return temp_1 + temp_2 + temp_3
+        if self._repr is None:
+            temp_1 = 'Current player: {}\n'.format(
+                self.get_current_player_name())
+            temp_2 = 'Cells: ' + ', '.join(['{}-{}'.format(n.letter, n.player)
+                                            for n in self.grid.cells]) + '\n'
+            temp_3 = 'p1_score: {}, p2_score: {}'.format(self.p1, self.p2)
+            self._repr = temp_1 + temp_2 + temp_3
+        return self._repr
 
     def __eq__(self, other: Any) -> bool:
         """
         Return whether self and other is equivalent.
 
+        The Zobrist hashes are compared first, and the owners of every cell
+        and ley-line only when they match, so a collision of the hashes
+        cannot make two different positions equal.
+
         >>> a = StonehengeState(True, 1)
         >>> b = StonehengeState(True, 1)
         >>> a == b
         True
+        >>> a == b.make_move('A')
+        False
         """
-        return type(self) == type(other) and repr(self) == repr(other)
+        return type(self) == type(other) and self.size == other.size and \
+            self.zobrist() == other.zobrist() and \
+            self.p1_turn == other.p1_turn and \
+            self.get_owners() == other.get_owners()
 
-    def get_template(self) -> dict:
+    def __hash__(self) -> int:
         """
-        Return a dictionary that templates the string representation of
-        StonehengeState.
+        Return the hash of this state, which is its Zobrist hash.
 
-        >>> state = StonehengeState(True, 1)
-        >>> state.get_template() == {'ley1': '@', 'l1': '@', 'r1': '@', \
-        'ley2': '@', 'l2': '@', 'r2': '@', 'A': 'A', 'B': 'B', 'C': 'C'}
+        >>> a = StonehengeState(True, 2).make_move('A').make_move('D')
+        >>> b = StonehengeState(True, 2).make_move('B').make_move('D')
+        >>> len({a.make_move('B'), b.make_move('A'), a})
+        2
+        """
+        return self.zobrist()
+
+    def zobrist(self) -> int:
+        """
+        Return the 64-bit Zobrist hash of this state, computing it from the
+        grid only if make_move has not already done so.
+
+        >>> state = StonehengeState(True, 2).make_move('A').make_move('G')
+        >>> state.zobrist() == StonehengeState(True, 2, state.grid).zobrist()
         True
         """
-        template = {}
-        i = 0
-        while i <= self.size:
-            template['ley{}'.format(i + 1)] = self.grid.leylines[i].player
-            template['l{}'.format(i + 1)] = self.grid.lefts[i].player
-            template['r{}'.format(i + 1)] = self.grid.rights[i].player
-            i += 1
-        for cell in self.grid.cells:
-            template[cell.letter] = str(cell)
-        return template
+        if self._zobrist is None:
+            turn = get_zobrist_keys(self.size)[2]
+            self._zobrist = self.grid.get_zobrist() ^ \
+                (turn if self.p1_turn else 0)
+        return self._zobrist
+
+    def __getstate__(self) -> tuple:
+        """
+        Return a compact picklable form of this state: the current player,
+        the size, and the owner of every cell and every ley-line.
+
+        >>> StonehengeState(False, 1).make_move('C').__getstate__()
+        (True, 1, '002', '020202')
+        """
+        cells = ''.join([str(cell.player) for cell in self.grid.cells])
+        lines = ''.join(['0' if line.player == '@' else str(line.player)
+                         for line in self.grid.lines])
+        return self.p1_turn, self.size, cells, lines
+
+    def __setstate__(self, state: tuple) -> None:
+        """
+        Restore this state from the form returned by __getstate__.
+
+        >>> import pickle
+        >>> state = StonehengeState(True, 2).make_move('A').make_move('G')
+        >>> pickle.loads(pickle.dumps(state)) == state
+        True
+        """
+        p1_turn, size, cells, lines = state
+        StonehengeState.__init__(self, p1_turn, size)
+        for cell, owner in zip(self.grid.cells, cells):
+            cell.player = int(owner)
+        for line, owner in zip(self.grid.lines, lines):
+            line.check_score()
+            if owner != '0':
+                line.player = int(owner)
+                self.grid.scores[line.player] += 1
+        self.p1, self.p2 = self.grid.get_score(1), self.grid.get_score(2)
 
     def get_possible_moves(self) -> list:
         """
@@ -173,10 +376,83 @@ class StonehengeState(GameState):
         >>> state.get_possible_moves()
         ['A', 'B', 'C']
         """
-        result = self.p1 >= (int(self.size) + 1) * 3 / 2 or self.p2 >= \
-            (int(self.size) + 1) * 3 / 2
-        return [] if result else [str(n) for n in self.grid.cells
-                                  if n.player == 0]
+        return list(self.iter_moves())
+
+    def iter_moves(self) -> Iterator:
+        """
+        Yield the letters of the unclaimed cells, or nothing once a player
+        has claimed at least half of the ley-lines.
+
+        Overrides GameState.iter_moves()
+
+        >>> next(StonehengeState(True, 2).make_move('A').iter_moves())
+        'B'
+        """
+        if self.is_finished():
+            return
+        for cell in self.grid.cells:
+            if cell.player == 0:
+                yield cell.letter
+
+    def is_finished(self) -> bool:
+        """
+        Return whether a player has claimed at least half of the ley-lines.
+
+        >>> StonehengeState(True, 1).make_move('A').is_finished()
+        True
+        """
+        return max(self.p1, self.p2) * 2 >= (self.size + 1) * 3
+
+    def get_line_claims(self) -> list:
+        """
+        Return, for every ley-line in the order of Grid.lines, a tuple of the
+        player owning it (0 if nobody does), the number of its cells claimed
+        by p1 and by p2, and its number of cells.
+
+        >>> StonehengeState(True, 1).make_move('B').get_line_claims()[:3]
+        [(1, 1, 0, 2), (0, 0, 0, 1), (0, 0, 0, 1)]
+        """
+        return [(0 if line.player == '@' else line.player, line.player_1,
+                 line.player_2, line.total) for line in self.grid.lines]
+
+    def get_owners(self) -> list:
+        """
+        Return the owner (0 for nobody, 1 or 2) of every cell, in the order
+        of Grid.cells, and then of every ley-line, in the order of
+        Grid.lines.
+
+        >>> StonehengeState(False, 1).make_move('C').get_owners()
+        [0, 0, 2, 0, 2, 0, 2, 0, 2]
+        """
+        return [cell.player for cell in self.grid.cells] + \
+            [0 if line.player == '@' else line.player
+             for line in self.grid.lines]
+
+    def get_symmetry_key(self) -> tuple:
+        """
+        Return a pair (key, mirrored): key is the same for this state and
+        its mirror image (see grid.get_mirror), and differs for every other
+        position, and mirrored is whether key was taken from the mirror
+        image, whose moves are those of this state mapped by mirror_move.
+
+        >>> a = StonehengeState(True, 2).make_move('A')
+        >>> b = StonehengeState(True, 2).make_move('B')
+        >>> a.get_symmetry_key()[0] == b.get_symmetry_key()[0]
+        True
+        >>> a.get_symmetry_key()[1] != b.get_symmetry_key()[1]
+        True
+        """
+        cells, lines, _ = get_mirror(self.size)
+        return symmetry_key(self.p1_turn, self.get_owners(), cells, lines)
+
+    def mirror_move(self, move: Any) -> Any:
+        """
+        Return the move of the mirror image of this state that matches move.
+
+        >>> StonehengeState(True, 2).mirror_move('C')
+        'E'
+        """
+        return get_mirror(self.size)[2][move]
 
     def make_move(self, move: Any) -> 'StonghengeState':
         """
@@ -194,16 +470,70 @@ class StonehengeState(GameState):
         """
         new_state = StonehengeState(not self.p1_turn, self.size,
                                     self.grid.copy())
-        new_state.grid.update_grid(self.get_current_player_name(), move)
+        captured = new_state.grid.update_grid(self.get_current_player_name(),
+                                              move)
         new_state.p1, new_state.p2 = new_state.grid.get_score(1),\
             new_state.grid.get_score(2)
+        cells, lines, turn = get_zobrist_keys(self.size)
+        new_state._zobrist = self.zobrist() ^ turn
+        if captured is not None:
+            number = 1 if self.p1_turn else 2
+            new_state._zobrist ^= cells[get_incidence(self.size)[0][move]][
+                number]
+            for i in captured:
+                new_state._zobrist ^= lines[i][number]
         return new_state
 
+    def apply_move(self, move: Any) -> tuple:
+        """
+        Apply move to this state itself, for searches that take their moves
+        back instead of copying the grid for each one (see search_state),
+        and return the token undo_move needs to take it back: the move, the
+        ley-lines it captured, and the hash, string and repr it replaced.
+
+        >>> state = StonehengeState(True, 2)
+        >>> token = state.apply_move('A')
+        >>> state == StonehengeState(True, 2).make_move('A')
+        True
+        >>> state.undo_move(token)
+        >>> state == StonehengeState(True, 2), state.p1
+        (True, 0)
+        """
+        zobrist = self.zobrist()
+        token = (move, self.grid.update_grid(self.get_current_player_name(),
+                                             move),
+                 zobrist, self._str, self._repr)
+        self.p1, self.p2 = self.grid.get_score(1), self.grid.get_score(2)
+        cells, lines, turn = get_zobrist_keys(self.size)
+        zobrist ^= turn
+        if token[1] is not None:
+            number = 1 if self.p1_turn else 2
+            zobrist ^= cells[get_incidence(self.size)[0][move]][number]
+            for i in token[1]:
+                zobrist ^= lines[i][number]
+        self.p1_turn = not self.p1_turn
+        self._zobrist, self._str, self._repr = zobrist, None, None
+        return token
+
+    def undo_move(self, token: tuple) -> None:
+        """
+        Take back the move apply_move returned token for, which must be the
+        latest move applied to this state and not taken back yet.
+        """
+        move, captured, self._zobrist, self._str, self._repr = token
+        if captured is not None:
+            self.grid.undo_update(move, captured)
+        self.p1, self.p2 = self.grid.get_score(1), self.grid.get_score(2)
+        self.p1_turn = not self.p1_turn
+
     def rough_outcome(self) -> float:
         """
         Return an estimate in interval [LOSE, WIN] of best outcome the current
         player can guarantee from state self.
 
+        Whether a move wins, or lets the opponent win next, is read off the
+        claim counts of the ley-lines through its cell, so no state is made.
+
         Overrides GameState.rough_outcome()
 
         >>> state = StonehengeState(True, 1)
@@ -216,17 +546,37 @@ class StonehengeState(GameState):
         >>> state.rough_outcome()
         0
         """
-        if self.get_possible_moves() == []:
+        if self.is_finished():
             return 1 if self.get_winner() == self.get_current_player_name() \
                 else -1
-        if any([self.finished(move) for move in self.get_possible_moves()]):
+        mine, theirs = (1, 2) if self.p1_turn else (2, 1)
+        scores = {1: self.p1, 2: self.p2}
+        needed = (self.size + 1) * 3 / 2
+        captures, threats = self.get_captures(mine), self.get_captures(theirs)
+        if any(scores[mine] + len(lines) >= needed
+               for lines in captures.values()):
             return 1
-        result = []
-        for move in self.get_possible_moves():
-            new_state = self.make_move(move)
-            result.append(any([new_state.finished(move) for move
-                               in new_state.get_possible_moves()]))
-        return -1 if all(result) else 0
+        for n in captures:
+            # The lines captured by claiming n are out of the opponent's reach.
+            if not any(scores[theirs] + len(set(threats[m]) -
+                                            set(captures[n])) >= needed
+                       for m in threats if m != n):
+                return 0
+        return -1
+
+    def get_captures(self, player: int) -> dict:
+        """
+        Return a dictionary mapping the index of every unclaimed cell to the
+        positions in Grid.lines of the ley-lines that player (1 or 2) would
+        capture by claiming it.
+
+        >>> StonehengeState(True, 1).make_move('B').get_captures(2)
+        {0: [2, 5], 2: [1, 5]}
+        """
+        through = get_incidence(self.size)[2]
+        return {n: [i for i in through[n]
+                    if self.grid.lines[i].can_capture(player)]
+                for n, cell in enumerate(self.grid.cells) if cell.player == 0}
 
     def finished(self, move) -> bool:
         """
@@ -237,8 +587,16 @@ class StonehengeState(GameState):
         >>> StonehengeState(True, 2).finished('A')
         False
         """
-        return self.make_move(move).p1 >= (int(self.size) + 1) * 3 / 2 or \
-            self.make_move(move).p2 >= (int(self.size) + 1) * 3 / 2
+        needed = (self.size + 1) * 3 / 2
+        if max(self.p1, self.p2) >= needed:
+            return True
+        n = get_incidence(self.size)[0][move]
+        number = 1 if self.p1_turn else 2
+        captured = [i for i in get_incidence(self.size)[2][n]
+                    if self.grid.lines[i].can_capture(number)] \
+            if self.grid.cells[n].player == 0 else []
+        return (self.p1 if self.p1_turn else self.p2) + len(captured) >= \
+            needed
 
     def get_winner(self) -> str:
         """
@@ -5,7 +5,18 @@ NOTE: Make sure this file adheres to python-ta.
 Adjust the type annotations as needed, and implement both a recursive
 and an iterative version of minimax.
 """
-from typing import Any
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from time import perf_counter
+from typing import Any, Iterator
+from eval_cache import DEFAULT_PATH, get_cache
+from mcts import mcts
+from move_ordering import MoveOrderer
+from proof_number import ProofNumberSearch
+from search_state import SearchState
+from subtract_square_tablebase import get_tablebase
+from transposition import TranspositionTable, position_key, EXACT, LOWER, \
+    UPPER, HEURISTIC
 
 
 # TODO: Adjust the type annotation as needed.
@@ -56,73 +67,482 @@ def rough_outcome_strategy(game: Any) -> Any:
     return best_move
 
 
-def add_score(state: Any, score: int) -> Any:
+def minimax_search(game: Any, state: Any, table: TranspositionTable,
+                   orderer: MoveOrderer = None, ply: int = 0) -> tuple:
     """
-    Add the score attribute to the state.
+    Return a (score, move) pair for state, where score is the best score the
+    current player of state can guarantee and move is the first move that
+    achieves it (None if state is over).
+
+    Positions already solved are looked up in table instead of being searched
+    again, and every position solved is stored in table. Neither game nor
+    state is modified. If orderer is given, moves are searched in its order
+    (state being ply plies below the root), so a winning move, which ends the
+    search of its siblings, tends to be found sooner; move is then the first
+    best move in that order.
+
+    The moves are played on a SearchState (see search_state), so states that
+    can be changed in place are copied once rather than once per position.
     """
-    state.score = score
-    return state
+    return minimax_node(game, SearchState(state), table, orderer, ply)
 
 
-# TODO: Implement a recursive version of the minimax strategy.
-def recursive_minimax(game: Any) -> Any:
+def minimax_node(game: Any, search: SearchState, table: TranspositionTable,
+                 orderer: MoveOrderer = None, ply: int = 0) -> tuple:
+    """
+    Return the (score, move) pair of minimax_search for the current state of
+    search, leaving search at that state.
+    """
+    state = search.state
+    key = position_key(state)
+    entry = table.get(key)
+    if entry is not None and entry[2] == EXACT:
+        return entry[0], entry[1]
+
+    if game.is_over(state):
+        # rough_outcome() of a finished state is the score of its player.
+        best_score, best_move = state.rough_outcome(), None
+    else:
+        best_score, best_move = -2, None
+        # Unordered moves are only generated as far as the search gets
+        # before a win cuts it off; ordering them needs them all.
+        moves = state.iter_moves()
+        if orderer is not None:
+            moves = orderer.order(state, list(moves), ply)
+        for move in moves:
+            search.play(move)
+            score = -1 * minimax_node(game, search, table, orderer,
+                                      ply + 1)[0]
+            state = search.undo()
+            if score > best_score:
+                best_score, best_move = score, move
+                if best_score == state.WIN:
+                    if orderer is not None:
+                        orderer.record(state, move, ply)
+                    break
+    table.put(key, best_score, best_move)
+    return best_score, best_move
+
+
+_TABLE = TranspositionTable()
+
+
+def recursive_minimax(game: Any, table: TranspositionTable = None,
+                      ordering: bool = False, cache: Any = None) -> Any:
     """
     Return the best move for the current player by the minimax concept and
     calculating the result recursively.
+
+    Solved positions are kept in table (a module-wide table by default), so
+    transpositions are searched once and later calls reuse earlier results.
+    If ordering is True, promising moves are searched first (see
+    move_ordering), which finds wins sooner but may pick a different one of
+    several equally good moves. The current state is looked up in, and its
+    result stored in, cache (see eval_cache.get_cache).
     """
-    state = add_score(game.current_state, -2)
-    player = state.get_current_player_name()
-    moves = state.get_possible_moves()
-    choices = [add_score(state.make_move(move), -2) for move in moves]
-    scores = []
-
-    for choice in choices:
-        new_game = game
-        new_game.current_state = choices[choices.index(choice)]
-
-        if new_game.is_winner(player):
-            state.score = 1
-            game.current_state = state
-            return moves[choices.index(choice)]
-        elif new_game.is_over(choice):
-            choices[choices.index(choice)].score = -1 \
-                if new_game.is_winner('p2' if 'p1' == player else 'p1') else 0
-        else:
-            recursive_minimax(new_game)
-            choices[choices.index(choice)].score = -1 * \
-                new_game.current_state.score
-        scores.append(choice.score)
+    cache, state = get_cache(cache), game.current_state
+    entry = cache.get(state) if cache is not None else None
+    if entry is not None:
+        return entry[1]
+    table = _TABLE if table is None else table
+    score, move = minimax_search(game, state, table,
+                                 MoveOrderer() if ordering else None)
+    if cache is not None:
+        cache.put(state, score, move)
+    return move
+
+
+def solve_state(game: Any, state: Any) -> int:
+    """
+    Return the minimax score of state for its current player, using this
+    process's module-wide table.
 
-    game.current_state = state
-    state.score = max(scores)
-    for choice in choices:
-        if choice.score == max(scores):
-            return moves[choices.index(choice)]
-    return 'Whatever Something.'
+    This is the work done by each worker process of parallel_minimax.
+    """
+    return minimax_search(game, state, _TABLE)[0]
 
 
-class GameNode:
+def split_tree(game: Any, state: Any, depth: int, states: list) -> Any:
+    """
+    Return a plan for solving state by splitting its game tree depth plies
+    deep: either the index in states of state itself (which is appended to
+    states to be solved as a whole), or a list of (move, plan) pairs for
+    the moves of state.
+
+    >>> from subtract_square_game import SubtractSquareGame
+    >>> game, states = SubtractSquareGame(True, 5), []
+    >>> split_tree(game, game.current_state, 1, states)
+    [(1, 0), (4, 1)]
+    >>> [state.current_total for state in states]
+    [4, 1]
     """
-    A GameNode for iterative minimax.
+    if depth == 0 or game.is_over(state):
+        states.append(state)
+        return len(states) - 1
+    return [(move, split_tree(game, state.make_move(move), depth - 1, states))
+            for move in state.get_possible_moves()]
 
-    current_state - the current game state.
-    score - the best score that the player can get.
-    id - the GameNode id for tracking.
+
+def join_tree(plan: Any, scores: list) -> tuple:
     """
-    current_state: Any
-    id_num: int
-    move: Any
-    children: 'list[int]'
+    Return the (score, move) pair for the plan made by split_tree, given the
+    scores of the states it split off, choosing the first best move like
+    minimax_search.
+
+    >>> join_tree([(1, 0), (4, 1)], [1, 1])
+    (-1, 1)
+    >>> join_tree([(1, 0), (4, 1)], [1, -1])
+    (1, 4)
+    """
+    if isinstance(plan, int):
+        return scores[plan], None
+    best_score, best_move = -2, None
+    for move, sub_plan in plan:
+        score = -1 * join_tree(sub_plan, scores)[0]
+        if score > best_score:
+            best_score, best_move = score, move
+    return best_score, best_move
+
+
+def parallel_minimax(game: Any, workers: int = None, split_depth: int = 1,
+                     cache: Any = None) -> Any:
+    """
+    Return the best move for the current player by minimax, solving the
+    positions split_depth plies below the current state in a pool of workers
+    processes (one per CPU by default).
+
+    The move returned is always the one recursive_minimax returns. The
+    current state is looked up in, and its result stored in, cache (see
+    eval_cache.get_cache).
+    """
+    cache, state = get_cache(cache), game.current_state
+    entry = cache.get(state) if cache is not None else None
+    if entry is not None:
+        return entry[1]
+    states = []
+    plan = split_tree(game, state, max(split_depth, 1), states)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        scores = list(pool.map(solve_state, repeat(game), states))
+    score, move = join_tree(plan, scores)
+    if cache is not None:
+        cache.put(state, score, move)
+    return move
+
+
+def tablebase_strategy(game: Any) -> Any:
+    """
+    Return the best move for a game of SubtractSquare by looking the current
+    total up in the SubtractSquare tablebase: the smallest square that leaves
+    the opponent on a losing total, or 1 if every move loses.
+
+    This is the move recursive_minimax returns, without any search.
+    """
+    return get_tablebase(game.current_state.current_total).best_move(
+        game.current_state.current_total)
+
+
+def mcts_strategy(game: Any, playouts: Any = 1000, budget_ms: Any = None,
+                  workers: int = 1) -> Any:
+    """
+    Return a move for game by Monte Carlo tree search (see mcts) of playouts
+    random playouts, or of budget_ms milliseconds if playouts is None, run in
+    workers worker processes if workers is more than 1.
+
+    Unlike minimax, this plays boards of any size in bounded time, and its
+    tree is reused for the following moves of the same game.
+    """
+    return mcts(game, playouts, budget_ms, workers)
+
+
+def proof_number_strategy(game: Any) -> Any:
+    """
+    Return a move for game that proof-number search (see proof_number)
+    proves wins, or any move if the current player loses anyway.
+
+    This is a winning move whenever recursive_minimax finds one, but not
+    always the same one.
+    """
+    return ProofNumberSearch(game).solve(game.current_state)[1]
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside a search when its time budget has run out.
+    """
+
+
+def depth_limited_search(game: Any, state: Any, depth: int, deadline: float,
+                         table: TranspositionTable,
+                         orderer: MoveOrderer = None, ply: int = 0) -> tuple:
+    """
+    Return a (score, move, exact) triple for state by minimax searching depth
+    plies ahead, where positions still going at the horizon are scored by
+    rough_outcome(), and exact is whether no such position decided score.
+
+    If orderer is given, the best move found for state by the search one ply
+    shallower is searched first, then the rest in orderer's order.
+
+    Raise SearchTimeout once perf_counter() passes deadline.
+    """
+    if perf_counter() > deadline:
+        raise SearchTimeout
+    if game.is_over(state):
+        return state.rough_outcome(), None, True
+    if depth == 0:
+        score = state.rough_outcome()
+        # rough_outcome() is only ever sure of a win or a loss.
+        return score, None, score in (state.WIN, state.LOSE)
+
+    key = (position_key(state), depth)
+    entry = table.get(key)
+    if entry is not None:
+        return entry[0], entry[1], entry[2] == EXACT
+
+    best_score, best_move, exact = -2, None, True
+    moves = state.iter_moves()
+    if orderer is not None:
+        previous = table.get((key[0], depth - 1))
+        moves = orderer.order(state, list(moves), ply,
+                              previous[1] if previous else None)
+    for move in moves:
+        score, _, sub_exact = depth_limited_search(
+            game, state.make_move(move), depth - 1, deadline, table, orderer,
+            ply + 1)
+        exact = exact and sub_exact
+        if -1 * score > best_score:
+            best_score, best_move = -1 * score, move
+            if best_score == state.WIN and sub_exact:
+                exact = True
+                if orderer is not None:
+                    orderer.record(state, move, ply, depth * depth)
+                break
+    table.put(key, best_score, best_move, EXACT if exact else HEURISTIC)
+    return best_score, best_move, exact
+
+
+def iterative_deepening(game: Any, budget_ms: int = 1000,
+                        max_depth: int = None, ordering: bool = True,
+                        cache: Any = None) -> Any:
+    """
+    Return a move for the current player by searching 1, 2, 3, ... plies
+    ahead until budget_ms milliseconds have passed (or max_depth plies have
+    been searched), returning the best move of the deepest search that
+    finished.
+
+    Positions at the horizon are scored by rough_outcome(). The search stops
+    early once its result no longer depends on the horizon. If ordering is
+    True, each search tries the moves the last one found best first. The
+    current state is looked up in cache (see eval_cache.get_cache), and its
+    result stored there if it does not depend on the horizon.
+    """
+    deadline = perf_counter() + budget_ms / 1000
+    cache, state = get_cache(cache), game.current_state
+    entry = cache.get(state) if cache is not None else None
+    if entry is not None:
+        return entry[1]
+    best_move = next(state.iter_moves(), None)
+    table, depth = TranspositionTable(), 1
+    orderer = MoveOrderer() if ordering else None
+    while max_depth is None or depth <= max_depth:
+        try:
+            score, move, exact = depth_limited_search(game, state, depth,
+                                                      deadline, table, orderer)
+        except SearchTimeout:
+            break
+        best_move = move
+        if exact or score in (state.WIN, state.LOSE):
+            # A sure win or loss does not depend on the horizon either.
+            if cache is not None:
+                cache.put(state, score, move)
+            break
+        depth += 1
+    return best_move
+
+
+def alphabeta_search(game: Any, state: Any, window: tuple,
+                     table: TranspositionTable, orderer: MoveOrderer = None,
+                     ply: int = 0) -> tuple:
+    """
+    Return a (score, move) pair for state by fail-soft alpha-beta search
+    within window, a pair (alpha, beta).
+
+    A score strictly between alpha and beta is exact; a score <= alpha is an
+    upper bound and a score >= beta is a lower bound on the true score. If
+    orderer is given, the best move remembered in table is searched first and
+    the rest in orderer's order (state being ply plies below the root), and
+    every cutoff is recorded in orderer. Like minimax_search, the moves are
+    played on a SearchState, and state is not modified.
+    """
+    return alphabeta_node(game, SearchState(state), window, table, orderer,
+                          ply)
+
+
+def alphabeta_node(game: Any, search: SearchState, window: tuple,
+                   table: TranspositionTable, orderer: MoveOrderer = None,
+                   ply: int = 0) -> tuple:
+    """
+    Return the (score, move) pair of alphabeta_search for the current state
+    of search, leaving search at that state.
+    """
+    alpha, beta = window
+    state = search.state
+    key = position_key(state)
+    entry = table.get(key)
+    if entry is not None:
+        score, move, bound = entry
+        if bound == EXACT or (bound == LOWER and score >= beta) or \
+                (bound == UPPER and score <= alpha):
+            return score, move
+
+    if game.is_over(state):
+        score = state.rough_outcome()
+        table.put(key, score, None)
+        return score, None
+
+    moves = state.iter_moves()
+    if orderer is not None:
+        # The best move of an earlier search is the likeliest to cut off.
+        moves = orderer.order(state, list(moves), ply,
+                              entry[1] if entry is not None else None)
+
+    best_score, best_move = -2, None
+    for move in moves:
+        search.play(move)
+        score = -1 * alphabeta_node(game, search,
+                                    (-beta, -max(alpha, best_score)),
+                                    table, orderer, ply + 1)[0]
+        state = search.undo()
+        if score > best_score:
+            best_score, best_move = score, move
+            if best_score >= beta:
+                if orderer is not None:
+                    orderer.record(state, move, ply, len(moves))
+                break
+
+    if best_score <= alpha and best_score != state.LOSE:
+        bound = UPPER
+    elif best_score >= beta and best_score != state.WIN:
+        bound = LOWER
+    else:
+        # Scores never leave [LOSE, WIN], so bounds at either end are exact.
+        bound = EXACT
+    table.put(key, best_score, best_move, bound)
+    return best_score, best_move
+
+
+_ALPHABETA_TABLE = TranspositionTable()
+
+
+def clear_tables() -> None:
+    """
+    Forget every position solved by the strategies that keep their results
+    in a module-wide table, so the next search starts from nothing.
+    """
+    _TABLE.clear()
+    _ALPHABETA_TABLE.clear()
+
+
+def alphabeta_minimax(game: Any, ordering: bool = True,
+                      table: TranspositionTable = None,
+                      cache: Any = None) -> Any:
+    """
+    Return the best move for the current player by minimax with alpha-beta
+    pruning, which stops searching a position's moves as soon as the
+    opponent would never allow it to be reached.
+
+    If ordering is True, promising moves (see move_ordering) are searched
+    first so cutoffs happen earlier. Search results are kept in table (a
+    module-wide table by default). The current state is looked up in, and
+    its result stored in, cache (see eval_cache.get_cache).
+    """
+    cache, state = get_cache(cache), game.current_state
+    entry = cache.get(state) if cache is not None else None
+    if entry is not None:
+        return entry[1]
+    table = _ALPHABETA_TABLE if table is None else table
+    # Searched with the widest window, the score at the root is exact.
+    score, move = alphabeta_search(game, state, (state.LOSE, state.WIN),
+                                   table, MoveOrderer() if ordering else None)
+    if cache is not None:
+        cache.put(state, score, move)
+    return move
+
+
+def cached_recursive_minimax(game: Any) -> Any:
+    """
+    Return recursive_minimax(game), answered from and stored in the
+    persistent evaluation cache at eval_cache.DEFAULT_PATH, which every
+    process playing with this strategy shares.
+    """
+    return recursive_minimax(game, cache=DEFAULT_PATH)
+
+
+def cached_alphabeta_minimax(game: Any) -> Any:
+    """
+    Return alphabeta_minimax(game), answered from and stored in the
+    persistent evaluation cache at eval_cache.DEFAULT_PATH, which every
+    process playing with this strategy shares.
+    """
+    return alphabeta_minimax(game, cache=DEFAULT_PATH)
+
+
+class GameNode:
+    """
+    A GameNode for iterative minimax: one position on the path currently
+    being searched. Its children are made from state and moves only when
+    they are searched, and are dropped once their score is folded in.
+
+    state - the game state at this position
+    moves - an iterator over the moves of state not searched yet, in the
+            order they are searched
+    pending - the next move to search, or None if there is none left
+    last - the move searched last
+    score - the best score found so far for the current player of state
+    move - the move that achieves score
+    ply - the number of moves from the root to this position
+    """
+    __slots__ = ('state', 'moves', 'pending', 'last', 'score', 'move', 'ply')
+    state: Any
+    moves: Iterator
+    pending: Any
+    last: Any
     score: int
+    move: Any
+    ply: int
 
-    def __init__(self, current_state: Any, id_num: int, move: Any = None,
-                 children_score: tuple = None) -> None:
+    def __init__(self, state: Any, orderer: MoveOrderer = None,
+                 ply: int = 0) -> None:
         """
-        Initialize a GameNode with current state, score and id.
+        Initialize a GameNode for state at ply plies from the root, with none
+        of its moves searched, which are ordered by orderer if it is given.
+        Unordered moves are generated one at a time, as they are searched.
         """
-        self.current_state, self.id_num, self.move = current_state, id_num, move
-        self.children = children_score[0] if children_score else children_score
-        self.score = children_score[1] if children_score else children_score
+        self.state, self.moves = state, state.iter_moves()
+        if orderer is not None:
+            self.moves = iter(orderer.order(state, list(self.moves), ply))
+        self.pending, self.last = next(self.moves, None), None
+        self.score, self.move, self.ply = -2, None, ply
+
+    def is_done(self) -> bool:
+        """
+        Return whether every move of this node that matters has been searched.
+        """
+        return self.pending is None or self.score == self.state.WIN
+
+    def next_move(self) -> Any:
+        """
+        Return the next move to search, moving on to the one after it.
+        """
+        self.last, self.pending = self.pending, next(self.moves, None)
+        return self.last
+
+    def fold(self, score: int) -> None:
+        """
+        Fold in score, the score for the current player of this node's state
+        of the move searched last.
+        """
+        if score > self.score:
+            self.score, self.move = score, self.last
 
 
 class Stack:
@@ -151,6 +571,12 @@ class Stack:
         """
         return self._stack.pop(-1)
 
+    def top(self) -> Any:
+        """
+        Return the top item of the stack without removing it.
+        """
+        return self._stack[-1]
+
     def is_empty(self) -> bool:
         """
         Return whether the stack is empty.
@@ -158,39 +584,42 @@ class Stack:
         return self._stack == []
 
 
-# TODO: Implement an iterative version of the minimax strategy.
-def iterative_minimax(game: Any) -> Any:
+def iterative_minimax(game: Any, ordering: bool = False,
+                      cache: Any = None) -> Any:
     """
     Return the best move for the game using the minimax strategy iteratively.
+
+    Only the nodes on the path being searched are kept, so memory grows with
+    the depth of the game rather than the size of its tree. If ordering is
+    True, promising moves are searched first (see move_ordering), which finds
+    wins sooner but may pick a different one of several equally good moves.
+    The current state is looked up in, and its result stored in, cache (see
+    eval_cache.get_cache).
     """
+    cache = get_cache(cache)
+    entry = cache.get(game.current_state) if cache is not None else None
+    if entry is not None:
+        return entry[1]
+    orderer = MoveOrderer() if ordering else None
     stack = Stack()
-    id_num = 0
-    stack.append(GameNode(game.current_state, id_num))
-    result = {}
-    while not stack.is_empty():
-        node = stack.remove()
-        game.current_state = node.current_state
-        player = node.current_state.get_current_player_name()
-        if game.is_over(node.current_state):
-            node.score = 1 if game.is_winner(player) else \
-                (-1 if game.is_winner('p2' if 'p1' == player else 'p1') else 0)
-            result[node.id_num] = node
-        elif not node.children:
-            stack.append(node)
-            node.children = []
-            for m in node.current_state.get_possible_moves():
-                id_num += 1
-                sub_node = GameNode(node.current_state.make_move(m), id_num, m)
-                node.children.append(id_num)
-                stack.append(sub_node)
+    stack.append(GameNode(game.current_state, orderer))
+    while True:
+        node = stack.top()
+        if not node.is_done():
+            new_state = node.state.make_move(node.next_move())
+            if game.is_over(new_state):
+                node.fold(-1 * new_state.rough_outcome())
+            else:
+                stack.append(GameNode(new_state, orderer, node.ply + 1))
         else:
-            max_score = max([-1 * result[n].score for n in node.children])
-            node.score = max_score
-            result[node.id_num] = node
-    for num in result[0].children:
-        if result[num].score == -1 * result[0].score:
-            return result[num].move
-    return 'Turin Bless Me !'
+            stack.remove()
+            if orderer is not None and node.score == node.state.WIN:
+                orderer.record(node.state, node.move, node.ply)
+            if stack.is_empty():
+                if cache is not None:
+                    cache.put(node.state, node.score, node.move)
+                return node.move
+            stack.top().fold(-1 * node.score)
 
 
 if __name__ == "__main__":
@@ -3,9 +3,13 @@ An implementation of a state for SubtractSquare.
 
 NOTE: You do not have to run python-ta on this file.
 """
-from typing import Any
+from itertools import islice
+from math import isqrt
+from typing import Any, Iterator
 from game_state import GameState
 
+_SQUARES = []
+
 
 class SubtractSquareState(GameState):
     """
@@ -30,12 +34,21 @@ class SubtractSquareState(GameState):
         """
         Return all possible moves that can be applied to this state.
         """
-        moves = []
-        for i in range(1, self.current_total + 1):
-            if i ** 2 <= self.current_total:
-                moves.append(i ** 2)
+        return get_squares(self.current_total)
+
+    def iter_moves(self) -> Iterator:
+        """
+        Return an iterator over the possible moves of this state, the squares
+        up to the current total in increasing order, read straight from the
+        shared table of squares without copying it.
 
-        return moves
+        Overrides GameState.iter_moves()
+
+        >>> moves = SubtractSquareState(True, 10 ** 6).iter_moves()
+        >>> next(moves), next(moves)
+        (1, 4)
+        """
+        return islice(_SQUARES, count_squares(self.current_total))
 
     def make_move(self, move: Any) -> "SubtractSquareState":
         """
@@ -48,6 +61,34 @@ class SubtractSquareState(GameState):
                                         self.current_total - move)
         return new_state
 
+    def apply_move(self, move: Any) -> Any:
+        """
+        Apply move to this state itself, for searches that take their moves
+        back instead of making a new state for each one (see search_state),
+        and return the token undo_move needs to take it back.
+
+        >>> state = SubtractSquareState(True, 10)
+        >>> token = state.apply_move(9)
+        >>> state.p1_turn, state.current_total
+        (False, 1)
+        >>> state.undo_move(token)
+        >>> state == SubtractSquareState(True, 10)
+        True
+        """
+        if type(move) == str:
+            move = int(move)
+        self.current_total -= move
+        self.p1_turn = not self.p1_turn
+        return move
+
+    def undo_move(self, token: Any) -> None:
+        """
+        Take back the move apply_move returned token for, which must be the
+        latest move applied to this state and not taken back yet.
+        """
+        self.current_total += token
+        self.p1_turn = not self.p1_turn
+
     def __repr__(self) -> str:
         """
         Return a representation of this state (which can be used for
@@ -56,21 +97,94 @@ class SubtractSquareState(GameState):
         return "P1's Turn: {} - Total: {}".format(self.p1_turn,
                                                   self.current_total)
 
+    def __eq__(self, other: Any) -> bool:
+        """
+        Return whether self and other is equivalent.
+
+        >>> SubtractSquareState(True, 9) == SubtractSquareState(True, 9)
+        True
+        >>> SubtractSquareState(True, 9) == SubtractSquareState(False, 9)
+        False
+        """
+        return type(self) == type(other) and self.p1_turn == other.p1_turn \
+            and self.current_total == other.current_total
+
+    def __hash__(self) -> int:
+        """
+        Return a hash of this state, consistent with __eq__.
+
+        >>> len({SubtractSquareState(True, 9), SubtractSquareState(True, 9)})
+        1
+        """
+        return hash((self.p1_turn, self.current_total))
+
+    def __getstate__(self) -> tuple:
+        """
+        Return a compact picklable form of this state.
+
+        >>> SubtractSquareState(False, 10).__getstate__()
+        (False, 10)
+        """
+        return self.p1_turn, self.current_total
+
+    def __setstate__(self, state: tuple) -> None:
+        """
+        Restore this state from the form returned by __getstate__.
+
+        >>> import pickle
+        >>> repr(pickle.loads(pickle.dumps(SubtractSquareState(True, 7))))
+        "P1's Turn: True - Total: 7"
+        """
+        SubtractSquareState.__init__(self, *state)
+
     def rough_outcome(self) -> float:
         """
         Return an estimate in interval [LOSE, WIN] of best outcome the current
         player can guarantee from state self.
         """
-        if is_pos_square(self.current_total):
+        count = count_squares(self.current_total)
+        if count and _SQUARES[count - 1] == self.current_total:
             return self.WIN
-        elif all([is_pos_square(self.current_total - n ** 2)
-                  for n in range(1, self.current_total + 1)
-                  if n ** 2 < self.current_total]):
+        elif all(is_pos_square(self.current_total - square)
+                 for square in islice(_SQUARES, count)):
             return self.LOSE
 
         return self.DRAW
 
 
+def count_squares(total: int) -> int:
+    """
+    Return how many positive perfect squares there are up to total, making
+    sure the table of squares shared by all states holds at least that many
+    (it grows as larger totals are asked for).
+
+    Searches walk the first count_squares(total) entries of the table in
+    place, so generating moves does not copy it.
+
+    >>> count_squares(10), _SQUARES[:3]
+    (3, [1, 4, 9])
+    >>> count_squares(0)
+    0
+    """
+    count = isqrt(total) if total > 0 else 0
+    if count > len(_SQUARES):
+        _SQUARES.extend(n * n for n in range(len(_SQUARES) + 1, count + 1))
+    return count
+
+
+def get_squares(total: int) -> list:
+    """
+    Return a new list of the positive perfect squares up to total, in
+    increasing order.
+
+    >>> get_squares(10)
+    [1, 4, 9]
+    >>> get_squares(0)
+    []
+    """
+    return _SQUARES[:count_squares(total)]
+
+
 def is_pos_square(n: int) -> bool:
     """
     Return whether n is a positive perfect square
@@ -79,8 +193,10 @@ def is_pos_square(n: int) -> bool:
     False
     >>> is_pos_square(9)
     True
+    >>> is_pos_square(10 ** 30 + 1)
+    False
     """
-    return 0 < n and (round(n ** 0.5) ** 2 == n)
+    return 0 < n and isqrt(n) ** 2 == n
 
 
 if __name__ == "__main__":
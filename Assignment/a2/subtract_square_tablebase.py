@@ -0,0 +1,238 @@
+"""
+A tablebase of solved SubtractSquare positions.
+
+A total is a win for the player to move if some square move leaves the
+opponent on a losing total. The table is built bottom-up: every total that is
+a loss makes each total one square above it a win. It is stored one bit per
+total, along with the root of the best move of every total (two bytes each,
+little-endian, so a file can be moved between machines), and tablebase
+files are memory-mapped when loaded.
+
+Usage: python subtract_square_tablebase.py LIMIT [PATH]
+"""
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Any
+from subtract_square_state import get_squares
+
+MAGIC = b'SST2'
+HEADER = struct.Struct('<4sQ')
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'subtract_square.tb')
+# The largest total whose roots (up to 65535) fit in two bytes each.
+MAX_LIMIT = 65536 ** 2 - 1
+
+
+def build_bits(limit: int) -> bytearray:
+    """
+    Return a bit array whose bit t is set exactly when the total t is a win
+    for the player to move, for every total from 0 to limit.
+
+    >>> bits = build_bits(10)
+    >>> [t for t in range(11) if bits[t >> 3] >> (t & 7) & 1]
+    [1, 3, 4, 6, 8, 9]
+    """
+    bits = bytearray((limit >> 3) + 1)
+    squares = get_squares(limit)
+    for total in range(limit + 1):
+        if not bits[total >> 3] >> (total & 7) & 1:
+            for square in squares:
+                win = total + square
+                if win > limit:
+                    break
+                bits[win >> 3] |= 1 << (win & 7)
+    return bits
+
+
+def build_roots(limit: int) -> array:
+    """
+    Return an array whose entry t is the root of the smallest square that
+    leaves the opponent on a losing total from the total t, or 0 if the
+    total t is a loss, for every total from 0 to limit.
+
+    Each losing total marks the totals one square above it, and the totals
+    are visited in increasing order, so the last square to mark a total is
+    its smallest winning one.
+
+    Raise ValueError if limit is over MAX_LIMIT.
+
+    >>> list(build_roots(10))
+    [0, 1, 0, 1, 2, 0, 1, 0, 1, 2, 0]
+    >>> build_roots(MAX_LIMIT + 1)
+    Traceback (most recent call last):
+    ...
+    ValueError: a tablebase holds totals up to 4294967295, not 4294967296
+    """
+    if limit > MAX_LIMIT:
+        raise ValueError('a tablebase holds totals up to {}, not {}'.format(
+            MAX_LIMIT, limit))
+    roots = array('H', bytes(2 * (limit + 1)))
+    squares = get_squares(limit)
+    for total in range(limit + 1):
+        if not roots[total]:
+            for root, square in enumerate(squares, 1):
+                win = total + square
+                if win > limit:
+                    break
+                roots[win] = root
+    return roots
+
+
+def bits_of(roots: array) -> bytearray:
+    """
+    Return the bit array of build_bits for the roots of build_roots.
+
+    >>> bits_of(build_roots(10)) == build_bits(10)
+    True
+    """
+    bits = bytearray(((len(roots) - 1) >> 3) + 1)
+    for total, root in enumerate(roots):
+        if root:
+            bits[total >> 3] |= 1 << (total & 7)
+    return bits
+
+
+class Tablebase:
+    """
+    The win/loss values and best moves of the SubtractSquare totals from 0
+    to limit.
+
+    limit - the largest total in the tablebase
+    """
+    limit: int
+
+    def __init__(self, limit: int, bits: Any = None, offset: int = 0,
+                 roots: Any = None) -> None:
+        """
+        Initialize a tablebase of the totals up to limit, built from scratch
+        unless bits (a buffer holding the bit array from offset on) and
+        roots (a sequence holding the roots of build_roots) are given.
+
+        >>> Tablebase(50).limit
+        50
+        """
+        self.limit = limit
+        if bits is None:
+            roots = build_roots(limit)
+            bits = bits_of(roots)
+        self._bits, self._offset, self._roots = bits, offset, roots
+
+    def is_win(self, total: int) -> bool:
+        """
+        Return whether total is a win for the player to move.
+
+        Precondition: 0 <= total <= self.limit
+
+        >>> table = Tablebase(20)
+        >>> table.is_win(0), table.is_win(2), table.is_win(18)
+        (False, False, True)
+        """
+        return bool(self._bits[self._offset + (total >> 3)] >> (total & 7)
+                    & 1)
+
+    def best_move(self, total: int) -> int:
+        """
+        Return the smallest square move from total that leaves the opponent
+        on a losing total, or 1 if total is lost anyway. The move is read
+        off the stored roots, in constant time.
+
+        Precondition: 0 < total <= self.limit
+
+        >>> Tablebase(20).best_move(18)
+        1
+        >>> Tablebase(20).best_move(17)
+        1
+        >>> Tablebase(30).best_move(19)
+        4
+        """
+        root = self._roots[total]
+        return root * root if root else 1
+
+    def save(self, path: str) -> None:
+        """
+        Write this tablebase to the file at path: the header, the bit
+        array, and then the roots, little-endian.
+        """
+        roots = array('H', self._roots)
+        if sys.byteorder != 'little':
+            roots.byteswap()
+        with open(path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, self.limit))
+            file.write(bytes(self._bits[self._offset:self._offset +
+                                        (self.limit >> 3) + 1]))
+            file.write(roots.tobytes())
+
+    def close(self) -> None:
+        """
+        Release the memory map of a loaded tablebase.
+        """
+        if isinstance(self._bits, mmap.mmap):
+            if isinstance(self._roots, memoryview):
+                self._roots.release()
+            self._bits.close()
+
+
+def load(path: str) -> Tablebase:
+    """
+    Return the tablebase stored in the file at path, memory-mapped rather
+    than read into memory (the roots are copied and byte-swapped instead
+    on a big-endian machine).
+
+    Raise ValueError if the file is not a tablebase.
+    """
+    with open(path, 'rb') as file:
+        bits = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(bits) < HEADER.size:
+        bits.close()
+        raise ValueError('{} is not a SubtractSquare tablebase'.format(path))
+    magic, limit = HEADER.unpack_from(bits)
+    start = HEADER.size + (limit >> 3) + 1
+    if magic != MAGIC or len(bits) != start + 2 * (limit + 1):
+        bits.close()
+        raise ValueError('{} is not a SubtractSquare tablebase'.format(path))
+    roots = memoryview(bits)[start:].cast('H')
+    if sys.byteorder != 'little':
+        swapped = array('H', roots)
+        roots.release()
+        swapped.byteswap()
+        roots = swapped
+    return Tablebase(limit, bits, HEADER.size, roots)
+
+
+_TABLEBASE = None
+
+
+def get_tablebase(total: int) -> Tablebase:
+    """
+    Return a tablebase covering total: the one at DEFAULT_PATH if it is a
+    tablebase large enough, or else one built in memory (at least twice as
+    large as the last one, so repeated growth stays cheap).
+
+    >>> get_tablebase(30).limit >= 30
+    True
+    """
+    global _TABLEBASE
+    if _TABLEBASE is None and os.path.exists(DEFAULT_PATH):
+        try:
+            _TABLEBASE = load(DEFAULT_PATH)
+        except ValueError:
+            # A file of an older format is rebuilt below instead.
+            _TABLEBASE = None
+    if _TABLEBASE is None or _TABLEBASE.limit < total:
+        limit = max(total, 2 * _TABLEBASE.limit if _TABLEBASE else 1024)
+        if _TABLEBASE is not None:
+            _TABLEBASE.close()
+        _TABLEBASE = Tablebase(limit)
+    return _TABLEBASE
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) not in (2, 3) or not sys.argv[1].isdigit():
+        print('Usage: python subtract_square_tablebase.py LIMIT [PATH]')
+        sys.exit(1)
+    Tablebase(int(sys.argv[1])).save(sys.argv[2] if len(sys.argv) == 3
+                                     else DEFAULT_PATH)
@@ -0,0 +1,128 @@
+"""
+Unittests for the SubtractSquare tablebase.
+
+The tablebase must agree with minimax on every total it can reach, survive a
+round trip through a tablebase file, and back tablebase_strategy.
+"""
+import os
+import struct
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from subtract_square_game import SubtractSquareGame
+from subtract_square_state import SubtractSquareState
+from subtract_square_tablebase import Tablebase, load, build_roots, \
+    MAX_LIMIT
+from strategy import minimax_search, tablebase_strategy, recursive_minimax
+from transposition import TranspositionTable
+
+
+class TablebaseUnitTests(unittest.TestCase):
+    def test_agrees_with_minimax(self):
+        """
+        Test that the tablebase value of every total up to 300 is the score
+        minimax finds for it.
+        """
+        with patch('builtins.input', return_value='1'):
+            game = SubtractSquareGame(True)
+        table, tablebase = TranspositionTable(), Tablebase(300)
+        for total in range(301):
+            score = minimax_search(game, SubtractSquareState(True, total),
+                                   table)[0]
+            self.assertEqual(tablebase.is_win(total), score == 1,
+                             "Total {} was solved wrongly.".format(total))
+
+    def test_save_and_load(self):
+        """
+        Test that a saved tablebase loads back with the same values.
+        """
+        tablebase = Tablebase(1000)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'test.tb')
+            tablebase.save(path)
+            loaded = load(path)
+            self.assertEqual(loaded.limit, 1000)
+            self.assertEqual([loaded.is_win(t) for t in range(1001)],
+                             [tablebase.is_win(t) for t in range(1001)])
+            loaded.close()
+
+    def test_roots_saved_little_endian(self):
+        """
+        Test that the roots are written little-endian whatever the byte
+        order of this machine, and read back the same.
+        """
+        tablebase = Tablebase(1000)
+        roots = list(build_roots(1000))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'test.tb')
+            tablebase.save(path)
+            with open(path, 'rb') as file:
+                data = file.read()
+            self.assertEqual(data[-2 * 1001:],
+                             struct.pack('<1001H', *roots))
+            loaded = load(path)
+            self.assertEqual([loaded.best_move(t) for t in range(1, 1001)],
+                             [tablebase.best_move(t) for t in range(1, 1001)])
+            loaded.close()
+
+    def test_limit_bounded(self):
+        """
+        Test that a tablebase too large for two-byte roots is refused.
+        """
+        self.assertRaises(ValueError, Tablebase, MAX_LIMIT + 1)
+
+    def test_load_rejects_other_files(self):
+        """
+        Test that loading a file that is not a tablebase raises ValueError.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bad.tb')
+            with open(path, 'wb') as file:
+                file.write(b'not a tablebase at all')
+            self.assertRaises(ValueError, load, path)
+
+    def test_strategy_matches_minimax(self):
+        """
+        Test that tablebase_strategy picks the move recursive_minimax picks.
+        """
+        for total in [1, 2, 4, 18, 19, 50, 97]:
+            with patch('builtins.input', return_value=str(total)):
+                game = SubtractSquareGame(True)
+            self.assertEqual(tablebase_strategy(game),
+                             recursive_minimax(game))
+
+    def test_strategy_large_total(self):
+        """
+        Test that tablebase_strategy answers a winning total far beyond
+        minimax's reach with a winning move.
+        """
+        with patch('builtins.input', return_value='300000'):
+            game = SubtractSquareGame(True)
+        move = tablebase_strategy(game)
+        tablebase = Tablebase(300000)
+        self.assertTrue(tablebase.is_win(300000))
+        self.assertIn(move, game.current_state.get_possible_moves())
+        self.assertFalse(tablebase.is_win(300000 - move))
+
+    def test_best_move_is_smallest_winning_square(self):
+        """
+        Test that the stored best moves are the smallest winning squares, 1
+        for lost totals, also after a round trip through a file.
+        """
+        tablebase = Tablebase(3000)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'test.tb')
+            tablebase.save(path)
+            loaded = load(path)
+            for total in range(1, 3001):
+                winning = [n * n for n in range(1, 60) if n * n <= total and
+                           not tablebase.is_win(total - n * n)]
+                expected = winning[0] if winning else 1
+                self.assertEqual(tablebase.best_move(total), expected)
+                self.assertEqual(loaded.best_move(total), expected)
+            loaded.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
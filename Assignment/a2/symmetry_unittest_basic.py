@@ -0,0 +1,88 @@
+"""
+Unittests for the mirror symmetry of Stonehenge boards.
+
+A position and its mirror image must share one key, on both state backends,
+with moves mapped between them; and the caches built on those keys must store
+one entry for both and answer each with its own move.
+"""
+import random
+import unittest
+
+from eval_cache import EvalCache
+from proof_number import ProofNumberSearch
+from stonehenge_bitboard import from_state
+from stonehenge_game import StonehengeGame
+from stonehenge_state import StonehengeState
+from transposition import canonical_key, map_move
+
+
+def random_games(size, count, seed=0):
+    """
+    Return the move sequences of count random games on a board of
+    side-length size.
+    """
+    rand, games = random.Random(seed), []
+    for _ in range(count):
+        state, moves = StonehengeState(True, size), []
+        while state.get_possible_moves():
+            moves.append(rand.choice(state.get_possible_moves()))
+            state = state.make_move(moves[-1])
+        games.append(moves)
+    return games
+
+
+class SymmetryUnitTests(unittest.TestCase):
+    def test_mirror_images_share_keys(self):
+        """
+        Test that every position of random games and its mirror image have
+        the same key, with moves mapped to the matching moves.
+        """
+        for size in range(1, 6):
+            for moves in random_games(size, 5, size):
+                state = StonehengeState(True, size)
+                mirror = StonehengeState(True, size)
+                for move in moves:
+                    state = state.make_move(move)
+                    mirror = mirror.make_move(state.mirror_move(move))
+                    for a, b in [(state, mirror),
+                                 (from_state(state), from_state(mirror))]:
+                        key, mirrored = canonical_key(a)
+                        self.assertEqual(key, canonical_key(b)[0])
+                        self.assertEqual(
+                            sorted(map_move(a, m, True)
+                                   for m in a.get_possible_moves()),
+                            sorted(b.get_possible_moves()))
+                    self.assertEqual(str(from_state(mirror)), str(mirror))
+
+    def test_eval_cache_shares_entries(self):
+        """
+        Test that a move cached for a position is given back, mapped, for
+        its mirror image.
+        """
+        cache = EvalCache(':memory:')
+        state = StonehengeState(True, 3).make_move('A')
+        mirror = StonehengeState(True, 3).make_move(state.mirror_move('A'))
+        cache.put(state, 1, 'D')
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.get(mirror), (1, state.mirror_move('D')))
+        self.assertEqual(cache.get(state), (1, 'D'))
+        cache.close()
+
+    def test_proof_number_mirrors(self):
+        """
+        Test that the proof-number search solves a position and its mirror
+        image alike, searching the second one no further.
+        """
+        game = StonehengeGame(True, '3')
+        solver = ProofNumberSearch(game)
+        state = game.current_state.make_move('B')
+        mirror = game.current_state.make_move(state.mirror_move('B'))
+        score, move = solver.solve(state)
+        nodes = solver.nodes
+        self.assertEqual(solver.solve(mirror),
+                         (score, state.mirror_move(move)))
+        self.assertEqual(solver.nodes, nodes)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,227 @@
+"""
+A headless tournament runner: plays many games between two entries of
+usable_strategies on an entry of playable_games, without asking for input or
+printing states, and reports how the strategies did.
+
+Usage: python tournament.py GAME P1 P2 SETTING [-n GAMES] [-w WORKERS]
+                            [--json PATH] [--csv PATH]
+
+SETTING is the number to subtract from for SubtractSquare ('s'), and the
+side-length of the board for Stonehenge ('h'). Player 1 starts the even
+numbered games and player 2 the odd ones.
+"""
+import csv
+import json
+import math
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from time import perf_counter
+from typing import Any
+from game_interface import playable_games, usable_strategies
+from mcts import lightweight
+from search_stats import collect
+from strategy import clear_tables
+
+PLAYERS = ('p1', 'p2')
+# The strategies that can only play one game, mapped to the key of that game.
+GAME_ONLY_STRATEGIES = {'tb': 's'}
+
+
+def play_game(game_key: str, setting: Any, strategies: tuple,
+              p1_starts: bool) -> dict:
+    """
+    Play one game of playable_games[game_key] with the given setting, where
+    strategies holds the keys of the strategies of p1 and p2, and return
+    what happened: the winner ('p1', 'p2' or None for a tie), the number of
+    moves, and the latency (in seconds) and nodes searched of every move of
+    each player.
+
+    Every game starts with the module-wide tables of the strategies empty,
+    and the nodes counted include those searched on the lightweight states
+    (bitboards for Stonehenge) that some strategies search instead, so the
+    counts are the work each move really took.
+
+    Raise ValueError if a strategy picks an invalid move.
+
+    >>> result = play_game('s', 10, ('ro', 'mr'), True)
+    >>> result['winner'], result['moves']
+    ('p2', 4)
+    >>> len(result['latency']['p1']), len(result['nodes']['p2'])
+    (2, 2)
+    """
+    game = playable_games[game_key](p1_starts, str(setting))
+    result = {'winner': None, 'moves': 0,
+              'latency': {'p1': [], 'p2': []}, 'nodes': {'p1': [], 'p2': []}}
+    state_classes = (type(game.current_state),
+                     type(lightweight(game.current_state)))
+    clear_tables()
+    while not game.is_over(game.current_state):
+        player = game.current_state.get_current_player_name()
+        strategy = usable_strategies[strategies[PLAYERS.index(player)]]
+        with collect(*state_classes) as stats:
+            start = perf_counter()
+            move = strategy(game)
+            result['latency'][player].append(perf_counter() - start)
+        result['nodes'][player].append(stats.nodes)
+        if not game.current_state.is_valid_move(move):
+            raise ValueError('{} picked the invalid move {!r}'.format(
+                strategy.__name__, move))
+        game.current_state = game.current_state.make_move(move)
+        result['moves'] += 1
+    for player in PLAYERS:
+        if game.is_winner(player):
+            result['winner'] = player
+    return result
+
+
+def percentile(values: list, fraction: float) -> float:
+    """
+    Return the nearest-rank percentile fraction (between 0 and 1) of the
+    non-empty list values.
+
+    >>> percentile([4, 1, 3, 2], 0.5)
+    2
+    >>> percentile([4, 1, 3, 2], 0.99)
+    4
+    """
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def summarize(values: list) -> dict:
+    """
+    Return the median, 90th and 99th percentile and maximum of the move
+    latencies in values (seconds), in milliseconds.
+
+    >>> summarize([0.001, 0.002])
+    {'p50': 1.0, 'p90': 2.0, 'p99': 2.0, 'max': 2.0}
+    """
+    if not values:
+        return {'p50': None, 'p90': None, 'p99': None, 'max': None}
+    return {'p50': percentile(values, 0.5) * 1000,
+            'p90': percentile(values, 0.9) * 1000,
+            'p99': percentile(values, 0.99) * 1000,
+            'max': max(values) * 1000}
+
+
+def run_tournament(game_key: str, setting: Any, p1: str, p2: str,
+                   games: int = 10, workers: int = 1) -> dict:
+    """
+    Play games games of playable_games[game_key] between the strategies
+    usable_strategies[p1] and usable_strategies[p2], in workers worker
+    processes if workers is more than 1, and return a report of the
+    tournament, which includes the result of every game.
+
+    Raise ValueError for an unknown game or strategy, for the interactive
+    strategy, which needs a human, and for a strategy that cannot play the
+    game (see GAME_ONLY_STRATEGIES).
+
+    >>> report = run_tournament('s', 10, 'ro', 'mr', games=4)
+    >>> report['wins'], report['win_rate']['p2']
+    ({'p1': 2, 'p2': 2, 'tie': 0}, 0.5)
+    """
+    if game_key not in playable_games:
+        raise ValueError('unknown game {!r}'.format(game_key))
+    for key in (p1, p2):
+        if key not in usable_strategies or key == 'i':
+            raise ValueError('{!r} is not a usable headless strategy'.format(
+                key))
+        if GAME_ONLY_STRATEGIES.get(key, game_key) != game_key:
+            raise ValueError('{!r} cannot play {}'.format(
+                key, playable_games[game_key].__name__))
+    starts = [n % 2 == 0 for n in range(games)]
+    start = perf_counter()
+    if workers > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(play_game, repeat(game_key),
+                                    repeat(setting), repeat((p1, p2)),
+                                    starts))
+    else:
+        results = [play_game(game_key, setting, (p1, p2), p1_starts)
+                   for p1_starts in starts]
+    seconds = perf_counter() - start
+    wins = {'p1': 0, 'p2': 0, 'tie': 0}
+    for result in results:
+        wins[result['winner'] or 'tie'] += 1
+    return {'game': playable_games[game_key].__name__, 'setting': setting,
+            'p1': usable_strategies[p1].__name__,
+            'p2': usable_strategies[p2].__name__,
+            'games': games, 'workers': workers, 'wins': wins,
+            'win_rate': {player: wins[player] / games if games else 0.0
+                         for player in PLAYERS},
+            'seconds': seconds,
+            'games_per_second': games / seconds if seconds else 0.0,
+            'latency_ms': {player: summarize(
+                [t for result in results for t in result['latency'][player]])
+                           for player in PLAYERS},
+            'nodes': {player: sum(sum(result['nodes'][player])
+                                  for result in results)
+                      for player in PLAYERS},
+            'results': results}
+
+
+def write_json(report: dict, path: str) -> None:
+    """
+    Write report, as returned by run_tournament, to the JSON file at path.
+    """
+    with open(path, 'w') as file:
+        json.dump(report, file, indent=2)
+
+
+def write_csv(report: dict, path: str) -> None:
+    """
+    Write the games of report, as returned by run_tournament, to the CSV
+    file at path, one row per game.
+    """
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['game', 'first', 'winner', 'moves', 'p1_ms',
+                         'p2_ms', 'p1_nodes', 'p2_nodes'])
+        for n, result in enumerate(report['results']):
+            writer.writerow([n, 'p1' if n % 2 == 0 else 'p2',
+                             result['winner'] or 'tie', result['moves'],
+                             sum(result['latency']['p1']) * 1000,
+                             sum(result['latency']['p2']) * 1000,
+                             sum(result['nodes']['p1']),
+                             sum(result['nodes']['p2'])])
+
+
+def main(args: list = None) -> dict:
+    """
+    Run the tournament described by the command-line arguments args (taken
+    from sys.argv if not given), print its summary, write it out as asked,
+    and return its report.
+    """
+    from argparse import ArgumentParser
+    parser = ArgumentParser(description='Play a headless tournament.')
+    parser.add_argument('game', choices=sorted(playable_games))
+    parser.add_argument('p1', choices=sorted(usable_strategies))
+    parser.add_argument('p2', choices=sorted(usable_strategies))
+    parser.add_argument('setting')
+    parser.add_argument('-n', '--games', type=int, default=10)
+    parser.add_argument('-w', '--workers', type=int, default=1)
+    parser.add_argument('--json')
+    parser.add_argument('--csv')
+    options = parser.parse_args(args)
+    report = run_tournament(options.game, options.setting, options.p1,
+                            options.p2, options.games, options.workers)
+    print('{} ({}): {} vs {}, {} games in {:.2f}s ({:.2f} games/s)'.format(
+        report['game'], report['setting'], report['p1'], report['p2'],
+        report['games'], report['seconds'], report['games_per_second']))
+    for player in PLAYERS:
+        latency = report['latency_ms'][player]
+        if latency['p50'] is None:
+            continue
+        print('{}: win rate {:.2f}, {} nodes, move latency p50 {:.3f} ms, '
+              'p90 {:.3f} ms, p99 {:.3f} ms'.format(
+                  player, report['win_rate'][player], report['nodes'][player],
+                  latency['p50'], latency['p90'], latency['p99']))
+    if options.json:
+        write_json(report, options.json)
+    if options.csv:
+        write_csv(report, options.csv)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Unittests for the headless tournament runner.
+"""
+import csv
+import json
+import os
+import tempfile
+import unittest
+
+from tournament import play_game, run_tournament, write_csv, write_json
+
+
+class TournamentUnitTests(unittest.TestCase):
+    def test_play_game_headless(self):
+        """
+        Test that a game plays out without input and that every move is
+        timed and counted.
+        """
+        result = play_game('h', 2, ('ro', 'mi'), True)
+        self.assertIn(result['winner'], ['p1', 'p2'])
+        self.assertEqual(result['moves'], len(result['latency']['p1']) +
+                         len(result['latency']['p2']))
+        self.assertEqual(len(result['nodes']['p2']),
+                         len(result['latency']['p2']))
+        self.assertTrue(all(nodes > 0 for nodes in result['nodes']['p2']))
+
+    def test_nodes_are_real_work(self):
+        """
+        Test that strategies searching bitboards report their nodes, and
+        that a game does not start from the tables of the one before.
+        """
+        for key in ('mc', 'pn'):
+            result = play_game('h', 2, (key, 'ro'), True)
+            self.assertGreater(result['nodes']['p1'][0], 0, key)
+        first = play_game('h', 2, ('mr', 'ro'), True)
+        second = play_game('h', 2, ('mr', 'ro'), True)
+        self.assertGreater(first['nodes']['p1'][0], 0)
+        self.assertEqual(second['nodes']['p1'], first['nodes']['p1'])
+
+    def test_workers_agree(self):
+        """
+        Test that a tournament played in worker processes has the same
+        results as one played in this process.
+        """
+        alone = run_tournament('h', 2, 'ab', 'ro', games=4)
+        pooled = run_tournament('h', 2, 'ab', 'ro', games=4, workers=2)
+        self.assertEqual(alone['wins'], pooled['wins'])
+        self.assertEqual([result['winner'] for result in alone['results']],
+                         [result['winner'] for result in pooled['results']])
+        self.assertEqual(sum(alone['wins'].values()), 4)
+
+    def test_rejects_interactive(self):
+        """
+        Test that the interactive strategy and unknown keys are refused.
+        """
+        self.assertRaises(ValueError, run_tournament, 's', 10, 'i', 'mr')
+        self.assertRaises(ValueError, run_tournament, 's', 10, 'mr', 'xx')
+        self.assertRaises(ValueError, run_tournament, 'x', 10, 'mr', 'mr')
+
+    def test_rejects_strategies_for_other_games(self):
+        """
+        Test that the SubtractSquare tablebase is refused for Stonehenge, on
+        either side, and accepted for SubtractSquare.
+        """
+        self.assertRaises(ValueError, run_tournament, 'h', 2, 'tb', 'mr')
+        self.assertRaises(ValueError, run_tournament, 'h', 2, 'mr', 'tb')
+        report = run_tournament('s', 10, 'tb', 'mr', games=2)
+        self.assertEqual(sum(report['wins'].values()), 2)
+
+    def test_write_results(self):
+        """
+        Test that the report is written as JSON and as one CSV row per game.
+        """
+        report = run_tournament('s', 20, 'tb', 'ro', games=3)
+        with tempfile.TemporaryDirectory() as directory:
+            json_path = os.path.join(directory, 'report.json')
+            csv_path = os.path.join(directory, 'report.csv')
+            write_json(report, json_path)
+            write_csv(report, csv_path)
+            with open(json_path) as file:
+                self.assertEqual(json.load(file)['wins'], report['wins'])
+            with open(csv_path, newline='') as file:
+                rows = list(csv.reader(file))
+            self.assertEqual(len(rows), 4)
+            self.assertEqual(rows[0][:3], ['game', 'first', 'winner'])
+
+
+if __name__ == "__main__":
+    unittest.main()
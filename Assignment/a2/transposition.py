@@ -0,0 +1,202 @@
+"""
+A transposition table module for game tree searches.
+"""
+from collections import OrderedDict
+from typing import Any
+
+# The kinds of score a table entry can hold: the exact score of the position,
+# a lower or upper bound on it (from a search that was cut off), or an
+# estimate resting on rough_outcome() at a search horizon.
+EXACT, LOWER, UPPER, HEURISTIC = 'exact', 'lower', 'upper', 'heuristic'
+
+
+def position_key(state: Any) -> tuple:
+    """
+    Return a canonical key for state, which is the same for every sequence of
+    moves that reaches the same position.
+
+    The key is built from the type and board size of state and its hash (a
+    Zobrist hash for Stonehenge, which is the same for the empty boards of
+    every size), and only states that cannot be hashed fall back on their
+    string representation.
+
+    >>> from subtract_square_state import SubtractSquareState
+    >>> position_key(SubtractSquareState(True, 5)) == \
+    position_key(SubtractSquareState(True, 5))
+    True
+    >>> from stonehenge_state import StonehengeState
+    >>> position_key(StonehengeState(False, 1)) == \
+    position_key(StonehengeState(False, 2))
+    False
+    """
+    if type(state).__hash__ is None:
+        return type(state).__name__, state.get_current_player_name(), \
+            str(state)
+    return type(state).__name__, getattr(state, 'size', None), hash(state)
+
+
+def canonical_key(state: Any) -> tuple:
+    """
+    Return a pair (key, mirrored): key is like position_key(state), but the
+    same for positions that are mirror images of each other (for states with
+    a get_symmetry_key method, such as Stonehenge states), and mirrored is
+    whether moves stored under key must be mapped by map_move first.
+
+    A table keyed this way holds one entry for each pair of mirror images.
+
+    >>> from stonehenge_state import StonehengeState
+    >>> a, mirrored = canonical_key(StonehengeState(True, 2).make_move('A'))
+    >>> b, _ = canonical_key(StonehengeState(True, 2).make_move('B'))
+    >>> a == b
+    True
+    >>> from subtract_square_state import SubtractSquareState
+    >>> canonical_key(SubtractSquareState(True, 5))[1]
+    False
+    """
+    if hasattr(state, 'get_symmetry_key'):
+        key, mirrored = state.get_symmetry_key()
+        return (type(state).__name__, state.size, key), mirrored
+    return position_key(state), False
+
+
+def map_move(state: Any, move: Any, mirrored: bool) -> Any:
+    """
+    Return move, a move of state, as the matching move of its mirror image
+    if mirrored (as returned by canonical_key), and as it is otherwise.
+
+    Mapping twice gives back move, so this also maps a move stored under
+    the key of state back to a move of state.
+
+    >>> from stonehenge_state import StonehengeState
+    >>> map_move(StonehengeState(True, 2), 'A', True)
+    'B'
+    >>> map_move(StonehengeState(True, 2), None, True) is None
+    True
+    """
+    if mirrored and move is not None:
+        return state.mirror_move(move)
+    return move
+
+
+class TranspositionTable:
+    """
+    A bounded table mapping position keys to the score, the best move and the
+    kind of score (EXACT, LOWER, UPPER or HEURISTIC) found for that position.
+
+    capacity - the maximum number of entries kept, or None for no bound
+    policy - the eviction policy, 'lru' or 'fifo'
+    hits - the number of lookups that found an entry
+    misses - the number of lookups that found nothing
+    """
+    capacity: Any
+    policy: str
+    hits: int
+    misses: int
+
+    POLICIES = ('lru', 'fifo')
+
+    def __init__(self, capacity: Any = 1000000, policy: str = 'lru') -> None:
+        """
+        Initialize an empty transposition table.
+
+        >>> table = TranspositionTable(2)
+        >>> len(table)
+        0
+        >>> TranspositionTable(2, 'random')
+        Traceback (most recent call last):
+        ...
+        ValueError: unknown eviction policy 'random'
+        """
+        if policy not in TranspositionTable.POLICIES:
+            raise ValueError('unknown eviction policy {!r}'.format(policy))
+        self.capacity, self.policy = capacity, policy
+        self.hits, self.misses = 0, 0
+        self._entries = OrderedDict()
+
+    def __len__(self) -> int:
+        """
+        Return the number of entries in this table.
+        """
+        return len(self._entries)
+
+    def __contains__(self, key: Any) -> bool:
+        """
+        Return whether key has an entry in this table.
+
+        >>> table = TranspositionTable()
+        >>> table.put('k', 1, 'A')
+        >>> 'k' in table
+        True
+        """
+        return key in self._entries
+
+    def get(self, key: Any) -> Any:
+        """
+        Return the (score, move, bound) entry stored for key, or None if
+        there is none.
+
+        >>> table = TranspositionTable()
+        >>> table.put('k', -1, 'B')
+        >>> table.get('k')
+        (-1, 'B', 'exact')
+        >>> table.put('k', 0, 'C', LOWER)
+        >>> table.get('k')
+        (0, 'C', 'lower')
+        >>> table.get('x') is None
+        True
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if self.policy == 'lru':
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Any, score: int, move: Any, bound: str = EXACT) -> None:
+        """
+        Store score, move and the kind of bound score is for key, evicting
+        entries when the table is over capacity.
+
+        >>> table = TranspositionTable(2)
+        >>> table.put('a', 1, 'A')
+        >>> table.put('b', 1, 'B')
+        >>> _ = table.get('a')
+        >>> table.put('c', 0, 'C')
+        >>> 'a' in table, 'b' in table, 'c' in table
+        (True, False, True)
+        >>> table = TranspositionTable(2, 'fifo')
+        >>> table.put('a', 1, 'A')
+        >>> table.put('b', 1, 'B')
+        >>> _ = table.get('a')
+        >>> table.put('c', 0, 'C')
+        >>> 'a' in table, 'b' in table, 'c' in table
+        (False, True, True)
+        """
+        self._entries[key] = (score, move, bound)
+        self._entries.move_to_end(key)
+        if self.capacity is not None:
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Remove every entry and reset the statistics of this table.
+
+        >>> table = TranspositionTable()
+        >>> table.put('a', 1, 'A')
+        >>> table.clear()
+        >>> len(table)
+        0
+        """
+        self._entries.clear()
+        self.hits, self.misses = 0, 0
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
+
+    from doctest import testmod
+    testmod()
@@ -0,0 +1,171 @@
+"""
+Unittests for the transposition table, its eviction policies and the keys
+it is used with.
+
+Keys must tell apart every two positions a search can meet, the boards of
+different sizes included.
+"""
+import random
+import unittest
+from time import perf_counter
+from unittest.mock import patch
+
+from eval_cache import state_key
+from stonehenge_bitboard import BitboardStonehengeState
+from stonehenge_game import StonehengeGame
+from stonehenge_state import StonehengeState
+from strategy import recursive_minimax, alphabeta_minimax, \
+    depth_limited_search
+from subtract_square_game import SubtractSquareGame
+from transposition import TranspositionTable, position_key, canonical_key, \
+    EXACT, LOWER, HEURISTIC
+
+
+class TranspositionUnitTests(unittest.TestCase):
+    def test_sizes_have_their_own_keys(self):
+        """
+        Test that the empty boards of different sizes, whose Zobrist hashes
+        are all 0 with p2 to move, do not share keys.
+        """
+        for state_class in (StonehengeState, BitboardStonehengeState):
+            states = [state_class(False, size) for size in range(1, 6)]
+            for key in (position_key, lambda state: canonical_key(state)[0],
+                        lambda state: state_key(state)[0]):
+                self.assertEqual(len({key(state) for state in states}), 5)
+
+    def test_tables_shared_across_sizes(self):
+        """
+        Test that a table already holding the solved board of side-length 1
+        gives no answer for the board of side-length 2, which is searched as
+        if the table were empty.
+        """
+        for strategy in (lambda game, table: recursive_minimax(game, table),
+                         lambda game, table: alphabeta_minimax(
+                             game, table=table)):
+            table, fresh = TranspositionTable(), TranspositionTable()
+            strategy(StonehengeGame(False, '1'), table)
+            solved = len(table)
+            self.assertEqual(strategy(StonehengeGame(False, '2'), table),
+                             strategy(StonehengeGame(False, '2'), fresh))
+            self.assertEqual(len(table), solved + len(fresh))
+
+    def test_equality_checks_owners(self):
+        """
+        Test that states whose hashes match but whose boards differ are not
+        equal.
+        """
+        a = StonehengeState(True, 2).make_move('A')
+        b = StonehengeState(True, 2).make_move('B')
+        with patch.object(StonehengeState, 'zobrist', return_value=0):
+            self.assertEqual(hash(a), hash(b))
+            self.assertNotEqual(a, b)
+            self.assertEqual(a, StonehengeState(True, 2).make_move('A'))
+
+    def test_hash_survives_apply_and_undo(self):
+        """
+        Test that applying a move in place hashes like making it, and taking
+        it back restores the hash, along random games.
+        """
+        rnd = random.Random(209)
+        for size in range(1, 5):
+            state = StonehengeState(rnd.random() < 0.5, size)
+            while state.get_possible_moves():
+                before = hash(state)
+                move = rnd.choice(state.get_possible_moves())
+                made = state.make_move(move)
+                token = state.apply_move(move)
+                self.assertEqual(hash(state), hash(made))
+                self.assertEqual(state, made)
+                state.undo_move(token)
+                self.assertEqual(hash(state), before)
+                state = made
+
+    def test_lru_evicts_least_recently_used(self):
+        """
+        Test that a full 'lru' table evicts the entry looked up or stored
+        longest ago, and counts its hits and misses.
+        """
+        table = TranspositionTable(3)
+        for key in 'abc':
+            table.put(key, 1, key.upper())
+        self.assertEqual(table.get('a'), (1, 'A', EXACT))
+        self.assertIsNone(table.get('x'))
+        table.put('d', 0, 'D')
+        self.assertEqual([key in table for key in 'abcd'],
+                         [True, False, True, True])
+        self.assertEqual((table.hits, table.misses), (1, 1))
+
+    def test_fifo_ignores_lookups(self):
+        """
+        Test that a full 'fifo' table evicts the entry stored longest ago,
+        however recently it was looked up.
+        """
+        table = TranspositionTable(3, 'fifo')
+        for key in 'abc':
+            table.put(key, 1, key.upper())
+        table.get('a')
+        table.put('d', 0, 'D')
+        self.assertEqual([key in table for key in 'abcd'],
+                         [False, True, True, True])
+
+    def test_put_replaces_entry(self):
+        """
+        Test that storing a key again replaces its entry without growing the
+        table, and makes it the last to be evicted under either policy.
+        """
+        for policy in TranspositionTable.POLICIES:
+            table = TranspositionTable(2, policy)
+            table.put('a', 0, 'A', LOWER)
+            table.put('b', 1, 'B')
+            table.put('a', 1, 'C')
+            self.assertEqual(len(table), 2)
+            self.assertEqual(table.get('a'), (1, 'C', EXACT))
+            table.put('c', -1, 'D', HEURISTIC)
+            self.assertEqual([key in table for key in 'abc'],
+                             [True, False, True])
+
+    def test_unbounded_table(self):
+        """
+        Test that a table of capacity None never evicts.
+        """
+        table = TranspositionTable(None)
+        for n in range(1000):
+            table.put(n, 0, None)
+        self.assertEqual(len(table), 1000)
+        self.assertIn(0, table)
+
+    def test_small_tables_give_same_results(self):
+        """
+        Test that searches sharing a table far too small for their game tree
+        find the same moves as searches with an unbounded table.
+        """
+        for game in (lambda: StonehengeGame(True, '2'),
+                     lambda: SubtractSquareGame(True, '40')):
+            for policy in TranspositionTable.POLICIES:
+                for strategy in (
+                        lambda game, table: recursive_minimax(game, table),
+                        lambda game, table: alphabeta_minimax(
+                            game, table=table)):
+                    small = TranspositionTable(8, policy)
+                    self.assertEqual(
+                        strategy(game(), small),
+                        strategy(game(), TranspositionTable(None)))
+                    self.assertLessEqual(len(small), 8)
+
+    def test_depths_kept_apart(self):
+        """
+        Test that a shallower search of a position does not replace the
+        entry stored for it by a deeper one.
+        """
+        game, table = StonehengeGame(True, '3'), TranspositionTable(None)
+        state = game.current_state
+        deep = depth_limited_search(game, state, 2, perf_counter() + 60,
+                                    table)
+        depth_limited_search(game, state, 1, perf_counter() + 60, table)
+        key = position_key(state)
+        self.assertIn((key, 1), table)
+        self.assertEqual(table.get((key, 2))[:2], deep[:2])
+
+
+if __name__ == "__main__":
+    unittest.main()